@@ -15,6 +15,23 @@ logger = logging.getLogger(__name__)
 class AlertService:
     """Serviço para gerenciar e disparar alertas"""
     
+    @staticmethod
+    def check_error(error_id: int):
+        """
+        Verifica os alertas de um erro em uma sessão própria (tarefa em background)
+        
+        A sessão da requisição não é reaproveitada: no modo DB_ASYNC ela é uma
+        AsyncSession, inutilizável fora do event loop.
+        """
+        from database import SessionLocal
+        db = SessionLocal()
+        try:
+            error = db.query(models.ErrorLog).filter(models.ErrorLog.id == error_id).first()
+            if error is not None:
+                AlertService.check_and_trigger_alerts(db, error)
+        finally:
+            db.close()
+    
     @staticmethod
     def check_and_trigger_alerts(db: Session, error: models.ErrorLog):
         """
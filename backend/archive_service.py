@@ -0,0 +1,327 @@
+"""
+Arquivo frio de error_logs em Parquet, particionado por dia
+
+O tiering move os erros mais antigos que a janela quente
+(COLD_ARCHIVE_AFTER_DAYS) para arquivos Parquet em
+COLD_ARCHIVE_DIR/error_logs/day=AAAA-MM-DD/, e depois os remove do banco.
+Os endpoints de estatística (resumo e timeline) somam ao resultado do banco
+uma varredura vetorizada (pyarrow.dataset) desses arquivos quando o período
+pedido passa da janela quente. O top de erros já vem dos rollups horários,
+que o tiering não altera.
+
+Reexecutar é seguro: os ids já presentes nos arquivos de um dia são removidos
+do banco antes de arquivar o restante, sem duplicar linhas.
+
+Requer pyarrow; sem ele, ou sem COLD_ARCHIVE_DIR, o arquivo fica desativado.
+
+Configuração:
+    COLD_ARCHIVE_DIR=/var/lib/error-dashboard/archive
+    COLD_ARCHIVE_AFTER_DAYS=90
+    COLD_ARCHIVE_BATCH_SIZE=5000
+    COLD_ARCHIVE_INTERVAL_HOURS=24   (0 desativa a execução em segundo plano na API)
+
+Uso manual (ex: cron):
+    python archive_service.py
+"""
+
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import delete, func, select, text
+from database import engine, exclusive_job, disable_statement_timeout
+from export_service import ExportService
+from partition_service import PartitionService
+import models
+import logging
+
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.dataset
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - dependência opcional
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+COLD_ARCHIVE_DIR = os.getenv("COLD_ARCHIVE_DIR", "")
+COLD_ARCHIVE_AFTER_DAYS = int(os.getenv("COLD_ARCHIVE_AFTER_DAYS", "90"))
+COLD_ARCHIVE_BATCH_SIZE = int(os.getenv("COLD_ARCHIVE_BATCH_SIZE", "5000"))
+COLD_ARCHIVE_INTERVAL_HOURS = float(os.getenv("COLD_ARCHIVE_INTERVAL_HOURS", "24"))
+
+ARCHIVE_FIELDS = list(models.ErrorLog.__table__.c.keys())
+SUMMARY_COLUMNS = ["severity", "error_type", "source", "status"]
+TIMELINE_SPLIT_COLUMNS = {"severity": "severity", "type": "error_type"}
+
+# Chave do advisory lock do Postgres: um tiering por vez entre instâncias
+_ADVISORY_LOCK_KEY = 4_042_001
+
+
+def _utc(moment: datetime) -> datetime:
+    """Datetime naive (UTC, como no restante da API) ou aware → aware em UTC"""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def _day_start(moment: datetime) -> datetime:
+    return _utc(moment).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class ArchiveService:
+    """Tiering para Parquet e consultas agregadas sobre o arquivo"""
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(COLD_ARCHIVE_DIR) and pyarrow is not None
+
+    @staticmethod
+    def hot_window_start(now: Optional[datetime] = None) -> datetime:
+        """Início (UTC, meia-noite) da janela quente: antes dela os erros estão no arquivo"""
+        return _day_start((now or datetime.utcnow()) - timedelta(days=COLD_ARCHIVE_AFTER_DAYS))
+
+    @staticmethod
+    def covers(start_date: datetime) -> bool:
+        """Se um período a partir de `start_date` precisa consultar o arquivo"""
+        return ArchiveService.enabled() and _utc(start_date) < ArchiveService.hot_window_start()
+
+    @staticmethod
+    def _table_dir() -> str:
+        return os.path.join(COLD_ARCHIVE_DIR, "error_logs")
+
+    @staticmethod
+    def _day_dir(day: datetime) -> str:
+        return os.path.join(ArchiveService._table_dir(), f"day={day:%Y-%m-%d}")
+
+    # ==================== TIERING ====================
+
+    @staticmethod
+    def tier(now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Move para o arquivo os erros anteriores à janela quente, um dia por vez
+
+        Returns:
+            dict: {"days": dias processados, "archived": linhas movidas}; None se
+            outra instância já está executando
+        """
+        if not ArchiveService.enabled():
+            raise RuntimeError("Arquivo frio desativado (defina COLD_ARCHIVE_DIR e instale pyarrow)")
+
+        with exclusive_job(_ADVISORY_LOCK_KEY) as acquired:
+            if not acquired:
+                logger.info("Tiering já em execução em outra instância")
+                return None
+            return ArchiveService._tier(now)
+
+    @staticmethod
+    def _tier(now: Optional[datetime]) -> Dict[str, Any]:
+        table = models.ErrorLog.__table__
+        cutoff = ArchiveService.hot_window_start(now)
+        with engine.connect() as connection:
+            oldest = connection.execute(
+                select(func.min(table.c.timestamp)).where(table.c.timestamp < cutoff.replace(tzinfo=None))
+            ).scalar()
+
+        result = {"days": 0, "archived": 0}
+        day = _day_start(oldest) if oldest is not None else cutoff
+        while day < cutoff:
+            result["archived"] += ArchiveService._tier_day(day)
+            result["days"] += 1
+            day += timedelta(days=1)
+
+        if result["days"]:
+            result["archived"] += ArchiveService._drop_empty_partitions(cutoff)
+            from cache_service import response_cache
+            response_cache.invalidate("stats")
+
+        logger.info(f"Tiering para o arquivo frio: {result}")
+        return result
+
+    @staticmethod
+    def _drop_empty_partitions(cutoff: datetime) -> int:
+        """
+        Remove as partições anteriores a `cutoff` já esvaziadas pelo tiering (Postgres)
+
+        Linhas com timestamp antigo podem chegar a uma partição depois que o dia
+        foi arquivado (importação de dumps, log_importer, backfills). A partição
+        só é removida se estiver vazia, conferido sob lock na transação do DROP;
+        senão os dias dela passam por mais uma rodada de tiering antes.
+
+        Returns:
+            int: Linhas arquivadas nas rodadas extras
+        """
+        with engine.connect() as connection:
+            if not PartitionService.is_partitioned(connection):
+                return 0
+            expired = [item for item in PartitionService.partitions(connection) if item[2] <= cutoff]
+
+        archived = 0
+        for name, lower, upper in expired:
+            for attempt in range(2):
+                with engine.begin() as connection:
+                    connection.execute(text(f'LOCK TABLE "{name}" IN ACCESS EXCLUSIVE MODE'))
+                    if connection.execute(text(f'SELECT 1 FROM "{name}" LIMIT 1')).first() is None:
+                        connection.execute(text(f'DROP TABLE "{name}"'))
+                        break
+                if attempt == 0:
+                    day = _day_start(lower)
+                    while day < upper:
+                        archived += ArchiveService._tier_day(day)
+                        day += timedelta(days=1)
+            else:
+                logger.warning(f"Partição {name} recebeu linhas durante o tiering; fica para a próxima execução")
+        return archived
+
+    @staticmethod
+    def _archived_ids(day: datetime) -> Set[int]:
+        directory = ArchiveService._day_dir(day)
+        if not os.path.isdir(directory):
+            return set()
+        ids: Set[int] = set()
+        for name in os.listdir(directory):
+            if name.endswith(".parquet") and not name.startswith("."):
+                column = pyarrow.parquet.read_table(os.path.join(directory, name), columns=["id"]).column("id")
+                ids.update(column.to_pylist())
+        return ids
+
+    @staticmethod
+    def _delete_ids(ids: List[int], start: datetime, end: datetime):
+        """Remove do banco, em lotes, as linhas do dia já gravadas no arquivo"""
+        table = models.ErrorLog.__table__
+        for offset in range(0, len(ids), COLD_ARCHIVE_BATCH_SIZE):
+            chunk = ids[offset:offset + COLD_ARCHIVE_BATCH_SIZE]
+            with engine.begin() as connection:
+                connection.execute(delete(table).where(
+                    table.c.id.in_(chunk), table.c.timestamp >= start, table.c.timestamp < end
+                ))
+
+    @staticmethod
+    def _tier_day(day: datetime) -> int:
+        table = models.ErrorLog.__table__
+        start, end = day.replace(tzinfo=None), (day + timedelta(days=1)).replace(tzinfo=None)
+        in_day = [table.c.timestamp >= start, table.c.timestamp < end]
+
+        # Retomada: linhas arquivadas numa execução interrompida antes do DELETE
+        already = ArchiveService._archived_ids(day)
+        if already:
+            ArchiveService._delete_ids(sorted(already), start, end)
+
+        directory = ArchiveService._day_dir(day)
+        name = f"part-{uuid.uuid4().hex}.parquet"
+        # Prefixo "." esconde o arquivo incompleto das consultas (pyarrow.dataset)
+        temporary = os.path.join(directory, f".{name}.tmp")
+        schema = ExportService.arrow_schema(ARCHIVE_FIELDS)
+        ids: List[int] = []
+        writer = None
+        try:
+            with engine.connect() as connection:
+                disable_statement_timeout(connection)
+                rows = connection.execution_options(yield_per=COLD_ARCHIVE_BATCH_SIZE).execute(
+                    select(*(table.c[field] for field in ARCHIVE_FIELDS)).where(*in_day)
+                )
+                for batch in rows.partitions():
+                    if writer is None:
+                        os.makedirs(directory, exist_ok=True)
+                        writer = pyarrow.parquet.ParquetWriter(temporary, schema, compression="zstd")
+                    writer.write_table(ExportService.arrow_table(batch, ARCHIVE_FIELDS, schema))
+                    ids.extend(row.id for row in batch)
+        finally:
+            if writer is not None:
+                writer.close()
+        if not ids:
+            return 0
+
+        os.replace(temporary, os.path.join(directory, name))
+        ArchiveService._delete_ids(ids, start, end)
+        return len(ids)
+
+    # ==================== CONSULTAS ====================
+
+    @staticmethod
+    def _scan(start_date: datetime, columns: List[str]):
+        """Tabela Arrow com `columns` dos erros arquivados a partir de `start_date`"""
+        directory = ArchiveService._table_dir()
+        if not os.path.isdir(directory):
+            return None
+        start = _utc(start_date)
+        dataset = pyarrow.dataset.dataset(
+            directory,
+            format="parquet",
+            partitioning=pyarrow.dataset.partitioning(pyarrow.schema([("day", pyarrow.string())]), flavor="hive"),
+        )
+        # Filtro por dia descarta diretórios inteiros; o de timestamp corta o primeiro dia
+        condition = (pyarrow.dataset.field("day") >= f"{start:%Y-%m-%d}") & (
+            pyarrow.dataset.field("timestamp") >= pyarrow.scalar(start, type=pyarrow.timestamp("us", tz="UTC"))
+        )
+        return dataset.to_table(columns=columns, filter=condition)
+
+    @staticmethod
+    def summary_counts(start_date: datetime) -> List[Dict[str, Any]]:
+        """Contagens arquivadas por (severity, error_type, source, status) a partir de `start_date`"""
+        table = ArchiveService._scan(start_date, SUMMARY_COLUMNS + ["id"])
+        if table is None or table.num_rows == 0:
+            return []
+        grouped = table.group_by(SUMMARY_COLUMNS).aggregate([("id", "count")])
+        return [
+            {**{name: row[name] for name in SUMMARY_COLUMNS}, "count": row["id_count"]}
+            for row in grouped.to_pylist()
+        ]
+
+    @staticmethod
+    def timeline_counts(start_date: datetime, step: int, split_by: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Contagens arquivadas por bucket (epoch // step) e, opcionalmente, por série
+
+        Returns:
+            list: [{"bucket": int, "count": int, "series": str?}, ...]
+        """
+        split_column = TIMELINE_SPLIT_COLUMNS.get(split_by) if split_by else None
+        table = ArchiveService._scan(start_date, ["timestamp"] + ([split_column] if split_column else []))
+        if table is None or table.num_rows == 0:
+            return []
+        micros = table.column("timestamp").cast(pyarrow.int64())
+        buckets = pyarrow.compute.divide(micros, step * 1_000_000)
+        keys = ["bucket"] + (["series"] if split_column else [])
+        columns = {"bucket": buckets}
+        if split_column:
+            columns["series"] = table.column(split_column)
+        grouped = pyarrow.table(columns).group_by(keys).aggregate([("bucket", "count")])
+        return [
+            {**{key: row[key] for key in keys}, "count": row["bucket_count"]}
+            for row in grouped.to_pylist()
+        ]
+
+    @staticmethod
+    def start_background() -> Optional[threading.Thread]:
+        """Executa o tiering a cada COLD_ARCHIVE_INTERVAL_HOURS em uma thread daemon"""
+        if COLD_ARCHIVE_INTERVAL_HOURS <= 0 or not ArchiveService.enabled():
+            return None
+
+        stop = threading.Event()
+
+        def loop():
+            while True:
+                try:
+                    ArchiveService.tier()
+                except Exception as e:
+                    logger.error(f"Erro no tiering para o arquivo frio: {str(e)}")
+                if stop.wait(COLD_ARCHIVE_INTERVAL_HOURS * 3600):
+                    return
+
+        thread = threading.Thread(target=loop, name="cold-archive", daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+    if not ArchiveService.enabled():
+        print("Arquivo frio desativado (defina COLD_ARCHIVE_DIR e instale pyarrow)")
+    else:
+        result = ArchiveService.tier()
+        if result is None:
+            print("Tiering já em execução em outra instância")
+        else:
+            print(f"✓ {result['archived']} erros movidos para {COLD_ARCHIVE_DIR} ({result['days']} dias)")
@@ -0,0 +1,168 @@
+"""
+Caminho assíncrono opcional (DB_ASYNC=true): AsyncEngine com asyncpg
+
+Os endpoints de ingestão, listagem e estatística são escritos uma única vez,
+como funções síncronas sobre uma Session, e decorados com @async_endpoint.
+
+- Modo padrão: nada muda. O FastAPI executa esses endpoints no threadpool, e a
+  concorrência fica limitada pelo número de threads (40 por padrão).
+- DB_ASYNC=true: os endpoints viram `async def` e recebem uma AsyncSession. O
+  corpo roda em `AsyncSession.run_sync`, um greenlet sobre o driver
+  assíncrono. Enquanto uma requisição espera o banco, o event loop atende as
+  outras, sem ocupar uma thread.
+
+Só a espera pelo banco libera o loop. Todo o resto do corpo (ORM, cache e seu
+single-flight, serialização com orjson) roda na thread do event loop e bloqueia
+as outras requisições enquanto executa. O modo troca threads por conexões em
+espera; não acelera endpoints limitados por CPU, e um worker com o loop ocupado
+atende uma requisição por vez.
+
+Jobs, manutenção, alertas e os endpoints de triagem continuam no engine
+síncrono de database.py.
+
+Requer asyncpg (Postgres) ou aiosqlite (SQLite).
+"""
+
+import asyncio
+import functools
+import inspect
+from typing import Any, Callable, List, Optional
+
+from fastapi import Depends
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util import await_only, greenlet_spawn
+import database
+from database import (
+    DATABASE_URL, DATABASE_READ_URL, DB_ASYNC, DB_STATEMENT_TIMEOUT_MS, DB_READ_STATEMENT_TIMEOUT_MS,
+    PoolMonitor, engine_options, register_pool, tune_sqlite,
+)
+
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_url(url: str) -> str:
+    """URL do banco com o driver assíncrono (postgresql → postgresql+asyncpg)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise RuntimeError(f"DB_ASYNC não suporta o banco {backend}")
+    return parsed.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def _create_async_engine(name: str, url: str, statement_timeout_ms: int) -> AsyncEngine:
+    url = async_url(url)
+    monitor = PoolMonitor(name)
+    try:
+        created = create_async_engine(url, **engine_options(url, monitor, statement_timeout_ms, AsyncAdaptedQueuePool))
+    except ImportError as e:
+        raise RuntimeError(f"DB_ASYNC=true requer o driver {make_url(url).get_driver_name()} instalado: {e}")
+    tune_sqlite(created.sync_engine)
+    register_pool(name, monitor, created)
+    return created
+
+
+async_engine: Optional[AsyncEngine] = None
+async_read_engine: Optional[AsyncEngine] = None
+AsyncSessionLocal = AsyncReadSessionLocal = None
+
+if DB_ASYNC:
+    async_engine = _create_async_engine("primary_async", DATABASE_URL, DB_STATEMENT_TIMEOUT_MS)
+    # expire_on_commit=False: a resposta é serializada fora do greenlet, sem recarregar atributos
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if DATABASE_READ_URL:
+        async_read_engine = _create_async_engine("replica_async", DATABASE_READ_URL, DB_READ_STATEMENT_TIMEOUT_MS)
+        AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def async_read_session() -> AsyncSession:
+    """Equivalente assíncrono de database.read_session (réplica com fallback para o primário)"""
+    if AsyncReadSessionLocal is None or not database.read_replica_available():
+        return AsyncSessionLocal()
+    db = AsyncReadSessionLocal()
+    try:
+        await db.connection()
+        return db
+    except SQLAlchemyError as e:
+        await db.close()
+        database.mark_read_replica_down(e)
+        return AsyncSessionLocal()
+
+
+async def get_async_read_db():
+    db = await async_read_session()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+def gather_read_sessions(*calls: Callable[[Session], Any]) -> List[Any]:
+    """
+    Executa cada chamada com uma sessão de leitura própria, em paralelo no event loop
+
+    Equivalente de submeter `_with_session` a um ThreadPoolExecutor; só pode ser
+    chamada dentro de um endpoint @async_endpoint (corpo em greenlet).
+    """
+    async def run(call: Callable[[Session], Any]) -> Any:
+        db = await async_read_session()
+        try:
+            return await db.run_sync(call)
+        finally:
+            await db.close()
+
+    return await_only(asyncio.gather(*(run(call) for call in calls)))
+
+
+_ASYNC_DEPENDENCIES = {
+    database.get_db: get_async_db,
+    database.get_read_db: get_async_read_db,
+}
+
+
+def async_endpoint(endpoint: Callable) -> Callable:
+    """
+    Torna um endpoint síncrono `async def` quando DB_ASYNC=true
+
+    O parâmetro com Depends(get_db) ou Depends(get_read_db) passa a receber uma
+    AsyncSession; o corpo do endpoint roda em `run_sync` com a Session
+    síncrona correspondente. Sem sessão, o corpo roda num greenlet para poder
+    usar gather_read_sessions. Aplique abaixo do decorador de rota do FastAPI.
+    """
+    if not DB_ASYNC:
+        return endpoint
+
+    signature = inspect.signature(endpoint)
+    parameters = []
+    session_name = None
+    for parameter in signature.parameters.values():
+        dependency = getattr(parameter.default, "dependency", None)
+        if dependency in _ASYNC_DEPENDENCIES:
+            session_name = parameter.name
+            parameter = parameter.replace(default=Depends(_ASYNC_DEPENDENCIES[dependency]), annotation=AsyncSession)
+        parameters.append(parameter)
+
+    @functools.wraps(endpoint)
+    async def wrapper(**kwargs):
+        if session_name is None:
+            return await greenlet_spawn(endpoint, **kwargs)
+        session: AsyncSession = kwargs[session_name]
+        return await session.run_sync(lambda sync_session: endpoint(**{**kwargs, session_name: sync_session}))
+
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    return wrapper
+
+
+async def dispose_async_engines():
+    """Fecha as conexões dos pools async (desligamento da API)"""
+    for created in (async_engine, async_read_engine):
+        if created is not None:
+            await created.dispose()
@@ -0,0 +1,139 @@
+"""
+Teste de carga: endpoints no threadpool (padrão) x async (DB_ASYNC=true)
+
+Sobe a API com uvicorn (1 worker) em cada modo e dispara requisições
+concorrentes com uma mistura de ingestão, listagens e estatísticas, sem cache
+de respostas (CACHE_TTL_SECONDS=0). Mede vazão e latência (p50/p95/p99).
+
+Grava erros de teste (source "benchmark") em DATABASE_URL: use um banco
+descartável. O modo async requer asyncpg (ou aiosqlite no SQLite).
+
+Uso:
+    DATABASE_URL=postgresql://.../bench python benchmark_async.py --concurrency 200 --duration 30
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+MODES = {"threadpool": "false", "async": "true"}
+
+# (peso, método, caminho)
+REQUEST_MIX = [
+    (4, "POST", "/api/errors"),
+    (2, "GET", "/api/errors?limit=50"),
+    (2, "GET", "/api/groups?limit=50"),
+    (1, "GET", "/api/stats/summary?days=7"),
+    (1, "GET", "/api/stats/timeline?days=1&interval=hour"),
+]
+
+
+def _payload() -> dict:
+    return {
+        "message": f"Benchmark error {random.randint(0, 200)}",
+        "error_type": random.choice(["HTTP", "DATABASE", "PERFORMANCE"]),
+        "severity": random.choice(["LOW", "MEDIUM", "HIGH"]),
+        "source": "benchmark",
+        "user_id": f"user-{random.randint(0, 1000)}",
+        "error_metadata": {"environment": random.choice(["prod", "staging"])},
+    }
+
+
+async def _wait_ready(base_url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("API não respondeu a /health")
+
+
+async def _load(base_url: str, concurrency: int, duration: float) -> dict:
+    weights = [weight for weight, _, _ in REQUEST_MIX]
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                _, method, path = random.choices(REQUEST_MIX, weights)[0]
+                start = time.perf_counter()
+                try:
+                    if method == "POST":
+                        response = await client.post(path, json=_payload())
+                    else:
+                        response = await client.get(path)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50": quantiles[49] * 1000,
+        "p95": quantiles[94] * 1000,
+        "p99": quantiles[98] * 1000,
+    }
+
+
+def _run_mode(mode: str, args) -> dict:
+    env = dict(os.environ, DB_ASYNC=MODES[mode], CACHE_TTL_SECONDS="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--workers", "1", "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(_wait_ready(base_url))
+        # Aquecimento: pools e caches do banco
+        asyncio.run(_load(base_url, min(args.concurrency, 10), 3))
+        return asyncio.run(_load(base_url, args.concurrency, args.duration))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=100, help="requisições simultâneas")
+    parser.add_argument("--duration", type=float, default=20, help="segundos de carga por modo")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--modes", default="threadpool,async")
+    args = parser.parse_args()
+
+    print(f"Concorrência {args.concurrency}, {args.duration:.0f}s por modo, pool DB_POOL_SIZE={os.getenv('DB_POOL_SIZE', '5')}"
+          f"+{os.getenv('DB_MAX_OVERFLOW', '10')}\n")
+    print(f"{'modo':<12} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'erros':>7}")
+    for mode in args.modes.split(","):
+        result = _run_mode(mode, args)
+        print(
+            f"{mode:<12} {result['rps']:>9.1f} {result['p50']:>9.1f} {result['p95']:>9.1f} "
+            f"{result['p99']:>9.1f} {result['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Benchmark do conjunto de índices: baseline (revisão 0002) x derivado das consultas (0003)
+
+Para cada conjunto, recria o esquema via migrações, mede a ingestão (linhas/s)
+e a latência das consultas quentes da API. APAGA os dados de DATABASE_URL —
+use um banco descartável.
+
+Uso:
+    DATABASE_URL=postgresql://.../bench python benchmark_indexes.py --yes --rows 200000
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import func, text
+
+import models
+from database import SessionLocal, engine
+
+INDEX_SETS = {
+    "baseline (0002)": "0002",
+    "workload (0003)": "0003",
+}
+
+OPEN_STATUSES = [models.ErrorStatus.OPEN, models.ErrorStatus.IN_PROGRESS]
+
+
+def _alembic_config() -> Config:
+    directory = os.path.dirname(os.path.abspath(__file__))
+    config = Config(os.path.join(directory, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(directory, "migrations"))
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def _reset_schema(revision: str):
+    config = _alembic_config()
+    command.downgrade(config, "base")
+    command.upgrade(config, revision)
+
+
+def _ingest(rows: int, groups: int, batch_size: int) -> float:
+    """Insere grupos e erros em lotes; retorna linhas/s dos erros"""
+    now = datetime.now(timezone.utc)
+    with engine.begin() as connection:
+        connection.execute(models.ErrorGroup.__table__.insert(), [
+            {
+                "fingerprint": f"bench-{i:08d}",
+                "message_pattern": f"Benchmark error {i}",
+                "error_type": random.choice(list(models.ErrorType)),
+                "severity": random.choice(list(models.Severity)),
+                "source": "benchmark",
+                "total_occurrences": 0,
+                "status": random.choice(list(models.ErrorStatus)),
+                "first_seen": now - timedelta(days=30),
+                "last_seen": now - timedelta(seconds=random.randint(0, 30 * 86400)),
+            }
+            for i in range(groups)
+        ])
+
+    statuses = list(models.ErrorStatus)
+    started = time.perf_counter()
+    inserted = 0
+    while inserted < rows:
+        size = min(batch_size, rows - inserted)
+        batch = []
+        for i in range(size):
+            group_id = random.randint(1, groups)
+            batch.append({
+                "group_id": group_id,
+                "message": f"Benchmark error {group_id} at request {inserted + i} " + "x" * random.randint(20, 200),
+                "error_type": random.choice(list(models.ErrorType)),
+                "severity": random.choice(list(models.Severity)),
+                "source": "benchmark",
+                "stack_trace": f"Traceback (most recent call last):\n  File 'bench.py', line {group_id}",
+                "status": random.choices(statuses, weights=[10, 2, 60, 28])[0],
+                "timestamp": now - timedelta(seconds=random.randint(0, 30 * 86400)),
+                "occurrences": 1,
+            })
+        with engine.begin() as connection:
+            connection.execute(models.ErrorLog.__table__.insert(), batch)
+        inserted += size
+    elapsed = time.perf_counter() - started
+
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("ANALYZE"))
+    return rows / elapsed
+
+
+def _queries(groups: int):
+    """Consultas no mesmo formato das geradas pelos endpoints"""
+    since = datetime.now(timezone.utc) - timedelta(days=1)
+
+    def list_page(db):
+        return db.query(models.ErrorLog).order_by(
+            models.ErrorLog.timestamp.desc(), models.ErrorLog.id.desc()
+        ).limit(50).all()
+
+    def group_recent(db):
+        return db.query(models.ErrorLog).filter(
+            models.ErrorLog.group_id == random.randint(1, groups)
+        ).order_by(models.ErrorLog.timestamp.desc()).limit(50).all()
+
+    def open_errors(db):
+        return db.query(models.ErrorLog).filter(
+            models.ErrorLog.status.in_(OPEN_STATUSES)
+        ).order_by(models.ErrorLog.timestamp.desc(), models.ErrorLog.id.desc()).limit(50).all()
+
+    def open_groups(db):
+        return db.query(models.ErrorGroup).filter(
+            models.ErrorGroup.status.in_(OPEN_STATUSES)
+        ).order_by(models.ErrorGroup.last_seen.desc()).limit(50).all()
+
+    def stats_range(db):
+        return db.query(func.count(models.ErrorLog.id)).filter(
+            models.ErrorLog.timestamp >= since
+        ).scalar()
+
+    return {
+        "listagem (página 1)": list_page,
+        "erros recentes do grupo": group_recent,
+        "erros em aberto": open_errors,
+        "grupos em aberto": open_groups,
+        "contagem últimas 24h": stats_range,
+    }
+
+
+def _measure(query, repeat: int) -> float:
+    """Mediana da latência em ms"""
+    samples = []
+    db = SessionLocal()
+    try:
+        query(db)  # aquecimento
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query(db)
+            samples.append((time.perf_counter() - started) * 1000)
+            db.expunge_all()
+    finally:
+        db.close()
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--yes", action="store_true", help="confirma que o banco pode ser apagado")
+    args = parser.parse_args()
+
+    if not args.yes:
+        parser.error(f"este benchmark apaga {engine.url.render_as_string()}; confirme com --yes")
+
+    results = {}
+    for label, revision in INDEX_SETS.items():
+        random.seed(42)
+        print(f"→ {label}: recriando esquema e inserindo {args.rows} erros...")
+        _reset_schema(revision)
+        rate = _ingest(args.rows, args.groups, args.batch_size)
+        latencies = {name: _measure(query, args.repeat) for name, query in _queries(args.groups).items()}
+        results[label] = (rate, latencies)
+
+    labels = list(results)
+    print()
+    print(f"{'métrica':<28}" + "".join(f"{label:>20}" for label in labels))
+    print(f"{'ingestão (linhas/s)':<28}" + "".join(f"{results[label][0]:>20.0f}" for label in labels))
+    for name in results[labels[0]][1]:
+        print(f"{name + ' (ms)':<28}" + "".join(f"{results[label][1][name]:>20.2f}" for label in labels))
+
+    _reset_schema("head")
+
+
+if __name__ == "__main__":
+    main()
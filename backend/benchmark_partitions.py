@@ -0,0 +1,157 @@
+"""
+Benchmark do particionamento: error_logs simples (revisão 0004) x particionada (0005)
+
+Para cada layout, recria o esquema via migrações, insere erros dos últimos
+30 dias e mede a latência de consultas com filtro de período (que no layout
+particionado leem só as partições da faixa), a página de cursor e a retenção
+(DELETE das linhas antigas x DROP das partições). Somente Postgres. APAGA os
+dados de DATABASE_URL — use um banco descartável.
+
+Com 30 dias de dados, partições diárias mostram melhor a poda:
+    ERROR_LOGS_PARTITION_INTERVAL=day DATABASE_URL=postgresql://.../bench \\
+        python benchmark_partitions.py --yes --rows 500000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, text
+
+import models
+from benchmark_indexes import _ingest, _measure, _reset_schema
+from database import engine
+from pagination import apply_keyset, encode_cursor
+from partition_service import PartitionService, PARTITION_INTERVAL
+
+LAYOUTS = {
+    "simples (0004)": "0004",
+    "particionada (0005)": "0005",
+}
+
+RETENTION_DAYS = 7
+
+
+def _queries(groups: int):
+    """Consultas no formato das geradas pelos endpoints e pelo AlertService"""
+    now = datetime.now(timezone.utc)
+
+    def last_hour(db):
+        # Janela típica das regras de alerta
+        return db.query(func.count(models.ErrorLog.id)).filter(
+            models.ErrorLog.timestamp >= now - timedelta(hours=1)
+        ).scalar()
+
+    def last_day_by_severity(db):
+        return db.query(models.ErrorLog.severity, func.count(models.ErrorLog.id)).filter(
+            models.ErrorLog.timestamp >= now - timedelta(days=1)
+        ).group_by(models.ErrorLog.severity).all()
+
+    def week_range_page(db):
+        return db.query(models.ErrorLog).filter(
+            models.ErrorLog.timestamp >= now - timedelta(days=14),
+            models.ErrorLog.timestamp < now - timedelta(days=7),
+        ).order_by(models.ErrorLog.timestamp.desc(), models.ErrorLog.id.desc()).limit(50).all()
+
+    def deep_cursor_page(db):
+        cursor = encode_cursor(now - timedelta(days=20), 0)
+        return apply_keyset(
+            db.query(models.ErrorLog), models.ErrorLog.timestamp, models.ErrorLog.id, cursor
+        ).limit(50).all()
+
+    def group_recent(db):
+        return db.query(models.ErrorLog).filter(
+            models.ErrorLog.group_id == random.randint(1, groups),
+            models.ErrorLog.timestamp >= now - timedelta(days=1),
+        ).order_by(models.ErrorLog.timestamp.desc()).limit(10).all()
+
+    return {
+        "contagem última hora": last_hour,
+        "severidade últimas 24h": last_day_by_severity,
+        "página de período antigo": week_range_page,
+        "página de cursor (20 dias)": deep_cursor_page,
+        "recentes do grupo (24h)": group_recent,
+    }
+
+
+def _scanned_partitions(query_sql: str) -> int:
+    """Quantas tabelas o plano lê (1 no layout simples)"""
+    with engine.connect() as connection:
+        plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {query_sql}")).scalar()
+    relations = set()
+
+    def walk(node):
+        if "Relation Name" in node:
+            relations.add(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return len(relations)
+
+
+def _retention(partitioned: bool) -> float:
+    """Remove os erros com mais de RETENTION_DAYS dias; retorna segundos"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=RETENTION_DAYS)
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        if partitioned:
+            PartitionService.drop_partitions_before(connection, cutoff)
+            # Sobra da partição que contém o corte
+            connection.execute(text("DELETE FROM error_logs WHERE timestamp < :cutoff"), {"cutoff": cutoff})
+        else:
+            connection.execute(text("DELETE FROM error_logs WHERE timestamp < :cutoff"), {"cutoff": cutoff})
+    elapsed = time.perf_counter() - started
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        started = time.perf_counter()
+        connection.execute(text("VACUUM error_logs"))
+        elapsed += time.perf_counter() - started
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--yes", action="store_true", help="confirma que o banco pode ser apagado")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        parser.error("o particionamento requer Postgres (DATABASE_URL=postgresql://...)")
+    if not args.yes:
+        parser.error(f"este benchmark apaga {engine.url.render_as_string()}; confirme com --yes")
+
+    count_sql = "SELECT count(*) FROM error_logs WHERE timestamp >= now() - interval '1 day'"
+    results = {}
+    for label, revision in LAYOUTS.items():
+        random.seed(42)
+        print(f"→ {label}: recriando esquema e inserindo {args.rows} erros...")
+        _reset_schema(revision)
+        partitioned = revision == "0005"
+        if partitioned:
+            with engine.begin() as connection:
+                PartitionService.ensure_partitions(
+                    connection, start=datetime.now(timezone.utc) - timedelta(days=31)
+                )
+        rate = _ingest(args.rows, args.groups, args.batch_size)
+        latencies = {name: _measure(query, args.repeat) for name, query in _queries(args.groups).items()}
+        scanned = _scanned_partitions(count_sql)
+        retention = _retention(partitioned)
+        results[label] = (rate, latencies, scanned, retention)
+
+    labels = list(results)
+    print(f"\nintervalo das partições: {PARTITION_INTERVAL}\n")
+    print(f"{'métrica':<32}" + "".join(f"{label:>22}" for label in labels))
+    print(f"{'ingestão (linhas/s)':<32}" + "".join(f"{results[label][0]:>22.0f}" for label in labels))
+    for name in results[labels[0]][1]:
+        print(f"{name + ' (ms)':<32}" + "".join(f"{results[label][1][name]:>22.2f}" for label in labels))
+    print(f"{'tabelas lidas (últimas 24h)':<32}" + "".join(f"{results[label][2]:>22}" for label in labels))
+    print(f"{f'retenção {RETENTION_DAYS}d + VACUUM (s)':<32}" + "".join(f"{results[label][3]:>22.2f}" for label in labels))
+
+    _reset_schema("head")
+
+
+if __name__ == "__main__":
+    main()
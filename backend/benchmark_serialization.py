@@ -0,0 +1,127 @@
+"""
+Benchmark da serialização das listagens: ORM + Pydantic x tuplas + fast_json
+
+Compara, para páginas de /api/errors, o caminho antigo (objetos ORM validados
+com from_attributes, jsonable_encoder e json.dumps) com o caminho rápido
+(tuplas de colunas, dicts e fast_json.dumps). Reporta linhas/s.
+
+Por padrão usa um SQLite em memória com dados sintéticos; com --database-url
+lê as linhas mais recentes de um banco existente (somente leitura).
+
+Uso:
+    python benchmark_serialization.py --rows 20000 --page-size 1000
+    python benchmark_serialization.py --database-url postgresql://... --page-size 1000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import fast_json
+import models
+import schemas
+
+
+def _seed(session, rows: int):
+    """Insere erros sintéticos com payload realista (stack trace, metadata)"""
+    now = datetime.utcnow()
+    session.execute(models.ErrorLog.__table__.insert(), [
+        {
+            "message": f"Connection timeout to service {i % 50} after {random.randint(1, 30)}s",
+            "error_type": random.choice(list(models.ErrorType)),
+            "severity": random.choice(list(models.Severity)),
+            "source": random.choice(["backend", "frontend", "database"]),
+            "stack_trace": "Traceback (most recent call last):\n" + "  File 'app.py', line 42, in handler\n" * 15,
+            "endpoint": f"/api/orders/{i}",
+            "method": "POST",
+            "status_code": 500,
+            "user_id": f"user_{i % 997}",
+            "session_id": f"session_{i}",
+            "ip_address": "10.0.0.1",
+            "user_agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0",
+            "error_metadata": {"request_id": f"req_{i}", "environment": "production", "version": "2.0.0"},
+            "status": models.ErrorStatus.OPEN,
+            "timestamp": now - timedelta(seconds=i),
+            "occurrences": 1,
+        }
+        for i in range(rows)
+    ])
+    session.commit()
+
+
+def _orm_path(session, page_size: int) -> bytes:
+    """Caminho original: objetos ORM -> Pydantic (from_attributes) -> jsonable_encoder -> json"""
+    errors = session.query(models.ErrorLog).order_by(
+        models.ErrorLog.timestamp.desc(), models.ErrorLog.id.desc()
+    ).limit(page_size).all()
+    payload = {
+        "total": len(errors), "skip": 0, "limit": page_size,
+        "errors": [schemas.ErrorLogResponse.model_validate(error) for error in errors],
+    }
+    body = json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    session.expunge_all()
+    return body
+
+
+def _fast_path(session, page_size: int, names) -> bytes:
+    """Caminho rápido: tuplas de colunas -> dicts -> fast_json"""
+    rows = session.query(models.ErrorLog).order_by(
+        models.ErrorLog.timestamp.desc(), models.ErrorLog.id.desc()
+    ).with_entities(*(getattr(models.ErrorLog, name) for name in names)).limit(page_size).all()
+    payload = {
+        "total": len(rows), "skip": 0, "limit": page_size,
+        "errors": [dict(zip(names, row)) for row in rows],
+    }
+    return fast_json.dumps(payload)
+
+
+def _measure(label: str, fn, repeat: int, page_size: int):
+    fn()  # aquecimento
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = fn()
+    elapsed = time.perf_counter() - started
+    rate = page_size * repeat / elapsed
+    print(f"{label:<40}{rate:>14,.0f}{elapsed / repeat * 1000:>12.1f}{len(body) / 1024:>12.0f}")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="banco existente (padrão: SQLite em memória)")
+    parser.add_argument("--rows", type=int, default=20000, help="linhas sintéticas no SQLite em memória")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    if not args.database_url:
+        random.seed(42)
+        _seed(session, args.rows)
+
+    all_fields = [name for name in schemas.ErrorLogListItem.model_fields if name != "search_highlight"]
+    compact = list(schemas.ERROR_LOG_LIST_DEFAULT_FIELDS)
+    encoder = "orjson" if fast_json.orjson is not None else "json (stdlib)"
+
+    print(f"página de {args.page_size} linhas, {args.repeat} repetições, encoder rápido: {encoder}\n")
+    print(f"{'caminho':<40}{'linhas/s':>14}{'ms/página':>12}{'KiB':>12}")
+    baseline = _measure("ORM + Pydantic (todos os campos)", lambda: _orm_path(session, args.page_size), args.repeat, args.page_size)
+    fast = _measure("tuplas + fast_json (todos os campos)", lambda: _fast_path(session, args.page_size, all_fields), args.repeat, args.page_size)
+    compact_rate = _measure("tuplas + fast_json (campos padrão)", lambda: _fast_path(session, args.page_size, compact), args.repeat, args.page_size)
+    print(f"\nganho: {fast / baseline:.1f}x (todos os campos), {compact_rate / baseline:.1f}x (campos padrão)")
+    session.close()
+
+
+if __name__ == "__main__":
+    main()
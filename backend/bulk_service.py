@@ -0,0 +1,177 @@
+"""
+Triagem em massa: atualização de vários grupos ou erros de uma vez
+
+A seleção (lista de ids e/ou filtro) é contada com limite. Até
+BULK_INLINE_MAX_ROWS linhas, a atualização é um único UPDATE set-based na
+transação da requisição; acima disso vira um job em lotes (job_service),
+retornado na resposta. Mudar o status de grupos propaga o status aos erros
+desses grupos pela mesma regra.
+
+Configuração:
+- BULK_INLINE_MAX_ROWS: maior seleção aplicada na própria requisição (padrão 5000)
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Query, Session
+from counting import count_total
+from job_service import JobService
+from metadata_service import MetadataService, META_PARAM_PREFIX
+import models
+import schemas
+
+BULK_INLINE_MAX_ROWS = int(os.getenv("BULK_INLINE_MAX_ROWS", "5000"))
+
+_COMMON_FILTERS = ("error_type", "severity", "source", "status")
+
+
+def _parse_datetime(value: Any) -> datetime:
+    # Filtros guardados nos parâmetros do job vêm como texto ISO
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def filter_groups(query: Query, ids: Optional[List[int]], filters: Optional[Dict[str, Any]]) -> Query:
+    """Grupos (não excluídos) selecionados por ids e/ou filtro"""
+    query = query.filter(models.ErrorGroup.deleted_at.is_(None))
+    if ids is not None:
+        query = query.filter(models.ErrorGroup.id.in_(ids))
+    for name in _COMMON_FILTERS:
+        value = (filters or {}).get(name)
+        if value is not None:
+            query = query.filter(getattr(models.ErrorGroup, name) == value)
+    return query
+
+
+def filter_errors(query: Query, ids: Optional[List[int]], filters: Optional[Dict[str, Any]]) -> Query:
+    """Erros selecionados por ids e/ou filtro"""
+    filters = filters or {}
+    if ids is not None:
+        query = query.filter(models.ErrorLog.id.in_(ids))
+    for name in _COMMON_FILTERS + ("group_id",):
+        value = filters.get(name)
+        if value is not None:
+            query = query.filter(getattr(models.ErrorLog, name) == value)
+    if filters.get("start_date") is not None:
+        query = query.filter(models.ErrorLog.timestamp >= _parse_datetime(filters["start_date"]))
+    if filters.get("end_date") is not None:
+        query = query.filter(models.ErrorLog.timestamp <= _parse_datetime(filters["end_date"]))
+    return MetadataService.apply(query, filters.get("metadata") or {})
+
+
+def error_update_values(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Valores do UPDATE de erros; status RESOLVED também grava resolved_at"""
+    values = dict(data)
+    if values.get("status") is not None:
+        values["status"] = models.ErrorStatus(values["status"])
+        if values["status"] == models.ErrorStatus.RESOLVED:
+            values["resolved_at"] = datetime.utcnow()
+    return values
+
+
+class BulkService:
+    """Atualizações em massa de grupos e erros"""
+
+    @staticmethod
+    def selection(ids: Optional[List[int]], filters: Optional[Any]) -> Tuple[Optional[List[int]], Dict[str, Any]]:
+        """
+        Valida e normaliza a seleção (ids, filtro em JSON)
+
+        Raises:
+            ValueError: Seleção vazia ou chave de metadata inválida
+        """
+        filter_data = filters.model_dump(mode="json", exclude_none=True) if filters is not None else {}
+        if ids is None and not filter_data:
+            raise ValueError("Informe ids ou um filtro não vazio")
+        if filter_data.get("metadata"):
+            # Mesma validação de chave dos filtros meta.<chave> da listagem
+            MetadataService.parse_filters(
+                (f"{META_PARAM_PREFIX}{key}", value)
+                for key, values in filter_data["metadata"].items()
+                for value in values
+            )
+        return (sorted(set(ids)) if ids is not None else None), filter_data
+
+    @staticmethod
+    def propagate_group_status(
+        db: Session, group_ids: List[int], status: models.ErrorStatus
+    ) -> Tuple[Optional[int], Optional[models.BackgroundJob]]:
+        """
+        Aplica o status dos grupos aos seus erros (sem commit)
+
+        Returns:
+            tuple: (erros atualizados na transação, None) ou (None, job) se
+            forem mais de BULK_INLINE_MAX_ROWS erros
+        """
+        status = models.ErrorStatus(status)
+        JobService.cancel_group_jobs(db, group_ids)
+        query = db.query(models.ErrorLog).filter(models.ErrorLog.group_id.in_(group_ids))
+        count, exact = count_total(query, "capped", cap=BULK_INLINE_MAX_ROWS)
+        if exact:
+            if count:
+                query.update({"status": status}, synchronize_session=False)
+            return count, None
+        return None, JobService.create(db, "groups_status", {"group_ids": group_ids, "status": status.value})
+
+    @staticmethod
+    def update_groups(db: Session, request: schemas.ErrorGroupBulkUpdate) -> Dict[str, Any]:
+        """
+        Atualiza os grupos selecionados numa transação
+
+        Raises:
+            ValueError: Seleção inválida, update vazio ou mais de BULK_MAX_IDS grupos
+        """
+        ids, filters = BulkService.selection(request.ids, request.filter)
+        values = request.update.model_dump(exclude_unset=True)
+        if not values:
+            raise ValueError("update vazio")
+
+        group_ids = [row.id for row in filter_groups(db.query(models.ErrorGroup.id), ids, filters)
+                     .order_by(models.ErrorGroup.id).limit(schemas.BULK_MAX_IDS + 1)]
+        if len(group_ids) > schemas.BULK_MAX_IDS:
+            raise ValueError(f"Seleção com mais de {schemas.BULK_MAX_IDS} grupos; refine o filtro")
+
+        result = {"matched": len(group_ids), "updated": len(group_ids), "errors_updated": None, "job": None}
+        if not group_ids:
+            return result
+        db.query(models.ErrorGroup).filter(models.ErrorGroup.id.in_(group_ids)).update(
+            values, synchronize_session=False
+        )
+        if values.get("status") is not None:
+            result["errors_updated"], result["job"] = BulkService.propagate_group_status(
+                db, group_ids, values["status"]
+            )
+        db.commit()
+        if result["job"]:
+            JobService.submit(result["job"].id)
+            db.refresh(result["job"])
+        return result
+
+    @staticmethod
+    def update_errors(db: Session, request: schemas.ErrorLogBulkUpdate) -> Dict[str, Any]:
+        """
+        Atualiza os erros selecionados numa transação ou, se forem mais de
+        BULK_INLINE_MAX_ROWS, por um job em lotes
+
+        Raises:
+            ValueError: Seleção inválida ou update vazio
+        """
+        ids, filters = BulkService.selection(request.ids, request.filter)
+        data = request.update.model_dump(mode="json", exclude_unset=True)
+        if not data:
+            raise ValueError("update vazio")
+
+        query = filter_errors(db.query(models.ErrorLog), ids, filters)
+        matched, exact = count_total(query, "capped", cap=BULK_INLINE_MAX_ROWS)
+        if not exact:
+            job = JobService.create(db, "errors_update", {"ids": ids, "filter": filters, "values": data})
+            db.commit()
+            JobService.submit(job.id)
+            db.refresh(job)
+            return {"matched": matched, "matched_is_exact": False, "updated": 0, "job": job}
+
+        if matched:
+            query.update(error_update_values(data), synchronize_session=False)
+            db.commit()
+        return {"matched": matched, "updated": matched, "job": None}
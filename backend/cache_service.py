@@ -0,0 +1,214 @@
+"""
+Cache de respostas em memória para endpoints de leitura (estatísticas e grupos)
+
+- TTL curto configurável (CACHE_TTL_SECONDS)
+- Chave baseada nos parâmetros normalizados da consulta
+- ETag forte (SHA-256 do corpo) com suporte a If-None-Match / 304
+- Single-flight: requisições concorrentes para a mesma chave executam uma única consulta
+- Invalidação por namespace quando há escritas relevantes
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from sqlalchemy.exc import MissingGreenlet
+from sqlalchemy.util import await_only
+import fast_json
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "10"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+# Ingestão contínua invalidaria o cache a cada erro recebido; por padrão o TTL
+# limita a defasagem e apenas escritas de triagem (PATCH/DELETE) invalidam.
+CACHE_INVALIDATE_ON_INGEST = os.getenv("CACHE_INVALIDATE_ON_INGEST", "false").lower() == "true"
+
+
+@contextmanager
+def _holding(lock: threading.Lock):
+    """
+    Segura o lock do single-flight
+
+    No modo DB_ASYNC o cálculo roda em AsyncSession.run_sync, no event loop: a
+    espera cede o loop (quem segura o lock pode ser outra requisição do mesmo
+    loop) em vez de bloqueá-lo.
+    """
+    while not lock.acquire(blocking=False):
+        try:
+            await_only(asyncio.sleep(0.005))
+        except MissingGreenlet:
+            # Fora do event loop (threadpool): espera bloqueante comum
+            lock.acquire()
+            break
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+class CacheEntry:
+    """Resposta serializada armazenada no cache"""
+
+    __slots__ = ("body", "etag", "expires_at")
+
+    def __init__(self, body: bytes, etag: str, expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """Cache LRU com TTL, ETag forte e single-flight"""
+
+    def __init__(self, ttl_seconds: float = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, threading.Lock] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._collapsed = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def make_key(namespace: str, path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Gera a chave a partir do namespace, do path e dos parâmetros normalizados (ordenados, sem None)"""
+        normalized = sorted(
+            (name, str(value.value if hasattr(value, "value") else value))
+            for name, value in (params or {}).items()
+            if value is not None
+        )
+        return f"{namespace}|{path}?" + "&".join(f"{name}={value}" for name, value in normalized)
+
+    def _lookup(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> tuple[CacheEntry, bool]:
+        """
+        Retorna a entrada do cache, calculando-a se necessário
+
+        Returns:
+            tuple: (entrada, hit: bool)
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self._hits += 1
+                return entry, True
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = self._inflight[key] = threading.Lock()
+
+        # Apenas uma requisição por chave executa a consulta; as demais aguardam o resultado
+        with _holding(flight):
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    self._hits += 1
+                    self._collapsed += 1
+                    return entry, True
+                self._misses += 1
+                generation = self._generation
+
+            try:
+                body = fast_json.dumps(compute())
+                entry = CacheEntry(
+                    body=body,
+                    etag='"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+                    expires_at=time.monotonic() + self.ttl_seconds,
+                )
+                with self._lock:
+                    # Não armazenar resultados calculados antes de uma invalidação
+                    if generation == self._generation and self.ttl_seconds > 0:
+                        self._entries[key] = entry
+                        self._entries.move_to_end(key)
+                        while len(self._entries) > self.max_entries:
+                            self._entries.popitem(last=False)
+                            self._evictions += 1
+                return entry, False
+            finally:
+                with self._lock:
+                    if self._inflight.get(key) is flight:
+                        del self._inflight[key]
+
+    def invalidate(self, *namespaces: str):
+        """Remove entradas dos namespaces informados (ou todas, se nenhum for informado)"""
+        with self._lock:
+            self._generation += 1
+            self._invalidations += 1
+            if not namespaces:
+                self._entries.clear()
+                return
+            prefixes = tuple(f"{namespace}|" for namespace in namespaces)
+            for key in [key for key in self._entries if key.startswith(prefixes)]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas de uso do cache (taxa de acerto e memória)"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "collapsed_misses": self._collapsed,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "memory_bytes": sum(len(entry.body) + len(key) for key, entry in self._entries.items()),
+            }
+
+
+response_cache = ResponseCache()
+
+
+def cached_json_response(
+    request: Request,
+    namespace: str,
+    params: Dict[str, Any],
+    compute: Callable[[], Any],
+) -> Response:
+    """
+    Responde a partir do cache, respeitando If-None-Match
+
+    Args:
+        request: Requisição atual (para ler If-None-Match)
+        namespace: Namespace usado na invalidação (ex: "stats", "groups")
+        params: Parâmetros já validados do endpoint (formam a chave)
+        compute: Função que calcula o conteúdo serializável da resposta
+    """
+    key = ResponseCache.make_key(namespace, request.url.path, params)
+    entry, hit = response_cache.get_or_compute(key, compute)
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": f"private, max-age={int(response_cache.ttl_seconds)}",
+        "X-Cache": "HIT" if hit else "MISS",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        if entry.etag in candidates or "*" in candidates:
+            return Response(status_code=304, headers=headers)
+
+    return Response(content=entry.body, media_type="application/json", headers=headers)
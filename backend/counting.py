@@ -0,0 +1,96 @@
+"""
+Totais das listagens: exatos, estimados ou limitados
+
+- exact: COUNT(*) completo (comportamento original)
+- estimate: estimativa do planner do Postgres (EXPLAIN); pequenas estimativas são contadas
+- capped: conta no máximo TOTAL_COUNT_CAP + 1 linhas e reporta "10000+"
+"""
+
+import json
+import os
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOTAL_MODES = ("exact", "estimate", "capped")
+DEFAULT_TOTAL_MODE = os.getenv("LIST_TOTAL_MODE", "exact")
+TOTAL_COUNT_CAP = int(os.getenv("LIST_TOTAL_COUNT_CAP", "10000"))
+
+# Abaixo deste valor estimado, um COUNT exato é barato e mais útil
+ESTIMATE_EXACT_THRESHOLD = int(os.getenv("LIST_ESTIMATE_EXACT_THRESHOLD", "1000"))
+
+if DEFAULT_TOTAL_MODE not in TOTAL_MODES:
+    raise ValueError(f"LIST_TOTAL_MODE inválido: {DEFAULT_TOTAL_MODE}")
+
+
+def _planner_estimate(query: Query) -> Optional[int]:
+    """Linhas estimadas pelo planner do Postgres para a consulta (None em outros bancos)"""
+    session = query.session
+    dialect = session.bind.dialect
+    if dialect.name != "postgresql":
+        return None
+
+    # IN (...) expandido na compilação; parâmetros no paramstyle do driver
+    # (pyformat no psycopg2, posicional $n no asyncpg)
+    compiled = query.statement.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    expanded = compiled.construct_expanded_state()
+    params = {}
+    for key, value in expanded.parameters.items():
+        processor = expanded.processors.get(key)
+        params[key] = processor(value) if processor else value
+    if compiled.positional:
+        params = tuple(params[key] for key in expanded.positiontup)
+
+    try:
+        # Savepoint: um EXPLAIN que falha não deixa a transação do request abortada
+        with session.begin_nested():
+            result = session.connection().exec_driver_sql(
+                "EXPLAIN (FORMAT JSON) " + expanded.statement, params
+            ).scalar()
+    except Exception as e:
+        logger.warning(f"Falha ao estimar total via EXPLAIN: {str(e)}")
+        return None
+
+    plan = json.loads(result) if isinstance(result, str) else result
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _count(query: Query, limit: Optional[int] = None) -> int:
+    """COUNT sobre a consulta selecionando só a chave primária (sem colunas pesadas)"""
+    entity = query.column_descriptions[0]["entity"]
+    inner = query.order_by(None).with_entities(*entity.__table__.primary_key.columns)
+    if limit is not None:
+        inner = inner.limit(limit)
+    return query.session.query(func.count()).select_from(inner.subquery()).scalar()
+
+
+def count_total(query: Query, mode: Optional[str] = None, cap: int = TOTAL_COUNT_CAP) -> tuple[int, bool]:
+    """
+    Calcula o total de uma listagem conforme o modo
+
+    Returns:
+        tuple: (total, exato: bool). No modo capped, (cap, False) significa "cap+".
+    """
+    mode = mode or DEFAULT_TOTAL_MODE
+
+    if mode == "estimate":
+        estimate = _planner_estimate(query)
+        if estimate is not None and estimate > ESTIMATE_EXACT_THRESHOLD:
+            return estimate, False
+        if estimate is None:
+            # Sem estatísticas do planner: contar de forma limitada
+            mode = "capped"
+        else:
+            return _count(query), True
+
+    if mode == "capped":
+        counted = _count(query, cap + 1)
+        if counted > cap:
+            return cap, False
+        return counted, True
+
+    return _count(query), True
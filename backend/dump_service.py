@@ -0,0 +1,546 @@
+"""
+Exportação e importação de dumps de error_logs entre ambientes
+
+Um dump é um diretório com `manifest.json` e os dados em um único arquivo:
+
+- `error_logs.bin`: COPY binário do Postgres. É o formato mais rápido, mas só
+  lê e grava entre bancos Postgres;
+- `error_logs.csv`: CSV com cabeçalho. É portável: no Postgres usa COPY
+  (FORMAT csv), nos outros bancos é lido e gravado em lotes com executemany.
+
+Cada linha leva o fingerprint do seu grupo, não o group_id. Os ids são
+atribuídos de novo no destino. A importação carrega as linhas numa tabela
+temporária e depois faz um único passe set-based:
+
+1. calcula o fingerprint das linhas que vieram sem ele (CSV de outra origem),
+   uma vez por combinação distinta de tipo, mensagem, endpoint e stack trace;
+2. cria ou atualiza os grupos com um INSERT ... SELECT ... GROUP BY
+   fingerprint (upsert: ocorrências somadas, first_seen/last_seen e a maior
+   severidade);
+3. insere os erros com o group_id por join no fingerprint;
+4. soma as linhas ao rollup horário (upsert por grupo e hora) e aos sketches
+   de afetados, lendo e regravando só os grupos e buckets tocados.
+
+O rollup existente não é recalculado: contagens sem linhas em error_logs
+(grupos encaminhados pela borda, linhas expurgadas pela retenção ou movidas
+para o arquivo frio) são preservadas. Tudo roda em uma transação: uma falha
+não deixa o dump carregado pela metade.
+
+Uso:
+    python dump_service.py export dump/ --format binary [--start-date 2026-01-01] [--end-date 2026-02-01]
+    python dump_service.py import dump/
+    python dump_service.py import erros.csv          (CSV avulso: colunas pelo cabeçalho)
+"""
+
+import csv
+import enum
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table, Text, and_, case, cast, func, insert, literal, or_, select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from database import engine, disable_statement_timeout
+from ingest_service import SEVERITY_ORDER
+from rollup_service import SECONDS_PER_HOUR, RollupService
+from stats_service import StatsService
+import models
+import logging
+
+logger = logging.getLogger(__name__)
+
+DUMP_VERSION = 1
+DUMP_FORMATS = {"binary": "bin", "csv": "csv"}
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "10000"))
+COPY_BUFFER_SIZE = 1 << 20
+
+# Colunas do dump: as de error_logs (menos id e group_id) e o fingerprint do grupo
+DUMP_COLUMNS = [
+    "message", "error_type", "severity", "source", "stack_trace", "endpoint", "method", "status_code",
+    "user_id", "session_id", "ip_address", "user_agent", "error_metadata", "status", "assigned_to", "notes",
+    "timestamp", "resolved_at", "occurrences", "fingerprint",
+]
+REQUIRED_COLUMNS = {"message", "error_type", "severity", "source"}
+_INTEGER_COLUMNS = {"status_code", "occurrences"}
+_DATETIME_COLUMNS = {"timestamp", "resolved_at"}
+_ENUM_COLUMNS = {"error_type", "severity", "status"}
+
+
+def _staging_type(name: str):
+    """Tipo da coluna no dump e na tabela temporária (o COPY binário exige os mesmos tipos dos dois lados)"""
+    if name in _INTEGER_COLUMNS:
+        return Integer()
+    if name in _DATETIME_COLUMNS:
+        return DateTime(timezone=True)
+    return Text()
+
+
+# Tabela temporária da importação: enums e JSON como texto, convertidos no INSERT final
+_staging = Table(
+    "error_logs_import",
+    MetaData(),
+    *(Column(name, _staging_type(name)) for name in DUMP_COLUMNS),
+    prefixes=["TEMPORARY"],
+)
+
+# Combinações distintas sem fingerprint e o fingerprint calculado em Python
+_fingerprints = Table(
+    "error_fingerprints_import",
+    MetaData(),
+    Column("error_type", Text),
+    Column("message", Text),
+    Column("endpoint", Text),
+    Column("stack_trace", Text),
+    Column("fingerprint", String(64)),
+    prefixes=["TEMPORARY"],
+)
+
+
+def write_manifest(directory: str, dump_format: str, rows: int, **details: Any) -> Dict[str, Any]:
+    """Grava o manifest.json de um dump (também usado pelo gerador sintético)"""
+    manifest = {
+        "version": DUMP_VERSION,
+        "format": dump_format,
+        "columns": DUMP_COLUMNS,
+        "rows": rows,
+        **details,
+        "exported_at": datetime.utcnow().isoformat(),
+    }
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+
+def data_file(directory: str, dump_format: str) -> str:
+    return os.path.join(directory, f"error_logs.{DUMP_FORMATS[dump_format]}")
+
+
+def _csv_value(value: Any) -> Any:
+    """Valor de uma célula CSV no formato que o COPY do Postgres também lê"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _parse_cell(name: str, value: str) -> Any:
+    """Célula CSV para o tipo da tabela temporária (executemany); vazio é NULL"""
+    if value == "":
+        return "" if name in REQUIRED_COLUMNS else None
+    if name in _INTEGER_COLUMNS:
+        return int(value)
+    if name in _DATETIME_COLUMNS:
+        moment = datetime.fromisoformat(value)
+        return moment.astimezone(timezone.utc).replace(tzinfo=None) if moment.tzinfo else moment
+    return value
+
+
+def _severity_rank(expression):
+    return case(SEVERITY_ORDER, value=expression, else_=0)
+
+
+def _severity_from_rank(expression):
+    return case({rank: name for name, rank in SEVERITY_ORDER.items()}, value=expression)
+
+
+def _as_column_type(expression, column, dialect: str):
+    """Converte o texto da tabela temporária para o tipo da coluna de destino"""
+    if column.name == "error_metadata":
+        # SQLite guarda o JSON como texto; CAST AS JSON lá teria afinidade numérica
+        return cast(expression, JSONB) if dialect == "postgresql" else expression
+    if column.name in _ENUM_COLUMNS:
+        return cast(expression, column.type)
+    return expression
+
+
+class DumpService:
+    """Exportação e importação de dumps de error_logs"""
+
+    # ==================== EXPORTAÇÃO ====================
+
+    @staticmethod
+    def export(
+        directory: str,
+        dump_format: str = "csv",
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """
+        Grava error_logs (com o fingerprint do grupo) em `directory`
+
+        Erros de grupos em exclusão ficam de fora.
+
+        Returns:
+            dict: O manifesto gravado
+        """
+        if dump_format not in DUMP_FORMATS:
+            raise ValueError(f"Formato inválido: {dump_format} (use {', '.join(DUMP_FORMATS)})")
+        if dump_format == "binary" and engine.dialect.name != "postgresql":
+            raise ValueError("O formato binary requer Postgres; use csv")
+        os.makedirs(directory, exist_ok=True)
+        path = data_file(directory, dump_format)
+
+        started = time.monotonic()
+        with engine.begin() as connection:
+            disable_statement_timeout(connection)
+            if engine.dialect.name == "postgresql":
+                connection.exec_driver_sql("SET LOCAL TimeZone = 'UTC'")
+                rows = DumpService._copy_out(connection, path, dump_format, start_date, end_date)
+            else:
+                rows = DumpService._write_csv(connection, path, start_date, end_date)
+
+        manifest = write_manifest(
+            directory,
+            dump_format,
+            rows,
+            source_dialect=engine.dialect.name,
+            start_date=start_date.isoformat() if start_date else None,
+            end_date=end_date.isoformat() if end_date else None,
+        )
+        logger.info(f"Exportados {rows} erros para {path} em {time.monotonic() - started:.1f}s")
+        return manifest
+
+    @staticmethod
+    def _export_query(start_date: Optional[datetime], end_date: Optional[datetime], typed: bool):
+        """SELECT do dump; `typed`: cada coluna convertida para o tipo da tabela temporária"""
+        log = models.ErrorLog
+        group = models.ErrorGroup
+        columns = []
+        for name in DUMP_COLUMNS:
+            source = group.fingerprint if name == "fingerprint" else getattr(log, name)
+            columns.append(cast(source, _staging_type(name)).label(name) if typed else source.label(name))
+        query = select(*columns).select_from(log).outerjoin(group, group.id == log.group_id).where(
+            group.deleted_at.is_(None)
+        )
+        if start_date:
+            query = query.where(log.timestamp >= start_date)
+        if end_date:
+            query = query.where(log.timestamp < end_date)
+        return query
+
+    @staticmethod
+    def _copy_out(connection, path: str, dump_format: str, start_date, end_date) -> int:
+        compiled = DumpService._export_query(start_date, end_date, typed=True).compile(dialect=connection.dialect)
+        options = "FORMAT binary" if dump_format == "binary" else "FORMAT csv, HEADER"
+        cursor = connection.connection.cursor()
+        try:
+            query = cursor.mogrify(str(compiled), compiled.params).decode()
+            with open(path, "wb") as file:
+                cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH ({options})", file, size=COPY_BUFFER_SIZE)
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _write_csv(connection, path: str, start_date, end_date) -> int:
+        rows = 0
+        result = connection.execution_options(stream_results=True, yield_per=IMPORT_BATCH_SIZE).execute(
+            DumpService._export_query(start_date, end_date, typed=False)
+        )
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(DUMP_COLUMNS)
+            for partition in result.partitions():
+                writer.writerows([_csv_value(value) for value in row] for row in partition)
+                rows += len(partition)
+        return rows
+
+    # ==================== IMPORTAÇÃO ====================
+
+    @staticmethod
+    def import_dump(path: str) -> Dict[str, Any]:
+        """
+        Carrega um dump (diretório) ou um CSV avulso e reconstrói os grupos
+
+        Returns:
+            dict: {"rows", "groups_created", "groups_updated", "fingerprints_computed", "seconds"}
+        """
+        data_path, dump_format, columns = DumpService._resolve(path)
+        dialect = engine.dialect.name
+        if dump_format == "binary" and dialect != "postgresql":
+            raise ValueError("Dumps binários só podem ser importados no Postgres")
+
+        started = time.monotonic()
+        with engine.begin() as connection:
+            disable_statement_timeout(connection)
+            if dialect == "postgresql":
+                connection.exec_driver_sql("SET LOCAL TimeZone = 'UTC'")
+            for table in (_staging, _fingerprints):
+                table.drop(connection, checkfirst=True)
+                table.create(connection)
+
+            if dialect == "postgresql":
+                rows = DumpService._copy_in(connection, data_path, dump_format, columns)
+                connection.exec_driver_sql(f"ANALYZE {_staging.name}")
+            else:
+                rows = DumpService._insert_csv(connection, data_path, columns)
+            logger.info(f"{rows} linhas carregadas de {data_path} em {time.monotonic() - started:.1f}s")
+
+            DumpService._check_enums(connection)
+            # Linhas sem timestamp: o mesmo horário no grupo, no erro e no rollup
+            connection.execute(
+                update(_staging).where(_staging.c.timestamp.is_(None)).values(timestamp=func.now())
+            )
+            computed = DumpService._fill_fingerprints(connection)
+            created, updated = DumpService._upsert_groups(connection)
+            DumpService._insert_logs(connection)
+            DumpService._add_to_rollups(connection)
+
+            for table in (_fingerprints, _staging):
+                table.drop(connection)
+
+        result = {
+            "rows": rows,
+            "groups_created": created,
+            "groups_updated": updated,
+            "fingerprints_computed": computed,
+            "seconds": round(time.monotonic() - started, 1),
+        }
+        logger.info(f"Importação concluída: {result}")
+        return result
+
+    @staticmethod
+    def _resolve(path: str) -> Tuple[str, str, List[str]]:
+        """Arquivo de dados, formato e colunas de um dump (manifest.json) ou de um CSV avulso"""
+        if os.path.isdir(path):
+            with open(os.path.join(path, "manifest.json"), encoding="utf-8") as file:
+                manifest = json.load(file)
+            if manifest.get("version") != DUMP_VERSION:
+                raise ValueError(f"Versão de dump não suportada: {manifest.get('version')}")
+            dump_format = manifest["format"]
+            data_path, columns = data_file(path, dump_format), manifest["columns"]
+        else:
+            dump_format, data_path = "csv", path
+            with open(path, newline="", encoding="utf-8") as file:
+                columns = next(csv.reader(file), [])
+
+        unknown = set(columns) - set(DUMP_COLUMNS)
+        if unknown:
+            raise ValueError(f"Colunas desconhecidas no dump: {', '.join(sorted(unknown))}")
+        missing = REQUIRED_COLUMNS - set(columns)
+        if missing:
+            raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(sorted(missing))}")
+        return data_path, dump_format, columns
+
+    @staticmethod
+    def _copy_in(connection, path: str, dump_format: str, columns: List[str]) -> int:
+        options = "FORMAT binary" if dump_format == "binary" else "FORMAT csv, HEADER"
+        column_list = ", ".join(f'"{name}"' for name in columns)
+        cursor = connection.connection.cursor()
+        try:
+            with open(path, "rb") as file:
+                cursor.copy_expert(
+                    f"COPY {_staging.name} ({column_list}) FROM STDIN WITH ({options})", file, size=COPY_BUFFER_SIZE
+                )
+        finally:
+            cursor.close()
+        return connection.execute(select(func.count()).select_from(_staging)).scalar()
+
+    @staticmethod
+    def _insert_csv(connection, path: str, columns: List[str]) -> int:
+        """Fallback sem COPY: executemany em lotes de IMPORT_BATCH_SIZE"""
+        rows = 0
+        statement = insert(_staging)
+        with open(path, newline="", encoding="utf-8") as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            for batch in _batches(reader, IMPORT_BATCH_SIZE):
+                connection.execute(statement, [
+                    {name: _parse_cell(name, value) for name, value in zip(columns, row)} for row in batch
+                ])
+                rows += len(batch)
+        return rows
+
+    @staticmethod
+    def _check_enums(connection):
+        """Rejeita valores fora dos enums (o SQLite não os valida; no Postgres o CAST falharia no meio)"""
+        for name in _ENUM_COLUMNS:
+            allowed = [item.value for item in models.ErrorLog.__table__.c[name].type.enum_class]
+            invalid = connection.execute(
+                select(_staging.c[name]).where(_staging.c[name].not_in(allowed)).distinct().limit(5)
+            ).scalars().all()
+            if invalid:
+                raise ValueError(f"Valores inválidos em {name}: {', '.join(invalid)}")
+
+    @staticmethod
+    def _fill_fingerprints(connection) -> int:
+        """Calcula o fingerprint das linhas sem ele, uma vez por combinação distinta"""
+        key = [_staging.c.error_type, _staging.c.message, _staging.c.endpoint, _staging.c.stack_trace]
+        distinct = connection.execute(select(*key).where(_staging.c.fingerprint.is_(None)).distinct())
+        computed = 0
+        for batch in _batches(distinct, IMPORT_BATCH_SIZE):
+            connection.execute(insert(_fingerprints), [
+                {
+                    "error_type": error_type,
+                    "message": message,
+                    "endpoint": endpoint,
+                    "stack_trace": stack_trace,
+                    "fingerprint": models.generate_fingerprint(error_type, message, endpoint, stack_trace),
+                }
+                for error_type, message, endpoint, stack_trace in batch
+            ])
+            computed += len(batch)
+        if computed:
+            connection.execute(
+                update(_staging).where(and_(
+                    _staging.c.fingerprint.is_(None),
+                    _staging.c.error_type == _fingerprints.c.error_type,
+                    _staging.c.message == _fingerprints.c.message,
+                    _staging.c.endpoint.is_not_distinct_from(_fingerprints.c.endpoint),
+                    _staging.c.stack_trace.is_not_distinct_from(_fingerprints.c.stack_trace),
+                )).values(fingerprint=_fingerprints.c.fingerprint)
+            )
+        return computed
+
+    @staticmethod
+    def _upsert_groups(connection) -> Tuple[int, int]:
+        """Cria/atualiza um grupo por fingerprint num único INSERT ... SELECT ... GROUP BY"""
+        group = models.ErrorGroup
+        dialect = connection.dialect.name
+        existing = connection.execute(
+            select(func.count()).select_from(group).where(
+                group.fingerprint.in_(select(_staging.c.fingerprint).distinct())
+            )
+        ).scalar()
+
+        source = select(
+            _staging.c.fingerprint,
+            func.min(_staging.c.message),
+            cast(func.min(_staging.c.error_type), group.error_type.type),
+            cast(_severity_from_rank(func.max(_severity_rank(_staging.c.severity))), group.severity.type),
+            func.min(_staging.c.source),
+            func.count(),
+            func.min(_staging.c.timestamp),
+            func.max(_staging.c.timestamp),
+            cast(literal(models.ErrorStatus.OPEN.value), group.status.type),
+            literal(0),
+            literal(0),
+        ).where(_staging.c.fingerprint.isnot(None)).group_by(_staging.c.fingerprint)
+        columns = [
+            "fingerprint", "message_pattern", "error_type", "severity", "source", "total_occurrences",
+            "first_seen", "last_seen", "status", "affected_users", "affected_sessions",
+        ]
+
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(group).from_select(columns, source)
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=[group.fingerprint],
+            set_={
+                "total_occurrences": group.total_occurrences + excluded.total_occurrences,
+                "first_seen": case((excluded.first_seen < group.first_seen, excluded.first_seen), else_=group.first_seen),
+                "last_seen": case((excluded.last_seen > group.last_seen, excluded.last_seen), else_=group.last_seen),
+                "severity": case(
+                    (_severity_rank(excluded.severity) > _severity_rank(group.severity), excluded.severity),
+                    else_=group.severity,
+                ),
+            },
+        )
+        total = connection.execute(
+            select(func.count(func.distinct(_staging.c.fingerprint)))
+        ).scalar()
+        connection.execute(statement)
+        return total - existing, existing
+
+    @staticmethod
+    def _add_to_rollups(connection):
+        """Soma as linhas carregadas ao rollup horário e aos sketches dos grupos tocados"""
+        rollup = models.ErrorGroupRollup
+        group = models.ErrorGroup
+        dialect = connection.dialect.name
+        bucket = StatsService.epoch_bucket_of(dialect, _staging.c.timestamp, SECONDS_PER_HOUR)
+        source = select(group.id, bucket, func.count()).select_from(_staging).join(
+            group, group.fingerprint == _staging.c.fingerprint
+        ).group_by(group.id, bucket)
+
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(rollup).from_select(["group_id", "bucket_hour", "count"], source)
+        statement = statement.on_conflict_do_update(
+            index_elements=[rollup.group_id, rollup.bucket_hour],
+            set_={"count": rollup.count + statement.excluded.count},
+        )
+        connection.execute(statement)
+
+        affected = connection.execution_options(stream_results=True, yield_per=IMPORT_BATCH_SIZE).execute(
+            select(group.id, _staging.c.timestamp, _staging.c.user_id, _staging.c.session_id)
+            .select_from(_staging)
+            .join(group, group.fingerprint == _staging.c.fingerprint)
+            .where(or_(_staging.c.user_id.isnot(None), _staging.c.session_id.isnot(None)))
+            .order_by(group.id)
+        )
+        RollupService.add_to_sketches(connection, affected)
+
+    @staticmethod
+    def _insert_logs(connection):
+        """Insere os erros com o group_id por join no fingerprint"""
+        log = models.ErrorLog
+        group = models.ErrorGroup
+        dialect = connection.dialect.name
+        names = [name for name in DUMP_COLUMNS if name != "fingerprint"]
+        values = []
+        for name in names:
+            expression = _as_column_type(_staging.c[name], log.__table__.c[name], dialect)
+            if name == "status":
+                expression = func.coalesce(expression, cast(literal(models.ErrorStatus.OPEN.value), log.status.type))
+            elif name == "occurrences":
+                expression = func.coalesce(expression, 1)
+            elif name == "timestamp":
+                expression = func.coalesce(expression, func.now())
+            values.append(expression)
+        source = select(*values, group.id).select_from(_staging).join(
+            group, group.fingerprint == _staging.c.fingerprint
+        )
+        connection.execute(insert(log).from_select(names + ["group_id"], source))
+
+
+def _batches(rows, size: int) -> Iterator[List[Any]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from database import run_migrations
+
+    parser = argparse.ArgumentParser(description="Exporta e importa dumps de error_logs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="grava error_logs em um diretório de dump")
+    export_parser.add_argument("directory")
+    export_parser.add_argument("--format", choices=list(DUMP_FORMATS), default="csv")
+    export_parser.add_argument("--start-date", type=datetime.fromisoformat, help="inclusive (UTC)")
+    export_parser.add_argument("--end-date", type=datetime.fromisoformat, help="exclusive (UTC)")
+    import_parser = commands.add_parser("import", help="carrega um dump (diretório) ou um CSV")
+    import_parser.add_argument("path")
+    args = parser.parse_args()
+
+    run_migrations()
+    if args.command == "export":
+        manifest = DumpService.export(args.directory, args.format, args.start_date, args.end_date)
+        print(f"✓ {manifest['rows']} erros exportados para {args.directory} ({manifest['format']})")
+    else:
+        result = DumpService.import_dump(args.path)
+        print(
+            f"✓ {result['rows']} erros importados em {result['seconds']}s "
+            f"({result['groups_created']} grupos novos, {result['groups_updated']} atualizados)"
+        )
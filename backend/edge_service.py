@@ -0,0 +1,100 @@
+"""
+Recebimento, no servidor central, dos grupos agregados dos coletores de borda
+
+Cada coletor (modo embarcado, ver embedded_service.py) envia a contagem
+acumulada de cada grupo. O servidor guarda a última contagem recebida por
+(coletor, fingerprint) em edge_group_reports e soma ao grupo só a diferença.
+Assim, reenviar o mesmo lote (falha de rede, reinício do coletor) não duplica
+ocorrências.
+
+As novas ocorrências entram no rollup na hora de `last_seen` do lote. Os erros
+individuais ficam no coletor: no servidor central, a borda aparece nos grupos,
+no top de erros e nas tendências, mas não na listagem de erros.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+from ingest_service import SEVERITY_ORDER
+from rollup_service import RollupService
+import models
+import schemas
+
+
+class EdgeService:
+    """Mescla dos grupos enviados pelos coletores de borda"""
+
+    @staticmethod
+    def merge(db: Session, edge_id: str, items: List[schemas.EdgeGroupItem]) -> Dict[str, int]:
+        """
+        Aplica um lote de grupos de um coletor (sem commit)
+
+        Returns:
+            dict: {"received", "created", "updated"}
+        """
+        # Último item de cada fingerprint (lotes não deveriam repetir, mas o contrato é "acumulado")
+        latest = {item.fingerprint: item for item in items}
+        fingerprints = list(latest)
+        groups = {
+            group.fingerprint: group
+            for group in db.query(models.ErrorGroup).filter(
+                models.ErrorGroup.fingerprint.in_(fingerprints)
+            ).order_by(models.ErrorGroup.id).with_for_update()
+        }
+        reports = {
+            report.fingerprint: report
+            for report in db.query(models.EdgeGroupReport).filter(
+                models.EdgeGroupReport.edge_id == edge_id,
+                models.EdgeGroupReport.fingerprint.in_(fingerprints),
+            ).with_for_update()
+        }
+
+        result = {"received": len(items), "created": 0, "updated": 0}
+        now = datetime.utcnow()
+        for fingerprint, item in latest.items():
+            report = reports.get(fingerprint)
+            delta = item.total_occurrences - (report.reported_occurrences if report else 0)
+            if delta <= 0:
+                continue
+            last_seen = item.last_seen or now
+
+            group = groups.get(fingerprint)
+            if group is None:
+                group = models.ErrorGroup(
+                    fingerprint=fingerprint,
+                    message_pattern=item.message_pattern,
+                    error_type=item.error_type,
+                    severity=item.severity,
+                    source=item.source,
+                    total_occurrences=delta,
+                    first_seen=_naive(item.first_seen or last_seen),
+                    last_seen=_naive(last_seen),
+                )
+                db.add(group)
+                db.flush()
+                result["created"] += 1
+            else:
+                group.total_occurrences += delta
+                group.last_seen = max(_naive(group.last_seen), _naive(last_seen))
+                if item.first_seen:
+                    group.first_seen = min(_naive(group.first_seen), _naive(item.first_seen))
+                if SEVERITY_ORDER[item.severity.value] > SEVERITY_ORDER[group.severity.value]:
+                    group.severity = item.severity
+                result["updated"] += 1
+
+            RollupService.record(db, group.id, _naive(last_seen), delta=delta)
+            if report is None:
+                db.add(models.EdgeGroupReport(
+                    edge_id=edge_id, fingerprint=fingerprint, reported_occurrences=item.total_occurrences
+                ))
+            else:
+                report.reported_occurrences = item.total_occurrences
+        return result
+
+
+def _naive(moment: datetime) -> datetime:
+    """Datetimes do coletor podem vir com fuso; a API trabalha em UTC naive"""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
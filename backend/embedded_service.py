@@ -0,0 +1,236 @@
+"""
+Modo embarcado (EMBEDDED_MODE=true): coletor de borda sobre SQLite local
+
+Pensado para um coletor pequeno ao lado de cada cluster de borda, sem Postgres:
+
+- SQLite em WAL com PRAGMAs ajustados (database.tune_sqlite). As leituras usam
+  as conexões do pool (DB_POOL_SIZE) em paralelo com o escritor.
+- Escritor único: POST /api/errors enfileira o erro e espera o commit. Uma
+  thread grava a fila em lotes (até EMBEDDED_WRITE_BATCH erros por
+  transação, em uma conexão própria com BEGIN IMMEDIATE). Um commit (fsync)
+  atende muitas requisições, e não há disputa pelo lock de escrita do SQLite.
+- Encaminhamento: a cada EMBEDDED_FORWARD_INTERVAL_SECONDS, os grupos
+  alterados são enviados ao servidor central (EMBEDDED_UPSTREAM_URL) em
+  lotes, com a contagem acumulada (POST /api/edge/groups, ver
+  edge_service.py). O reenvio é idempotente, e após um reinício o coletor
+  reenvia todos os grupos uma vez.
+
+Configuração:
+    EMBEDDED_MODE=true
+    EMBEDDED_DB_PATH=data/error_dashboard.db        (quando DATABASE_URL não é definido)
+    EMBEDDED_WRITE_BATCH=500
+    EMBEDDED_WRITE_WAIT_MS=2            (espera por mais erros antes de gravar um lote)
+    EMBEDDED_QUEUE_SIZE=10000           (fila cheia → 503)
+    EMBEDDED_WRITE_TIMEOUT_SECONDS=30
+    EMBEDDED_UPSTREAM_URL=https://errors.central.exemplo.com
+    EMBEDDED_EDGE_ID=<hostname>
+    EMBEDDED_FORWARD_INTERVAL_SECONDS=30
+    EMBEDDED_FORWARD_BATCH=500
+"""
+
+import os
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from sqlalchemy import and_, create_engine, or_
+from sqlalchemy.orm import sessionmaker
+from database import DATABASE_URL, DB_ASYNC, EMBEDDED_MODE, SessionLocal, tune_sqlite
+from ingest_service import IngestService
+import models
+import schemas
+import logging
+
+logger = logging.getLogger(__name__)
+
+EMBEDDED_WRITE_BATCH = int(os.getenv("EMBEDDED_WRITE_BATCH", "500"))
+EMBEDDED_WRITE_WAIT_MS = float(os.getenv("EMBEDDED_WRITE_WAIT_MS", "2"))
+EMBEDDED_QUEUE_SIZE = int(os.getenv("EMBEDDED_QUEUE_SIZE", "10000"))
+EMBEDDED_WRITE_TIMEOUT_SECONDS = float(os.getenv("EMBEDDED_WRITE_TIMEOUT_SECONDS", "30"))
+EMBEDDED_UPSTREAM_URL = os.getenv("EMBEDDED_UPSTREAM_URL", "").rstrip("/")
+EMBEDDED_EDGE_ID = os.getenv("EMBEDDED_EDGE_ID", socket.gethostname())
+EMBEDDED_FORWARD_INTERVAL_SECONDS = float(os.getenv("EMBEDDED_FORWARD_INTERVAL_SECONDS", "30"))
+EMBEDDED_FORWARD_BATCH = int(os.getenv("EMBEDDED_FORWARD_BATCH", "500"))
+
+if EMBEDDED_MODE and DB_ASYNC:
+    # O endpoint espera o commit do escritor: bloquearia o event loop
+    raise RuntimeError("EMBEDDED_MODE não é compatível com DB_ASYNC")
+
+_queue: "queue.Queue[Tuple[schemas.ErrorLogCreate, Future]]" = queue.Queue(maxsize=EMBEDDED_QUEUE_SIZE)
+_writer_lock = threading.Lock()
+_writer: Optional[threading.Thread] = None
+_WriterSession = None
+
+# Início da última passada completa do encaminhamento (None: reenviar tudo)
+_forward_watermark: Optional[datetime] = None
+
+
+class QueueFullError(Exception):
+    """Fila do escritor cheia: o coletor não está dando conta da ingestão"""
+
+
+class EmbeddedService:
+    """Escritor em lotes e encaminhamento de grupos do modo embarcado"""
+
+    @staticmethod
+    def enabled() -> bool:
+        return EMBEDDED_MODE
+
+    # ==================== ESCRITOR ====================
+
+    @staticmethod
+    def submit(error: schemas.ErrorLogCreate) -> models.ErrorLog:
+        """
+        Enfileira o erro e espera o commit do lote que o contém
+
+        Raises:
+            QueueFullError: Fila cheia (backpressure)
+            TimeoutError: Sem commit em EMBEDDED_WRITE_TIMEOUT_SECONDS
+        """
+        EmbeddedService._ensure_writer()
+        future: Future = Future()
+        try:
+            _queue.put_nowait((error, future))
+        except queue.Full:
+            raise QueueFullError(f"Fila de ingestão cheia ({EMBEDDED_QUEUE_SIZE})")
+        return future.result(timeout=EMBEDDED_WRITE_TIMEOUT_SECONDS)
+
+    @staticmethod
+    def _ensure_writer():
+        global _writer, _WriterSession
+        if _writer is not None:
+            return
+        with _writer_lock:
+            if _writer is not None:
+                return
+            # Conexão exclusiva do escritor; expire_on_commit=False: os erros gravados
+            # voltam à requisição já carregados
+            writer_engine = create_engine(DATABASE_URL, pool_size=1, max_overflow=0)
+            tune_sqlite(writer_engine, immediate=True)
+            _WriterSession = sessionmaker(bind=writer_engine, autoflush=False, expire_on_commit=False)
+            _writer = threading.Thread(target=EmbeddedService._write_loop, name="embedded-writer", daemon=True)
+            _writer.start()
+
+    @staticmethod
+    def _write_loop():
+        linger = EMBEDDED_WRITE_WAIT_MS / 1000
+        while True:
+            batch = [_queue.get()]
+            deadline = time.monotonic() + linger
+            while len(batch) < EMBEDDED_WRITE_BATCH:
+                try:
+                    batch.append(_queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            EmbeddedService._write(batch)
+
+    @staticmethod
+    def _write(batch: List[Tuple[schemas.ErrorLogCreate, Future]]):
+        """Grava o lote numa transação; se falhar, grava um a um para isolar o erro"""
+        db = _WriterSession()
+        try:
+            logs = IngestService.record(db, [error for error, _ in batch])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if len(batch) == 1:
+                logger.error(f"Falha ao gravar erro no modo embarcado: {str(e)}")
+                batch[0][1].set_exception(e)
+                return
+            for item in batch:
+                EmbeddedService._write([item])
+            return
+        finally:
+            db.close()
+        for (_, future), log in zip(batch, logs):
+            future.set_result(log)
+
+    # ==================== ENCAMINHAMENTO ====================
+
+    @staticmethod
+    def forward_once() -> int:
+        """
+        Envia ao servidor central os grupos alterados desde a última passada
+
+        Returns:
+            int: Grupos enviados
+        """
+        global _forward_watermark
+        started = datetime.utcnow()
+        since = _forward_watermark
+        group = models.ErrorGroup
+        sent = 0
+        cursor: Optional[Tuple[datetime, int]] = None
+        db = SessionLocal()
+        try:
+            while True:
+                query = db.query(group).filter(group.deleted_at.is_(None))
+                if since is not None:
+                    # Margem: commits do escritor com last_seen pouco antes do início da passada anterior
+                    query = query.filter(group.last_seen >= since - timedelta(seconds=5))
+                if cursor is not None:
+                    query = query.filter(or_(
+                        group.last_seen > cursor[0], and_(group.last_seen == cursor[0], group.id > cursor[1])
+                    ))
+                groups = query.order_by(group.last_seen, group.id).limit(EMBEDDED_FORWARD_BATCH).all()
+                if not groups:
+                    break
+                EmbeddedService._post_groups(groups)
+                sent += len(groups)
+                cursor = (groups[-1].last_seen, groups[-1].id)
+                if len(groups) < EMBEDDED_FORWARD_BATCH:
+                    break
+        finally:
+            db.close()
+        _forward_watermark = started
+        return sent
+
+    @staticmethod
+    def _post_groups(groups: List[models.ErrorGroup]):
+        payload: Dict[str, Any] = {
+            "edge_id": EMBEDDED_EDGE_ID,
+            "groups": [
+                {
+                    "fingerprint": item.fingerprint,
+                    "message_pattern": item.message_pattern,
+                    "error_type": item.error_type.value,
+                    "severity": item.severity.value,
+                    "source": item.source,
+                    "total_occurrences": item.total_occurrences,
+                    "first_seen": item.first_seen.isoformat() if item.first_seen else None,
+                    "last_seen": item.last_seen.isoformat() if item.last_seen else None,
+                }
+                for item in groups
+            ],
+        }
+        response = requests.post(f"{EMBEDDED_UPSTREAM_URL}/api/edge/groups", json=payload, timeout=30)
+        response.raise_for_status()
+
+    @staticmethod
+    def start_forwarding() -> Optional[threading.Thread]:
+        """Encaminha os grupos a cada EMBEDDED_FORWARD_INTERVAL_SECONDS em uma thread daemon"""
+        if not EMBEDDED_MODE or not EMBEDDED_UPSTREAM_URL or EMBEDDED_FORWARD_INTERVAL_SECONDS <= 0:
+            return None
+
+        stop = threading.Event()
+
+        def loop():
+            while True:
+                try:
+                    sent = EmbeddedService.forward_once()
+                    if sent:
+                        logger.info(f"{sent} grupos encaminhados para {EMBEDDED_UPSTREAM_URL}")
+                except Exception as e:
+                    # A marca d'água não avança: a próxima passada reenvia
+                    logger.error(f"Erro ao encaminhar grupos: {str(e)}")
+                if stop.wait(EMBEDDED_FORWARD_INTERVAL_SECONDS):
+                    return
+
+        thread = threading.Thread(target=loop, name="embedded-forward", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,167 @@
+"""
+Exportação em streaming dos logs de erro (NDJSON, CSV e Parquet)
+
+As linhas são lidas com cursor do lado do servidor (yield_per / stream_results)
+e escritas lote a lote na resposta, então a memória usada não depende do
+tamanho da exportação. Parquet é gravado em row groups, um por lote, e só
+está disponível com pyarrow instalado.
+"""
+
+import csv
+import enum
+import io
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List
+
+from sqlalchemy import DateTime, Integer
+from sqlalchemy.orm import Query, Session
+from database import read_session, disable_statement_timeout
+import fast_json
+import models
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - dependência opcional
+    pyarrow = None
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def _flat_value(value: Any) -> Any:
+    """Valor escalar para CSV/Parquet (enums como texto, JSON serializado)"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class _ChunkSink(io.RawIOBase):
+    """Destino de escrita que acumula os bytes até serem drenados para a resposta"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ExportService:
+    """Gera o corpo da exportação em blocos"""
+
+    @staticmethod
+    def parquet_available() -> bool:
+        return pyarrow is not None
+
+    @staticmethod
+    def stream(
+        build_query: Callable[[Session], Query],
+        fields: List[str],
+        export_format: str,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> Iterator[bytes]:
+        """
+        Executa a consulta em uma sessão de leitura própria e produz o arquivo em blocos
+
+        Args:
+            build_query: Monta a consulta (apenas as colunas de `fields`) na sessão recebida
+            fields: Nomes das colunas, na ordem da consulta
+            export_format: ndjson, csv ou parquet
+            batch_size: Linhas por lote lido do cursor (e por row group no Parquet)
+        """
+        writers = {
+            "ndjson": ExportService._ndjson,
+            "csv": ExportService._csv,
+            "parquet": ExportService._parquet,
+        }
+        session = read_session()
+        try:
+            # Exportações longas não devem cair no statement_timeout das consultas da API
+            disable_statement_timeout(session.connection())
+            statement = build_query(session).statement.execution_options(yield_per=batch_size)
+            result = session.execute(statement)
+            yield from writers[export_format](result.partitions(), fields)
+        finally:
+            session.close()
+
+    @staticmethod
+    def _ndjson(batches, fields: List[str]) -> Iterator[bytes]:
+        for rows in batches:
+            yield b"".join(fast_json.dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+
+    @staticmethod
+    def _csv(batches, fields: List[str]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for rows in batches:
+            for row in rows:
+                writer.writerow([
+                    value.isoformat() if isinstance(value, datetime) else _flat_value(value)
+                    for value in row
+                ])
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    def arrow_schema(fields: List[str]):
+        """Schema Arrow das colunas de error_logs em `fields` (enums e JSON como texto)"""
+        arrow_fields = []
+        for name in fields:
+            column_type = models.ErrorLog.__table__.c[name].type
+            if isinstance(column_type, Integer):
+                arrow_type = pyarrow.int64()
+            elif isinstance(column_type, DateTime):
+                arrow_type = pyarrow.timestamp("us", tz="UTC")
+            else:
+                arrow_type = pyarrow.string()
+            arrow_fields.append(pyarrow.field(name, arrow_type))
+        return pyarrow.schema(arrow_fields)
+
+    @staticmethod
+    def arrow_table(rows, fields: List[str], schema):
+        """Lote de linhas (tuplas na ordem de `fields`) como tabela Arrow"""
+        columns: Dict[str, list] = {name: [] for name in fields}
+        for row in rows:
+            for name, value in zip(fields, row):
+                columns[name].append(_flat_value(value))
+        return pyarrow.Table.from_pydict(columns, schema=schema)
+
+    @staticmethod
+    def _parquet(batches, fields: List[str]) -> Iterator[bytes]:
+        schema = ExportService.arrow_schema(fields)
+        sink = _ChunkSink()
+        writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd")
+        try:
+            for rows in batches:
+                writer.write_table(ExportService.arrow_table(rows, fields, schema))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
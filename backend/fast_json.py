@@ -0,0 +1,65 @@
+"""
+Serialização JSON rápida para as listagens
+
+As listagens selecionam tuplas de colunas (sem objetos ORM), montam dicts e
+codificam direto em bytes, sem validar cada item com Pydantic. Os schemas
+continuam declarados como response_model para documentar o OpenAPI.
+
+Usa orjson quando instalado; sem ele, cai para o json da biblioteca padrão
+com o mesmo formato de saída.
+"""
+
+import enum
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+
+def _isoformat(value):
+    """ISO 8601 no mesmo formato do Pydantic (UTC como "Z")"""
+    if isinstance(value, datetime) and value.utcoffset() == timedelta(0):
+        return value.replace(tzinfo=None).isoformat() + "Z"
+    return value.isoformat()
+
+
+def _default(value: Any):
+    """Tipos que o encoder não conhece nativamente"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date, time)):
+        return _isoformat(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    raise TypeError(f"Tipo não serializável em JSON: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Codifica o conteúdo em JSON compacto (UTF-8)"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que usa `dumps` (orjson quando disponível)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
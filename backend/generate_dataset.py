@@ -0,0 +1,288 @@
+"""
+Gerador de dados sintéticos em escala para benchmarks
+
+Grava um dump CSV no formato do dump_service.py, que é carregado com COPY. Os
+grupos, contadores, rollups e sketches de afetados saem da própria importação,
+derivados das linhas. O gerador pode produzir dezenas de milhões de linhas
+com memória constante, gravando uma coluna por vez em lotes de
+`--batch-size`.
+
+Forma do tráfego:
+
+- popularidade dos grupos em Zipf (`--zipf`): poucos grupos concentram a
+  maioria das ocorrências, com uma cauda longa de grupos raros;
+- ciclo diurno (pico à tarde, UTC) e semanal (fim de semana mais calmo);
+- incidentes (`--incidents`): picos curtos de um grupo da cauda, que somam
+  `--incident-share` das linhas (alimentam tendências e alertas de pico);
+- cardinalidades configuráveis de usuários (também em Zipf), sessões,
+  endpoints, servidores e releases. As chaves de metadata são as indexadas
+  (environment, server, release).
+
+Cada grupo tem um fingerprint estável. As partes variáveis das mensagens e
+dos endpoints são numéricas, e a normalização do fingerprint as remove.
+
+Uso:
+    python generate_dataset.py /dumps/synthetic --rows 10000000 --groups 20000 --load
+    python generate_dataset.py /dumps/synthetic --rows 1000000 && python dump_service.py import /dumps/synthetic
+"""
+import argparse
+import csv
+import itertools
+import os
+import random
+import string
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import models
+from dump_service import DUMP_COLUMNS, data_file, write_manifest
+
+ENVIRONMENTS = (("production", 80), ("staging", 15), ("development", 5))
+ROW_STATUSES = (("OPEN", 70), ("IN_PROGRESS", 5), ("RESOLVED", 20), ("IGNORED", 5))
+SEVERITIES = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X)",
+    "python-requests/2.31.0",
+)
+RESOURCES = (
+    "users", "orders", "products", "payments", "invoices", "carts", "sessions", "reports", "search", "auth",
+    "shipments", "reviews", "coupons", "notifications", "settings",
+)
+# Peso de cada hora do dia (UTC): madrugada baixa, pico à tarde
+DIURNAL = (3, 2, 2, 2, 2, 3, 4, 6, 8, 9, 10, 10, 10, 11, 12, 12, 11, 10, 9, 8, 7, 6, 5, 4)
+WEEKEND_FACTOR = 0.6
+
+# (tipo, source, mensagem, status HTTP, pesos de severidade LOW..CRITICAL, stack trace?)
+# {n} é a parte variável; {token} distingue os grupos (só letras: não é normalizado)
+TEMPLATES = (
+    ("HTTP", "backend", "500 Internal Server Error in {token} handler after {n} ms", 500, (0, 1, 3, 4), True),
+    ("HTTP", "backend", "404 Not Found - {token} resource {n}", 404, (6, 3, 1, 0), False),
+    ("HTTP", "api", "502 Bad Gateway from {token} upstream (attempt {n})", 502, (0, 2, 5, 2), False),
+    ("DATABASE", "database", "Query on {token} exceeded {n} ms statement timeout", None, (0, 2, 5, 3), True),
+    ("DATABASE", "database", "Duplicate key violation on {token}_unique (id {n})", None, (3, 5, 2, 0), True),
+    ("INTEGRATION", "external_service", "Timeout calling {token} service after {n} ms", None, (0, 3, 5, 2), False),
+    ("AUTH", "backend", "Invalid token for {token} scope (user {n})", 401, (4, 5, 1, 0), False),
+    ("VALIDATION", "backend", "Field {token} failed validation: length {n} exceeds limit", 422, (7, 3, 0, 0), False),
+    ("PERFORMANCE", "backend", "Slow {token} request: {n} ms over threshold", None, (2, 6, 2, 0), False),
+    ("INTEGRATION", "external_service", "{token} webhook rejected payload ({n} bytes)", None, (1, 4, 4, 1), True),
+    ("APPLICATION", "backend", "Unhandled {token}Error while processing job {n}", None, (0, 2, 4, 4), True),
+    ("FRONTEND", "frontend", "TypeError: Cannot read properties of undefined (reading '{token}') at {n}", None,
+     (2, 5, 3, 0), True),
+)
+METHODS = ("GET", "GET", "GET", "POST", "POST", "PUT", "DELETE")
+
+
+def _token(index: int) -> str:
+    """Identificador só com letras (números seriam normalizados pelo fingerprint)"""
+    letters = []
+    index += 26
+    while index:
+        index, remainder = divmod(index, 26)
+        letters.append(string.ascii_lowercase[remainder])
+    return "".join(reversed(letters))
+
+
+def _zipf_cum_weights(count: int, exponent: float) -> List[float]:
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def _weighted(pairs):
+    values, weights = zip(*pairs)
+    return list(values), list(itertools.accumulate(weights))
+
+
+class DatasetGenerator:
+    """Gera grupos e linhas de error_logs com a forma de tráfego configurada"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.end = args.end.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        self.start = self.end - timedelta(days=args.days)
+        self.groups = [self._group(index) for index in range(args.groups)]
+        self.group_weights = _zipf_cum_weights(args.groups, args.zipf)
+        self.user_weights = _zipf_cum_weights(args.users, 1.0) if args.users else None
+        self.environments = _weighted(ENVIRONMENTS)
+        self.statuses = _weighted(ROW_STATUSES)
+
+        # Horas da janela com o peso diurno/semanal
+        self.hours = [self.start + timedelta(hours=hour) for hour in range(args.days * 24)]
+        self.hour_prefixes = [hour.strftime("%Y-%m-%dT%H") for hour in self.hours]
+        self.hour_weights = list(itertools.accumulate(
+            DIURNAL[hour.hour] * (WEEKEND_FACTOR if hour.weekday() >= 5 else 1) for hour in self.hours
+        ))
+        self.incidents = [self._incident() for _ in range(args.incidents)]
+
+    def _group(self, index: int) -> Dict[str, Any]:
+        rng = self.random
+        error_type, source, message, status_code, severity_weights, has_stack = TEMPLATES[index % len(TEMPLATES)]
+        token = _token(index)
+        endpoint = None
+        if rng.random() < 0.8:
+            # Cardinalidade de endpoints: o grupo usa um dos --endpoints caminhos-base
+            resource = RESOURCES[index % len(RESOURCES)]
+            base = f"{resource}/{_token(index % self.args.endpoints)}" if self.args.endpoints else resource
+            endpoint = f"/api/{base}/{{n}}"
+        stack_trace = (
+            f"Traceback (most recent call last):\n  File \"app/{token}.py\", line {rng.randint(10, 900)}, "
+            f"in handle\n{error_type.title()}Error: {token}"
+        ) if has_stack else None
+        sample = message.format(token=token, n=0)
+        return {
+            "message": message.replace("{token}", token),
+            "error_type": error_type,
+            "severity": rng.choices(SEVERITIES, weights=severity_weights)[0],
+            "source": source,
+            "endpoint": endpoint,
+            "method": rng.choice(METHODS) if endpoint else None,
+            "status_code": status_code,
+            "stack_trace": stack_trace,
+            "fingerprint": models.generate_fingerprint(
+                error_type=error_type,
+                message=sample,
+                endpoint=endpoint.format(n=0) if endpoint else None,
+                stack_trace=stack_trace,
+            ),
+        }
+
+    def _incident(self) -> Dict[str, Any]:
+        """Pico curto de um grupo da cauda (fora dos 10% mais populares)"""
+        rng = self.random
+        tail_start = max(1, self.args.groups // 10)
+        start_hour = rng.randrange(len(self.hours))
+        return {
+            "group": rng.randrange(tail_start, self.args.groups) if self.args.groups > tail_start else 0,
+            "start": start_hour,
+            "hours": min(rng.randint(1, 3), len(self.hours) - start_hour),
+        }
+
+    def batches(self):
+        """Lotes de linhas na ordem de DUMP_COLUMNS"""
+        remaining = self.args.rows
+        while remaining > 0:
+            size = min(self.args.batch_size, remaining)
+            yield self._batch(size)
+            remaining -= size
+
+    def _batch(self, size: int) -> List[tuple]:
+        rng = self.random
+        args = self.args
+        incident_rows = sum(1 for _ in range(size) if rng.random() < args.incident_share) if self.incidents else 0
+        regular = size - incident_rows
+
+        # Uma coluna por vez (random.choices com k: um laço em C por coluna)
+        group_ids = rng.choices(range(args.groups), cum_weights=self.group_weights, k=regular)
+        hours = rng.choices(range(len(self.hours)), cum_weights=self.hour_weights, k=regular)
+        for incident in rng.choices(self.incidents, k=incident_rows):
+            group_ids.append(incident["group"])
+            hours.append(incident["start"] + rng.randrange(incident["hours"]))
+
+        minutes = [rng.randrange(3600) for _ in range(size)]
+        numbers = [rng.randrange(1, 100000) for _ in range(size)]
+        users = (
+            rng.choices(range(args.users), cum_weights=self.user_weights, k=size) if args.users else [None] * size
+        )
+        sessions = [rng.randrange(args.sessions) for _ in range(size)] if args.sessions else [None] * size
+        servers = [rng.randrange(args.servers) for _ in range(size)]
+        releases = [rng.randrange(args.releases) for _ in range(size)]
+        environments = rng.choices(self.environments[0], cum_weights=self.environments[1], k=size)
+        statuses = rng.choices(self.statuses[0], cum_weights=self.statuses[1], k=size)
+        agents = rng.choices(USER_AGENTS, k=size)
+
+        rows = []
+        for index in range(size):
+            group = self.groups[group_ids[index]]
+            number = numbers[index]
+            hour = hours[index]
+            seconds = minutes[index]
+            timestamp = f"{self.hour_prefixes[hour]}:{seconds // 60:02d}:{seconds % 60:02d}"
+            status = statuses[index]
+            resolved_at = None
+            if status == "RESOLVED":
+                resolved_at = (self.hours[hour] + timedelta(seconds=seconds, hours=1 + number % 48)).isoformat()
+            user = users[index]
+            anonymous = user is None or group["source"] == "frontend" and number % 5 == 0
+            rows.append((
+                group["message"].format(n=number),
+                group["error_type"],
+                group["severity"],
+                group["source"],
+                group["stack_trace"],
+                group["endpoint"].format(n=number) if group["endpoint"] else None,
+                group["method"],
+                group["status_code"],
+                None if anonymous else f"user-{user}",
+                None if sessions[index] is None else f"sess-{sessions[index]}",
+                None if anonymous else f"10.{user >> 16 & 255}.{user >> 8 & 255}.{user & 255}",
+                agents[index],
+                f'{{"environment": "{environments[index]}", "server": "srv-{servers[index]}", '
+                f'"release": "v1.{releases[index]}"}}',
+                status,
+                None,
+                None,
+                timestamp,
+                resolved_at,
+                1,
+                group["fingerprint"],
+            ))
+        return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="diretório do dump (CSV)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--groups", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=30, help="janela de tempo, terminando em --end")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=datetime.utcnow(), help="fim da janela (UTC)")
+    parser.add_argument("--zipf", type=float, default=1.1, help="expoente da popularidade dos grupos")
+    parser.add_argument("--users", type=int, default=100_000, help="usuários distintos (0: sem user_id)")
+    parser.add_argument("--sessions", type=int, default=500_000, help="sessões distintas (0: sem session_id)")
+    parser.add_argument("--endpoints", type=int, default=200, help="caminhos-base de endpoint distintos")
+    parser.add_argument("--servers", type=int, default=50)
+    parser.add_argument("--releases", type=int, default=20)
+    parser.add_argument("--incidents", type=int, default=5, help="picos de incidente na janela")
+    parser.add_argument("--incident-share", type=float, default=0.05, help="fração das linhas nos incidentes")
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--load", action="store_true", help="importa o dump em DATABASE_URL ao final")
+    args = parser.parse_args()
+    if args.groups < 1 or args.days < 1 or args.servers < 1 or args.releases < 1:
+        parser.error("--groups, --days, --servers e --releases devem ser positivos")
+
+    started = time.monotonic()
+    generator = DatasetGenerator(args)
+    os.makedirs(args.directory, exist_ok=True)
+    written = 0
+    with open(data_file(args.directory, "csv"), "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(DUMP_COLUMNS)
+        for batch in generator.batches():
+            writer.writerows(batch)
+            written += len(batch)
+            print(f"  {written:>12,} linhas ({written / (time.monotonic() - started):,.0f}/s)", end="\r")
+    write_manifest(
+        args.directory,
+        "csv",
+        written,
+        source_dialect="synthetic",
+        start_date=generator.start.isoformat(),
+        end_date=generator.end.isoformat(),
+        generator={key: str(value) for key, value in vars(args).items() if key not in ("directory", "load")},
+    )
+    print(f"\n✓ {written:,} linhas, {args.groups:,} grupos em {args.directory} ({time.monotonic() - started:.1f}s)")
+
+    if args.load:
+        from database import run_migrations
+        from dump_service import DumpService
+
+        run_migrations()
+        result = DumpService.import_dump(args.directory)
+        print(f"✓ Carregado em {result['seconds']}s ({result['groups_created']} grupos novos)")
+
+
+if __name__ == "__main__":
+    main()
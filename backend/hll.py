@@ -0,0 +1,86 @@
+"""
+HyperLogLog para contagem aproximada de valores distintos (usuários e sessões afetados)
+
+Os sketches são mergeáveis (máximo registro a registro), então buckets horários
+podem ser combinados para qualquer janela de tempo sem voltar às linhas brutas.
+"""
+
+import hashlib
+import math
+import zlib
+from typing import Iterable, Optional
+
+# 2^11 registros: ~2.3% de erro padrão, 2KB por sketch antes da compressão
+DEFAULT_PRECISION = 11
+
+_INVERSE_POWERS = [2.0 ** -rank for rank in range(65)]
+
+
+class HyperLogLog:
+    """Sketch HyperLogLog com hash de 64 bits (blake2b)"""
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[bytearray] = None):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision deve estar entre 4 e 16")
+        self.precision = precision
+        self.registers = registers if registers is not None else bytearray(1 << precision)
+
+    def add(self, value: str) -> bool:
+        """
+        Adiciona um valor ao sketch
+
+        Returns:
+            bool: True se algum registro mudou (a estimativa pode ter mudado)
+        """
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        index = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        remainder = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def update(self, values: Iterable[Optional[str]]) -> bool:
+        """Adiciona vários valores (None é ignorado)"""
+        changed = False
+        for value in values:
+            if value is not None:
+                changed = self.add(value) or changed
+        return changed
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Combina outro sketch neste (in-place)"""
+        if other.precision != self.precision:
+            raise ValueError("Não é possível combinar sketches com precisões diferentes")
+        registers = self.registers
+        for index, rank in enumerate(other.registers):
+            if rank > registers[index]:
+                registers[index] = rank
+        return self
+
+    def estimate(self) -> int:
+        """Estimativa da cardinalidade"""
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / sum(_INVERSE_POWERS[rank] for rank in self.registers)
+        zeros = self.registers.count(0)
+        # Correção para cardinalidades pequenas (linear counting)
+        if raw <= 2.5 * size and zeros:
+            return int(round(size * math.log(size / zeros)))
+        return int(round(raw))
+
+    def to_bytes(self) -> bytes:
+        """Serializa o sketch (precisão + registros comprimidos)"""
+        return bytes([self.precision]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "HyperLogLog":
+        """Desserializa um sketch; None ou vazio resulta em sketch vazio"""
+        if not data:
+            return cls()
+        return cls(precision=data[0], registers=bytearray(zlib.decompress(data[1:])))
@@ -0,0 +1,105 @@
+"""
+Ingestão de erros: fingerprint, agrupamento, rollups e sketches de afetados
+
+Usada pelo POST /api/errors, com lotes de um erro no modo padrão, e pelo
+escritor do modo embarcado (embedded_service), que agrupa muitas requisições
+numa transação. O init_db também grava os dados de exemplo por aqui, com o
+horário histórico de cada erro. Um lote busca os grupos de uma vez e soma os rollups por
+grupo, em vez de um upsert por erro.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+from rollup_service import RollupService
+import models
+import schemas
+
+SEVERITY_ORDER = {"LOW": 1, "MEDIUM": 2, "HIGH": 3, "CRITICAL": 4}
+
+
+class IngestService:
+    """Gravação de erros recebidos"""
+
+    @staticmethod
+    def record(
+        db: Session,
+        errors: List[schemas.ErrorLogCreate],
+        timestamp: Optional[datetime] = None,
+    ) -> List[models.ErrorLog]:
+        """
+        Grava um lote de erros nos seus grupos (sem commit)
+
+        Args:
+            timestamp: Horário dos erros do lote (padrão: agora), para dados históricos
+
+        Returns:
+            list: Os ErrorLog criados, na ordem de `errors` (ids já atribuídos)
+        """
+        fingerprints = [
+            models.generate_fingerprint(
+                error_type=error.error_type.value,
+                message=error.message,
+                endpoint=error.endpoint,
+                stack_trace=error.stack_trace,
+            )
+            for error in errors
+        ]
+
+        # Grupos existentes, travados em ordem de id (lotes concorrentes não se bloqueiam em ciclo)
+        groups: Dict[str, models.ErrorGroup] = {
+            group.fingerprint: group
+            for group in db.query(models.ErrorGroup).filter(
+                models.ErrorGroup.fingerprint.in_(set(fingerprints))
+            ).order_by(models.ErrorGroup.id).with_for_update()
+        }
+
+        now = timestamp or datetime.utcnow()
+        logs = []
+        batch_errors = defaultdict(list)
+        for error, fingerprint in zip(errors, fingerprints):
+            group = groups.get(fingerprint)
+            if group:
+                # Atualizar grupo existente
+                group.total_occurrences += 1
+                group.last_seen = now
+                # Atualizar severidade se o novo erro for mais severo
+                if SEVERITY_ORDER[error.severity.value] > SEVERITY_ORDER[group.severity.value]:
+                    group.severity = error.severity
+            else:
+                group = groups[fingerprint] = models.ErrorGroup(
+                    fingerprint=fingerprint,
+                    message_pattern=error.message,
+                    error_type=error.error_type,
+                    severity=error.severity,
+                    source=error.source,
+                    total_occurrences=1,
+                )
+                if timestamp:
+                    group.first_seen = group.last_seen = timestamp
+                db.add(group)
+                db.flush()  # Para obter o ID do grupo
+
+            log = models.ErrorLog(**error.model_dump())
+            log.group_id = group.id
+            if timestamp:
+                log.timestamp = timestamp
+            db.add(log)
+            logs.append(log)
+            batch_errors[fingerprint].append(error)
+
+        db.flush()
+        for fingerprint, group_errors in batch_errors.items():
+            group = groups[fingerprint]
+            RollupService.record(db, group.id, timestamp, delta=len(group_errors))
+            RollupService.track_affected(
+                db, group, (error.user_id for error in group_errors), (error.session_id for error in group_errors),
+                timestamp=timestamp,
+            )
+            if timestamp:
+                # Os sketches alteram o grupo de novo: sem last_seen no UPDATE, o onupdate o levaria para agora
+                flag_modified(group, "last_seen")
+        return logs
@@ -4,11 +4,13 @@ Script para inicializar o banco de dados com dados de exemplo
 import random
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from database import SessionLocal, engine
+from database import SessionLocal, run_migrations
+from ingest_service import IngestService
 import models
+import schemas
 
-# Criar tabelas
-models.Base.metadata.create_all(bind=engine)
+# Criar/atualizar tabelas
+run_migrations()
 
 
 def generate_sample_errors(db: Session, count: int = 100):
@@ -216,35 +218,34 @@ def generate_sample_errors(db: Session, count: int = 100):
     
     print(f"Gerando {count} erros de exemplo...")
     
-    for i in range(count):
+    # Em ordem cronológica, para first_seen/last_seen dos grupos ficarem corretos
+    timestamps = sorted(
+        datetime.utcnow() - timedelta(days=random.randint(0, 30), hours=random.randint(0, 23))
+        for _ in range(count)
+    )
+    
+    for timestamp in timestamps:
         template = random.choice(error_templates)
         
-        # Random timestamp within last 30 days
-        days_ago = random.randint(0, 30)
-        hours_ago = random.randint(0, 23)
-        timestamp = datetime.utcnow() - timedelta(days=days_ago, hours=hours_ago)
-        
-        error_data = {
+        error = schemas.ErrorLogCreate(
             **template,
-            "user_id": random.choice(user_ids),
-            "session_id": f"sess_{random.randint(1000, 9999)}",
-            "ip_address": random.choice(ip_addresses),
-            "user_agent": random.choice(user_agents),
-            "status": random.choice(statuses),
-            "timestamp": timestamp,
-            "occurrences": random.randint(1, 10),
-            "error_metadata": {
+            user_id=random.choice(user_ids),
+            session_id=f"sess_{random.randint(1000, 9999)}",
+            ip_address=random.choice(ip_addresses),
+            user_agent=random.choice(user_agents),
+            error_metadata={
                 "server": f"server-{random.randint(1, 5)}",
                 "environment": random.choice(["production", "staging", "development"])
             }
-        }
+        )
+        # Grupo, rollup e sketches de afetados, como na ingestão pela API
+        db_error = IngestService.record(db, [error], timestamp=timestamp)[0]
+        db_error.status = random.choice(statuses)
+        db_error.occurrences = random.randint(1, 10)
         
         # Add resolved_at if status is RESOLVED
-        if error_data["status"] == models.ErrorStatus.RESOLVED:
-            error_data["resolved_at"] = timestamp + timedelta(hours=random.randint(1, 48))
-        
-        db_error = models.ErrorLog(**error_data)
-        db.add(db_error)
+        if db_error.status == models.ErrorStatus.RESOLVED:
+            db_error.resolved_at = timestamp + timedelta(hours=random.randint(1, 48))
     
     db.commit()
     print(f"✓ {count} erros criados com sucesso!")
@@ -258,6 +259,9 @@ def main():
         # Limpar dados existentes (opcional)
         print("Limpando dados antigos...")
         db.query(models.ErrorLog).delete()
+        db.query(models.ErrorGroupRollup).delete()
+        db.query(models.ErrorGroup).delete()
+        db.query(models.EdgeGroupReport).delete()
         db.commit()
         
         # Gerar dados de exemplo
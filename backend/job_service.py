@@ -0,0 +1,339 @@
+"""
+Jobs em segundo plano para operações longas sobre muitos erros
+
+Mudança de status e exclusão de grupos com milhões de erros, e atualizações em
+massa de erros, não cabem em uma requisição (um único UPDATE/DELETE segura
+locks por minutos). O endpoint atualiza o grupo na hora e cria um job; o job percorre os erros em lotes na
+ordem da paginação por cursor (timestamp DESC, id DESC), com uma transação
+curta por lote que grava também o progresso e o cursor. Assim um job
+interrompido (reinício da API) continua de onde parou.
+
+O estado fica na tabela background_jobs, visível em /api/jobs por qualquer
+instância. Cancelamento: o job verifica o pedido entre os lotes.
+
+Configuração:
+- JOB_CHUNK_SIZE: linhas por lote (padrão 1000)
+- JOB_CHUNK_PAUSE_MS: pausa entre lotes (padrão 0)
+- JOB_WORKERS: jobs simultâneos por instância (padrão 2)
+- JOB_STALE_SECONDS: sem progresso por esse tempo, um job RUNNING é retomado (padrão 300)
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, or_, and_
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from pagination import apply_keyset, encode_cursor
+import models
+import logging
+
+logger = logging.getLogger(__name__)
+
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", "1000"))
+JOB_CHUNK_PAUSE_MS = float(os.getenv("JOB_CHUNK_PAUSE_MS", "0"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "300"))
+
+ACTIVE_JOB_STATUSES = (models.JobStatus.QUEUED, models.JobStatus.RUNNING)
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="jobs")
+
+
+# ==================== HANDLERS ====================
+
+def _keyset_chunk(query, job: models.BackgroundJob) -> List[Any]:
+    """Próximo lote (id, timestamp) da seleção do job, após o seu cursor"""
+    return apply_keyset(query, models.ErrorLog.timestamp, models.ErrorLog.id, job.cursor).limit(JOB_CHUNK_SIZE).all()
+
+
+def _group_errors_chunk(db: Session, job: models.BackgroundJob) -> List[Any]:
+    query = db.query(models.ErrorLog.id, models.ErrorLog.timestamp).filter(
+        models.ErrorLog.group_id == job.params["group_id"]
+    )
+    return _keyset_chunk(query, job)
+
+
+def _chunk_conditions(db: Session, rows: List[Any]) -> list:
+    conditions = [models.ErrorLog.id.in_([row.id for row in rows])]
+    if db.bind.dialect.name == "postgresql":
+        # Faixa de timestamp do lote: descarta as partições fora dela
+        timestamps = [row.timestamp for row in rows]
+        conditions.append(models.ErrorLog.timestamp.between(min(timestamps), max(timestamps)))
+    return conditions
+
+
+def _count_group_errors(db: Session, job: models.BackgroundJob) -> int:
+    return db.query(func.count(models.ErrorLog.id)).filter(
+        models.ErrorLog.group_id == job.params["group_id"]
+    ).scalar()
+
+
+def _apply_group_status(db: Session, job: models.BackgroundJob, rows: List[Any]):
+    db.query(models.ErrorLog).filter(*_chunk_conditions(db, rows)).update(
+        {"status": models.ErrorStatus(job.params["status"])}, synchronize_session=False
+    )
+
+
+def _apply_group_delete(db: Session, job: models.BackgroundJob, rows: List[Any]):
+    db.query(models.ErrorLog).filter(*_chunk_conditions(db, rows)).delete(synchronize_session=False)
+
+
+def _finish_group_delete(db: Session, job: models.BackgroundJob):
+    """Remove o que sobrou do grupo (erros recebidos durante o job), os rollups e o grupo"""
+    group_id = job.params["group_id"]
+    db.query(models.ErrorLog).filter(models.ErrorLog.group_id == group_id).delete(synchronize_session=False)
+    db.query(models.ErrorGroupRollup).filter(models.ErrorGroupRollup.group_id == group_id).delete(synchronize_session=False)
+    db.query(models.ErrorGroup).filter(models.ErrorGroup.id == group_id).delete(synchronize_session=False)
+
+
+def _cancel_group_delete(db: Session, job: models.BackgroundJob):
+    """Exclusão cancelada: o grupo volta a aparecer (com os erros que restaram)"""
+    group = db.get(models.ErrorGroup, job.params["group_id"])
+    if group is None:
+        return
+    group.deleted_at = None
+    fingerprint = job.params.get("fingerprint")
+    taken = db.query(models.ErrorGroup.id).filter(models.ErrorGroup.fingerprint == fingerprint).first()
+    if fingerprint and not taken:
+        group.fingerprint = fingerprint
+
+
+def _groups_errors(query, job: models.BackgroundJob):
+    return query.filter(models.ErrorLog.group_id.in_(job.params["group_ids"]))
+
+
+def _count_groups_errors(db: Session, job: models.BackgroundJob) -> int:
+    return _groups_errors(db.query(func.count(models.ErrorLog.id)), job).scalar()
+
+
+def _groups_errors_chunk(db: Session, job: models.BackgroundJob) -> List[Any]:
+    return _keyset_chunk(_groups_errors(db.query(models.ErrorLog.id, models.ErrorLog.timestamp), job), job)
+
+
+def _selected_errors(query, job: models.BackgroundJob):
+    from bulk_service import filter_errors
+    return filter_errors(query, job.params.get("ids"), job.params.get("filter"))
+
+
+def _count_selected_errors(db: Session, job: models.BackgroundJob) -> int:
+    return _selected_errors(db.query(func.count(models.ErrorLog.id)), job).scalar()
+
+
+def _selected_errors_chunk(db: Session, job: models.BackgroundJob) -> List[Any]:
+    return _keyset_chunk(_selected_errors(db.query(models.ErrorLog.id, models.ErrorLog.timestamp), job), job)
+
+
+def _apply_errors_update(db: Session, job: models.BackgroundJob, rows: List[Any]):
+    from bulk_service import error_update_values
+    db.query(models.ErrorLog).filter(*_chunk_conditions(db, rows)).update(
+        error_update_values(job.params["values"]), synchronize_session=False
+    )
+
+
+class JobHandler:
+    """Etapas de um tipo de job"""
+
+    __slots__ = ("count", "chunk", "apply", "finish", "cancel")
+
+    def __init__(
+        self,
+        count: Callable,
+        chunk: Callable,
+        apply: Callable,
+        finish: Optional[Callable] = None,
+        cancel: Optional[Callable] = None,
+    ):
+        self.count = count
+        self.chunk = chunk
+        self.apply = apply
+        self.finish = finish
+        self.cancel = cancel
+
+
+JOB_HANDLERS: Dict[str, JobHandler] = {
+    "groups_status": JobHandler(_count_groups_errors, _groups_errors_chunk, _apply_group_status),
+    "errors_update": JobHandler(_count_selected_errors, _selected_errors_chunk, _apply_errors_update),
+    "group_delete": JobHandler(
+        _count_group_errors, _group_errors_chunk, _apply_group_delete,
+        finish=_finish_group_delete, cancel=_cancel_group_delete,
+    ),
+}
+
+
+class JobService:
+    """Criação, execução, consulta e cancelamento de jobs"""
+
+    @staticmethod
+    def create(db: Session, kind: str, params: Dict[str, Any]) -> models.BackgroundJob:
+        """
+        Registra o job na sessão (sem commit)
+
+        O chamador faz o commit junto com a sua alteração e depois chama `submit`.
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Tipo de job inválido: {kind}")
+        job = models.BackgroundJob(
+            kind=kind, params=params, status=models.JobStatus.QUEUED, processed=0, cancel_requested=False
+        )
+        db.add(job)
+        db.flush()
+        return job
+
+    @staticmethod
+    def submit(job_id: int):
+        _executor.submit(JobService._run, job_id)
+
+    @staticmethod
+    def cancel(db: Session, job: models.BackgroundJob) -> models.BackgroundJob:
+        """Pede o cancelamento; um job ainda na fila é cancelado na hora"""
+        if job.status not in ACTIVE_JOB_STATUSES:
+            return job
+        job.cancel_requested = True
+        if job.status == models.JobStatus.QUEUED:
+            JobService._finish(db, job, models.JobStatus.CANCELLED)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def cancel_group_jobs(db: Session, group_ids: Iterable[int]):
+        """Pede o cancelamento dos jobs ativos dos grupos (substituídos por um novo)"""
+        group_ids = set(group_ids)
+        jobs = db.query(models.BackgroundJob).filter(
+            models.BackgroundJob.status.in_(ACTIVE_JOB_STATUSES)
+        ).all()
+        for job in jobs:
+            params = job.params or {}
+            if params.get("group_id") in group_ids or group_ids.intersection(params.get("group_ids") or ()):
+                job.cancel_requested = True
+                if job.status == models.JobStatus.QUEUED:
+                    JobService._finish(db, job, models.JobStatus.CANCELLED)
+
+    @staticmethod
+    def _claim(db: Session, job_id: int) -> bool:
+        """Marca o job como RUNNING se estiver na fila ou parado (sem progresso recente)"""
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=JOB_STALE_SECONDS)
+        claimed = db.query(models.BackgroundJob).filter(
+            models.BackgroundJob.id == job_id,
+            or_(
+                models.BackgroundJob.status == models.JobStatus.QUEUED,
+                and_(
+                    models.BackgroundJob.status == models.JobStatus.RUNNING,
+                    models.BackgroundJob.updated_at < stale,
+                ),
+            ),
+        ).update(
+            {
+                "status": models.JobStatus.RUNNING,
+                "started_at": func.coalesce(models.BackgroundJob.started_at, now),
+                "updated_at": now,
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+        return claimed == 1
+
+    @staticmethod
+    def _finish(db: Session, job: models.BackgroundJob, status: models.JobStatus, error: Optional[str] = None):
+        handler = JOB_HANDLERS[job.kind]
+        if status == models.JobStatus.CANCELLED and handler.cancel:
+            handler.cancel(db, job)
+        job.status = status
+        job.error = error
+        job.finished_at = job.updated_at = datetime.utcnow()
+
+    @staticmethod
+    def _run(job_id: int):
+        """Executa o job lote a lote até concluir, falhar ou ser cancelado"""
+        from cache_service import response_cache
+
+        db = SessionLocal()
+        try:
+            if not JobService._claim(db, job_id):
+                return
+            job = db.get(models.BackgroundJob, job_id)
+            handler = JOB_HANDLERS[job.kind]
+            if job.total is None:
+                job.total = handler.count(db, job)
+                db.commit()
+
+            pause = JOB_CHUNK_PAUSE_MS / 1000
+            while True:
+                # Após o commit o job é recarregado: vê o pedido de cancelamento
+                if job.cancel_requested:
+                    JobService._finish(db, job, models.JobStatus.CANCELLED)
+                    db.commit()
+                    break
+
+                rows = handler.chunk(db, job)
+                if rows:
+                    handler.apply(db, job, rows)
+                    job.processed += len(rows)
+                    job.cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+                job.updated_at = datetime.utcnow()
+                done = len(rows) < JOB_CHUNK_SIZE
+                if done:
+                    if handler.finish:
+                        handler.finish(db, job)
+                    JobService._finish(db, job, models.JobStatus.COMPLETED)
+                # Lote e progresso na mesma transação
+                db.commit()
+                if done:
+                    break
+                if pause:
+                    time.sleep(pause)
+        except Exception as e:
+            logger.error(f"Job {job_id} falhou: {str(e)}")
+            db.rollback()
+            job = db.get(models.BackgroundJob, job_id)
+            if job is not None:
+                JobService._finish(db, job, models.JobStatus.FAILED, error=str(e))
+                db.commit()
+        finally:
+            db.close()
+            response_cache.invalidate("stats", "groups")
+
+    @staticmethod
+    def resume_pending() -> int:
+        """Submete os jobs na fila e os RUNNING parados (ex: após reinício da API)"""
+        stale = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+        db = SessionLocal()
+        try:
+            ids = [row.id for row in db.query(models.BackgroundJob.id).filter(
+                or_(
+                    models.BackgroundJob.status == models.JobStatus.QUEUED,
+                    and_(
+                        models.BackgroundJob.status == models.JobStatus.RUNNING,
+                        models.BackgroundJob.updated_at < stale,
+                    ),
+                )
+            ).all()]
+        finally:
+            db.close()
+        for job_id in ids:
+            JobService.submit(job_id)
+        return len(ids)
+
+    @staticmethod
+    def start_background() -> threading.Thread:
+        """Retoma jobs pendentes agora e a cada JOB_STALE_SECONDS, em uma thread daemon"""
+        stop = threading.Event()
+
+        def loop():
+            while True:
+                try:
+                    JobService.resume_pending()
+                except Exception as e:
+                    logger.error(f"Erro ao retomar jobs: {str(e)}")
+                if stop.wait(JOB_STALE_SECONDS):
+                    return
+
+        thread = threading.Thread(target=loop, name="jobs-resume", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,512 @@
+"""
+Importação de tracebacks e linhas de erro de arquivos de log
+
+Para serviços legados que só escrevem erros em arquivo. Os arquivos (texto
+ou .gz) são lidos em streaming, e um parser de estados extrai:
+
+- tracebacks Python ("Traceback (most recent call last):" ... exceção final,
+  incluindo exceções encadeadas);
+- stacks JavaScript/Node ("TypeError: ..." seguido de linhas "    at ...");
+- linhas de log com nível ERROR, CRITICAL ou FATAL. Se a linha vier logo
+  antes de um traceback, ela dá ao traceback seu timestamp e sua mensagem
+  de log.
+
+O parsing roda em um pool de processos. Arquivos de texto são divididos em
+pedaços de `--chunk-mb`, sempre no início de uma linha com timestamp, para
+que nenhum traceback fique dividido entre dois pedaços. Um .gz não admite
+leitura a partir do meio e é processado inteiro por um processo. Cada
+registro sai com seu fingerprint (models.generate_fingerprint), calculado
+nos processos.
+
+Os registros são gravados num dump CSV e carregados pelo dump_service: COPY no
+Postgres, grupos por fingerprint em um passe set-based e rollup somado só nos
+grupos e horas tocados. Ao final, o importador mostra a vazão e as falhas de
+parsing por motivo. A vazão em MB/s é medida sobre o tamanho dos arquivos em
+disco (comprimido, para .gz); o volume descomprimido aparece à parte.
+
+Timestamps sem fuso são tratados como UTC. Registros sem timestamp recebem o
+horário da importação.
+
+Uso:
+    python log_importer.py /var/log/legacy/*.log /var/log/legacy/*.gz --source backend --service billing
+    python log_importer.py app.log --dry-run --keep-dump /tmp/app-dump
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import models
+
+LINE_START_TIMESTAMP = re.compile(rb"^\[?\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}")
+TIMESTAMP = re.compile(r"^\[?(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)\]?")
+# Nível entre os primeiros campos da linha ("ERROR msg", "[ERROR] msg", "app - ERROR - msg")
+LEVEL = re.compile(
+    r"^(?:(?![\[(]?(?:TRACE|DEBUG|INFO|NOTICE|WARN|WARNING)\b)\S+\s+){0,3}?[\[(]?(ERROR|CRITICAL|FATAL)[\])]?:?(?:\s+|$)"
+)
+PYTHON_TRACEBACK = "Traceback (most recent call last):"
+PYTHON_CHAIN_MARKERS = (
+    "During handling of the above exception, another exception occurred:",
+    "The above exception was the direct cause of the following exception:",
+)
+JS_ERROR = re.compile(r"^(?:Uncaught )?([A-Z]\w*(?:Error|Exception))(?::\s.*)?$")
+JS_FRAME = re.compile(r"^\s+at\s")
+
+MAX_TRACEBACK_LINES = int(os.getenv("LOG_IMPORT_MAX_TRACEBACK_LINES", "500"))
+# Janela em que uma nova fronteira de pedaço procura a próxima linha com timestamp
+BOUNDARY_SCAN_BYTES = 1 << 20
+
+# Exceção (por trecho do nome) -> ErrorType; o resto é APPLICATION
+ERROR_TYPE_KEYWORDS = (
+    (("Operational", "Integrity", "Programming", "Database", "Deadlock", "psycopg", "SQL"), models.ErrorType.DATABASE),
+    (("Timeout", "MemoryError", "RecursionError"), models.ErrorType.PERFORMANCE),
+    (("Connection", "HTTPError", "RequestException", "SSLError", "FetchError", "Gateway"), models.ErrorType.INTEGRATION),
+    (("Permission", "Unauthorized", "Forbidden", "Authentication", "Auth"), models.ErrorType.AUTH),
+    (("Validation", "Schema"), models.ErrorType.VALIDATION),
+)
+
+# Estados do parser
+IDLE, TRACEBACK, TRACEBACK_END, JS_HEADER, JS_STACK = range(5)
+
+
+def error_type_for(message: str) -> models.ErrorType:
+    name = message.split(":", 1)[0]
+    for keywords, error_type in ERROR_TYPE_KEYWORDS:
+        if any(keyword in name for keyword in keywords):
+            return error_type
+    return models.ErrorType.APPLICATION
+
+
+def parse_timestamp(value: str) -> Optional[str]:
+    """Timestamp do log em ISO UTC naive (None se inválido)"""
+    try:
+        moment = datetime.fromisoformat(value.replace(",", ".").replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.isoformat()
+
+
+class LogParser:
+    """
+    Máquina de estados sobre as linhas de um arquivo (ou pedaço)
+
+    `feed` recebe uma linha por vez e devolve os registros concluídos por ela.
+    Cada registro é um dict com message, stack_trace, severity, timestamp,
+    line e log_message.
+    """
+
+    def __init__(self):
+        self.state = IDLE
+        self.stats: Counter = Counter()
+        self.failures: Counter = Counter()
+        self._lines: List[str] = []
+        self._start_line = 0
+        self._message = ""
+        self._chained = False  # marcador de exceção encadeada visto após a exceção final
+        self._context: Optional[Dict[str, Any]] = None  # última linha ERROR ainda não emitida
+
+    def feed(self, line: str, number: int) -> List[Dict[str, Any]]:
+        self.stats["lines"] += 1
+        records: List[Dict[str, Any]] = []
+        # Uma linha pode encerrar o registro em andamento e ser reprocessada no estado IDLE
+        while True:
+            handled = self._step(line, number, records)
+            if handled:
+                return records
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Fim da entrada: emite ou descarta o que estava em andamento"""
+        records: List[Dict[str, Any]] = []
+        if self.state == TRACEBACK:
+            self._fail("traceback sem exceção final")
+        elif self.state == TRACEBACK_END:
+            self._emit_stack(records, "python_tracebacks")
+        elif self.state == JS_STACK:
+            self._emit_stack(records, "js_stacks")
+        self.state = IDLE
+        self._flush_context(records)
+        return records
+
+    # -------------------- transições --------------------
+
+    def _step(self, line: str, number: int, records: List[Dict[str, Any]]) -> bool:
+        stripped = line.strip()
+
+        if self.state == TRACEBACK:
+            if len(self._lines) >= MAX_TRACEBACK_LINES:
+                self._fail("traceback longo demais")
+                return False
+            if line[:1].isspace():
+                self._lines.append(line)
+                return True
+            if not stripped or TIMESTAMP.match(line):
+                # Nova linha de log antes da exceção final: traceback cortado
+                self._fail("traceback sem exceção final")
+                return False
+            self._lines.append(line)
+            self._message = stripped
+            self.state = TRACEBACK_END
+            return True
+
+        if self.state == TRACEBACK_END:
+            # Exceções encadeadas: marcador, linhas em branco e um novo traceback
+            if stripped in PYTHON_CHAIN_MARKERS:
+                self._chained = True
+                self._lines.append(line)
+                return True
+            if not stripped:
+                self._lines.append(line)
+                return True
+            if stripped == PYTHON_TRACEBACK and self._chained:
+                self._lines.append(line)
+                self._chained = False
+                self.state = TRACEBACK
+                return True
+            # Sem marcador, um novo traceback é outro erro
+            self._emit_stack(records, "python_tracebacks")
+            return False
+
+        if self.state == JS_HEADER:
+            if JS_FRAME.match(line):
+                self._lines.append(line)
+                self.state = JS_STACK
+                return True
+            if stripped == PYTHON_TRACEBACK:
+                # logger.error("%s: %s", type(e).__name__, e, exc_info=True): a linha ERROR
+                # parece um erro JS, mas o traceback Python que segue é dela
+                self._begin(TRACEBACK, [PYTHON_TRACEBACK], number)
+                return True
+            # Sem frames: era só uma linha parecida com um erro
+            self._lines = []
+            self.state = IDLE
+            self._flush_context(records)
+            return False
+
+        if self.state == JS_STACK:
+            if JS_FRAME.match(line) and len(self._lines) < MAX_TRACEBACK_LINES:
+                self._lines.append(line)
+                return True
+            self._emit_stack(records, "js_stacks")
+            return False
+
+        # IDLE
+        if stripped == PYTHON_TRACEBACK or stripped.endswith(PYTHON_TRACEBACK):
+            self._begin(TRACEBACK, [PYTHON_TRACEBACK], number)
+            return True
+
+        timestamp = None
+        text = stripped
+        match = TIMESTAMP.match(stripped)
+        if match:
+            timestamp = parse_timestamp(match.group(1))
+            if timestamp is None:
+                self.failures["timestamp inválido"] += 1
+            text = stripped[match.end():].strip()
+
+        level = LEVEL.match(text) if match else None
+        if level:
+            self._flush_context(records)
+            message = text[level.end():].lstrip("-: ").strip() or text
+            self._context = {
+                "timestamp": timestamp,
+                "line": number,
+                "log_message": message,
+                "severity": models.Severity.HIGH if level.group(1) == "ERROR" else models.Severity.CRITICAL,
+            }
+            # "ERROR TypeError: ..." seguido de frames "at": stack JS com a mensagem da própria linha
+            header = JS_ERROR.match(message)
+            if header:
+                self._begin(JS_HEADER, [message], number)
+                self._message = message
+            return True
+
+        if match:
+            # Outra linha de log (INFO, WARNING...): encerra o contexto pendente
+            self._flush_context(records)
+            return True
+
+        if JS_ERROR.match(stripped):
+            self._begin(JS_HEADER, [stripped], number)
+            self._message = stripped
+            return True
+        return True
+
+    def _begin(self, state: int, lines: List[str], number: int):
+        self.state = state
+        self._chained = False
+        self._lines = lines
+        self._start_line = number
+
+    def _fail(self, reason: str):
+        # A linha ERROR que precedia o traceback (se houver) ainda é emitida sozinha
+        self.failures[reason] += 1
+        self._lines = []
+        self.state = IDLE
+
+    def _emit_stack(self, records: List[Dict[str, Any]], kind: str):
+        context = self._context or {}
+        records.append({
+            "message": self._message,
+            "stack_trace": "\n".join(line.rstrip() for line in self._lines).strip(),
+            "severity": context.get("severity", models.Severity.HIGH),
+            "timestamp": context.get("timestamp"),
+            "line": context.get("line", self._start_line),
+            "log_message": context.get("log_message"),
+        })
+        self.stats[kind] += 1
+        self._lines = []
+        self._context = None
+        self.state = IDLE
+
+    def _flush_context(self, records: List[Dict[str, Any]]):
+        """Linha ERROR sem traceback em seguida vira um registro próprio"""
+        if self._context is None:
+            return
+        context = self._context
+        self._context = None
+        records.append({
+            "message": context["log_message"],
+            "stack_trace": None,
+            "severity": context["severity"],
+            "timestamp": context["timestamp"],
+            "line": context["line"],
+            "log_message": None,
+        })
+        self.stats["error_lines"] += 1
+
+
+# ==================== PEDAÇOS E PROCESSOS ====================
+
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _next_record_start(file, offset: int, limit: int) -> Optional[int]:
+    """Início da primeira linha com timestamp em [offset, limit)"""
+    file.seek(offset)
+    if offset:
+        file.readline()  # linha parcial
+    scanned = 0
+    while scanned < BOUNDARY_SCAN_BYTES:
+        position = file.tell()
+        if position >= limit:
+            return None
+        line = file.readline()
+        if not line:
+            return None
+        if LINE_START_TIMESTAMP.match(line):
+            return position
+        scanned += len(line)
+    return None
+
+
+def plan_chunks(paths: Iterable[str], chunk_bytes: int) -> List[Tuple[str, int, Optional[int]]]:
+    """(arquivo, início, fim) de cada pedaço; .gz e arquivos pequenos são um pedaço só"""
+    chunks = []
+    for path in paths:
+        size = os.path.getsize(path)
+        if path.endswith(".gz") or size <= chunk_bytes:
+            chunks.append((path, 0, None))
+            continue
+        starts = [0]
+        with open(path, "rb") as file:
+            for offset in range(chunk_bytes, size, chunk_bytes):
+                start = _next_record_start(file, max(offset, starts[-1] + 1), size)
+                if start is not None and start > starts[-1]:
+                    starts.append(start)
+        ends = starts[1:] + [None]
+        chunks.extend((path, start, end) for start, end in zip(starts, ends))
+    return chunks
+
+
+@lru_cache(maxsize=65536)
+def _classify(message: str, stack_trace: Optional[str]) -> Tuple[models.ErrorType, str]:
+    """Tipo e fingerprint de um erro (logs repetem os mesmos erros: cache por processo)"""
+    error_type = error_type_for(message)
+    return error_type, models.generate_fingerprint(
+        error_type=error_type.value, message=message, stack_trace=stack_trace
+    )
+
+
+def parse_chunk(path: str, start: int, end: Optional[int], source: str, service: Optional[str]) -> Dict[str, Any]:
+    """Processa um pedaço (roda no pool): registros já com fingerprint e as estatísticas"""
+    parser = LogParser()
+    records: List[Dict[str, Any]] = []
+    started = time.perf_counter()
+    read = 0
+    with _open(path) as file:
+        if start:
+            file.seek(start)
+        # Número de linha só é exato no primeiro pedaço; nos outros, relativo ao pedaço
+        number = 0
+        for raw in file:
+            if end is not None and start + read >= end:
+                break
+            read += len(raw)
+            number += 1
+            records.extend(parser.feed(raw.decode("utf-8", errors="replace").rstrip("\r\n"), number))
+    records.extend(parser.close())
+
+    log_file = os.path.basename(path)
+    rows = []
+    for record in records:
+        error_type, fingerprint = _classify(record["message"], record["stack_trace"])
+        metadata = {"log_file": log_file}
+        if start == 0:
+            metadata["line"] = record["line"]
+        if service:
+            metadata["service"] = service
+        if record["log_message"] and record["log_message"] != record["message"]:
+            metadata["log_message"] = record["log_message"][:1000]
+        rows.append({
+            "message": record["message"],
+            "error_type": error_type.value,
+            "severity": record["severity"].value,
+            "source": source,
+            "stack_trace": record["stack_trace"],
+            "error_metadata": json.dumps(metadata, ensure_ascii=False),
+            "status": models.ErrorStatus.OPEN.value,
+            "timestamp": record["timestamp"],
+            "occurrences": 1,
+            "fingerprint": fingerprint,
+        })
+    return {
+        "rows": rows,
+        # Em disco (comprimido no .gz) e descomprimido; iguais em arquivos de texto
+        "bytes": os.path.getsize(path) if path.endswith(".gz") else read,
+        "text_bytes": read,
+        "stats": dict(parser.stats),
+        "failures": dict(parser.failures),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+class LogImporter:
+    """Coordena o parsing em paralelo e a carga pelo dump_service"""
+
+    @staticmethod
+    def run(
+        paths: List[str],
+        source: str = "backend",
+        service: Optional[str] = None,
+        workers: Optional[int] = None,
+        chunk_mb: int = 32,
+        dump_dir: Optional[str] = None,
+        load: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Extrai os erros dos arquivos e carrega no banco
+
+        Returns:
+            dict: Estatísticas de parsing (por tipo de registro e falhas) e da carga
+        """
+        from dump_service import DUMP_COLUMNS, DumpService, data_file, write_manifest
+        import csv
+
+        chunks = plan_chunks(paths, chunk_mb * 1024 * 1024)
+        directory = dump_dir or tempfile.mkdtemp(prefix="log-import-")
+        os.makedirs(directory, exist_ok=True)
+        stats: Counter = Counter()
+        failures: Counter = Counter()
+        started = time.monotonic()
+        try:
+            with open(data_file(directory, "csv"), "w", newline="", encoding="utf-8") as file, \
+                    ProcessPoolExecutor(max_workers=workers) as pool:
+                writer = csv.writer(file)
+                writer.writerow(DUMP_COLUMNS)
+                futures = [pool.submit(parse_chunk, path, start, end, source, service) for path, start, end in chunks]
+                for future in futures:
+                    result = future.result()
+                    writer.writerows([row.get(name) for name in DUMP_COLUMNS] for row in result["rows"])
+                    stats.update(result["stats"])
+                    stats["bytes"] += result["bytes"]
+                    stats["text_bytes"] += result["text_bytes"]
+                    stats["records"] += len(result["rows"])
+                    stats["worker_seconds"] += result["seconds"]
+                    failures.update(result["failures"])
+            parse_seconds = time.monotonic() - started
+            write_manifest(directory, "csv", stats["records"], source_dialect="log_import", files=len(paths))
+
+            summary = {
+                "files": len(paths),
+                "chunks": len(chunks),
+                "bytes": stats["bytes"],
+                "text_bytes": stats["text_bytes"],
+                "lines": stats["lines"],
+                "records": stats["records"],
+                "python_tracebacks": stats["python_tracebacks"],
+                "js_stacks": stats["js_stacks"],
+                "error_lines": stats["error_lines"],
+                "failures": dict(failures),
+                "parse_seconds": round(parse_seconds, 2),
+                "mb_per_second": round(stats["bytes"] / 1024 / 1024 / parse_seconds, 1) if parse_seconds else None,
+                "lines_per_second": round(stats["lines"] / parse_seconds) if parse_seconds else None,
+                "dump": directory if dump_dir else None,
+            }
+            if load and stats["records"]:
+                summary["load"] = DumpService.import_dump(directory)
+            return summary
+        finally:
+            if dump_dir is None:
+                shutil.rmtree(directory, ignore_errors=True)
+
+
+def _print_summary(summary: Dict[str, Any]):
+    size = f"{summary['bytes'] / 1024 / 1024:,.1f} MB em disco"
+    if summary["text_bytes"] != summary["bytes"]:
+        size += f", {summary['text_bytes'] / 1024 / 1024:,.1f} MB descomprimidos"
+    print(f"Arquivos: {summary['files']} ({summary['chunks']} pedaços), {size}, {summary['lines']:,} linhas")
+    print(f"Parsing: {summary['parse_seconds']}s, {summary['mb_per_second']} MB/s em disco, "
+          f"{summary['lines_per_second']:,} linhas/s")
+    print(f"Registros: {summary['records']:,} (tracebacks Python {summary['python_tracebacks']:,}, "
+          f"stacks JS {summary['js_stacks']:,}, linhas de erro {summary['error_lines']:,})")
+    failures = summary["failures"]
+    if failures:
+        print(f"Falhas de parsing: {sum(failures.values()):,}")
+        for reason, count in sorted(failures.items(), key=lambda item: -item[1]):
+            print(f"  {reason:<32} {count:>10,}")
+    else:
+        print("Falhas de parsing: 0")
+    if summary.get("dump"):
+        print(f"Dump: {summary['dump']}")
+    load = summary.get("load")
+    if load:
+        print(f"✓ Carregado em {load['seconds']}s ({load['groups_created']} grupos novos, "
+              f"{load['groups_updated']} atualizados)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa tracebacks e linhas de erro de arquivos de log")
+    parser.add_argument("paths", nargs="+", help="arquivos de log (texto ou .gz)")
+    parser.add_argument("--source", default="backend", help="source dos erros importados")
+    parser.add_argument("--service", help="gravado em error_metadata.service")
+    parser.add_argument("--workers", type=int, help="processos de parsing (padrão: CPUs)")
+    parser.add_argument("--chunk-mb", type=int, default=32, help="tamanho dos pedaços de arquivos de texto")
+    parser.add_argument("--keep-dump", metavar="DIR", help="grava o dump neste diretório e o mantém")
+    parser.add_argument("--dry-run", action="store_true", help="só faz o parsing e mostra as estatísticas")
+    args = parser.parse_args()
+
+    if not args.dry_run:
+        from database import run_migrations
+
+        run_migrations()
+    _print_summary(LogImporter.run(
+        args.paths,
+        source=args.source,
+        service=args.service,
+        workers=args.workers,
+        chunk_mb=args.chunk_mb,
+        dump_dir=args.keep_dump,
+        load=not args.dry_run,
+    ))
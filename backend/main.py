@@ -1,13 +1,31 @@
-from fastapi import FastAPI, HTTPException, Depends, Query, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Query, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 import models
 import schemas
-from database import engine, get_db
+from database import engine, get_db, get_read_db, pool_stats, run_migrations, DB_AUTO_MIGRATE
 from alert_service import AlertService
+from stats_service import StatsService
+from rollup_service import RollupService, trend_score
+from partition_service import PartitionService
+from retention_service import RetentionService
+from archive_service import ArchiveService
+from async_database import async_endpoint, dispose_async_engines
+from job_service import JobService
+from ingest_service import IngestService
+from embedded_service import EmbeddedService, QueueFullError
+from edge_service import EdgeService
+from bulk_service import BulkService
+from pagination import apply_keyset, next_cursor
+from counting import count_total, DEFAULT_TOTAL_MODE
+from search_service import SearchService
+from metadata_service import MetadataService
+from export_service import ExportService, EXPORT_FORMATS
+from fast_json import FastJSONResponse
+from cache_service import response_cache, cached_json_response, CACHE_INVALIDATE_ON_INGEST
 import uvicorn
 import logging
 
@@ -15,8 +33,9 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+# Criar/atualizar o esquema via migrações (Alembic)
+if DB_AUTO_MIGRATE:
+    run_migrations()
 
 app = FastAPI(
     title="Error Dashboard API",
@@ -26,6 +45,44 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+
+
+@app.on_event("startup")
+def start_partition_maintenance():
+    """Mantém as partições futuras de error_logs criadas (somente Postgres particionado)"""
+    PartitionService.start_maintenance()
+
+
+@app.on_event("startup")
+def start_retention():
+    """Aplica as políticas de retenção periodicamente (se configuradas)"""
+    RetentionService.start_background()
+
+
+@app.on_event("startup")
+def start_cold_archive():
+    """Move periodicamente os erros antigos para o arquivo Parquet (se configurado)"""
+    ArchiveService.start_background()
+
+
+@app.on_event("startup")
+def start_job_resume():
+    """Retoma jobs em segundo plano interrompidos (ex: reinício da API)"""
+    JobService.start_background()
+
+
+@app.on_event("startup")
+def start_edge_forwarding():
+    """Modo embarcado: encaminha os grupos ao servidor central (se configurado)"""
+    EmbeddedService.start_forwarding()
+
+
+@app.on_event("shutdown")
+async def close_async_engines():
+    """Fecha os pools do modo DB_ASYNC"""
+    await dispose_async_engines()
+
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -53,9 +110,27 @@ def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
 
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    """Estatísticas do cache de respostas (taxa de acerto, entradas e memória)"""
+    return response_cache.stats()
+
+
+@app.get("/api/db/pool")
+def get_pool_stats():
+    """
+    Estado dos pools de conexão (primário e réplica de leitura)
+    
+    Espera de checkout (média e máxima), checkouts lentos (acima de
+    DB_POOL_SLOW_CHECKOUT_MS) e timeouts indicam pool perto de esgotar.
+    """
+    return pool_stats()
+
+
 # ==================== ERROR LOGS ENDPOINTS ====================
 
 @app.post("/api/errors", response_model=schemas.ErrorLogResponse, status_code=201)
+@async_endpoint
 def create_error_log(
     error: schemas.ErrorLogCreate, 
     background_tasks: BackgroundTasks,
@@ -75,59 +150,70 @@ def create_error_log(
     - **status_code**: Código de status HTTP (opcional)
     - **error_metadata**: Dados adicionais em JSON (opcional)
     """
-    # Gerar fingerprint para agrupar erros similares
-    fingerprint = models.generate_fingerprint(
-        error_type=error.error_type.value,
-        message=error.message,
-        endpoint=error.endpoint,
-        stack_trace=error.stack_trace
-    )
-    
-    # Verificar se já existe um grupo com este fingerprint
-    error_group = db.query(models.ErrorGroup).filter(
-        models.ErrorGroup.fingerprint == fingerprint
-    ).first()
-    
-    if error_group:
-        # Atualizar grupo existente
-        error_group.total_occurrences += 1
-        error_group.last_seen = datetime.utcnow()
-        # Atualizar severidade se o novo erro for mais severo
-        severity_order = {"LOW": 1, "MEDIUM": 2, "HIGH": 3, "CRITICAL": 4}
-        if severity_order[error.severity.value] > severity_order[error_group.severity.value]:
-            error_group.severity = error.severity
+    if EmbeddedService.enabled():
+        # Modo embarcado: o escritor único grava o erro num lote e devolve após o commit
+        try:
+            db_error = EmbeddedService.submit(error)
+        except QueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
     else:
-        # Criar novo grupo
-        error_group = models.ErrorGroup(
-            fingerprint=fingerprint,
-            message_pattern=error.message,
-            error_type=error.error_type,
-            severity=error.severity,
-            source=error.source,
-            total_occurrences=1
-        )
-        db.add(error_group)
-        db.flush()  # Para obter o ID do grupo
+        db_error = IngestService.record(db, [error])[0]
+        db.commit()
+        db.refresh(db_error)
     
-    # Criar o erro e associar ao grupo
-    db_error = models.ErrorLog(**error.model_dump())
-    db_error.group_id = error_group.id
-    db.add(db_error)
-    db.commit()
-    db.refresh(db_error)
+    if CACHE_INVALIDATE_ON_INGEST:
+        response_cache.invalidate("stats", "groups")
     
     # Verificar alertas em background
-    background_tasks.add_task(AlertService.check_and_trigger_alerts, db, db_error)
+    background_tasks.add_task(AlertService.check_error, db_error.id)
     
-    logger.info(f"Erro criado: ID={db_error.id}, Grupo={error_group.id}, Fingerprint={fingerprint[:16]}...")
+    logger.info(f"Erro criado: ID={db_error.id}, Grupo={db_error.group_id}")
     
     return db_error
 
 
+def _parse_error_fields(fields: Optional[str]) -> List[str]:
+    """Campos pedidos em `fields` (separados por vírgula); `all` retorna todos"""
+    available = [name for name in schemas.ErrorLogListItem.model_fields if name != "search_highlight"]
+    if not fields:
+        return list(schemas.ERROR_LOG_LIST_DEFAULT_FIELDS)
+    if fields.strip() == "all":
+        return available
+    selected = ["id"]
+    for name in (part.strip() for part in fields.split(",")):
+        if not name or name in selected:
+            continue
+        if name not in available:
+            raise HTTPException(status_code=400, detail=f"Campo inválido em fields: {name}")
+        selected.append(name)
+    return selected
+
+
+def _filter_error_logs(query, error_type, severity, source, status, start_date, end_date, metadata_filters):
+    """Filtros comuns da listagem e da exportação de erros"""
+    if error_type:
+        query = query.filter(models.ErrorLog.error_type == error_type)
+    if severity:
+        query = query.filter(models.ErrorLog.severity == severity)
+    if source:
+        query = query.filter(models.ErrorLog.source == source)
+    if status:
+        query = query.filter(models.ErrorLog.status == status)
+    if start_date:
+        query = query.filter(models.ErrorLog.timestamp >= start_date)
+    if end_date:
+        query = query.filter(models.ErrorLog.timestamp <= end_date)
+    return MetadataService.apply(query, metadata_filters)
+
+
 @app.get("/api/errors", response_model=schemas.ErrorLogListResponse)
+@async_endpoint
 def get_error_logs(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor retornado em next_cursor (ignora skip)"),
+    total_mode: Optional[str] = Query(None, pattern="^(exact|estimate|capped)$", description="Como calcular total"),
     error_type: Optional[str] = None,
     severity: Optional[str] = None,
     source: Optional[str] = None,
@@ -135,7 +221,10 @@ def get_error_logs(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    search_mode: str = Query("fulltext", pattern="^(fulltext|substring)$"),
+    sort: str = Query("timestamp", pattern="^(timestamp|relevance)$"),
+    fields: Optional[str] = Query(None, description="Campos de cada erro, separados por vírgula, ou `all`"),
+    db: Session = Depends(get_read_db)
 ):
     """
     Lista logs de erros com filtros opcionais
@@ -148,37 +237,144 @@ def get_error_logs(
     - **start_date**: Data inicial
     - **end_date**: Data final
     - **search**: Busca por texto na mensagem ou stack trace
-    """
-    query = db.query(models.ErrorLog)
+    - **meta.<chave>**: Valor de uma chave de error_metadata (ex: `meta.environment=production`);
+      repita o parâmetro para combinar valores com OU
+    - **search_mode**: `fulltext` (índice de texto, casa prefixos de palavras) ou
+      `substring` (trechos/identificadores, acelerado por trigramas no Postgres)
+    - **sort**: `timestamp` (padrão) ou `relevance` (apenas com busca fulltext; usa skip)
     
-    # Apply filters
-    if error_type:
-        query = query.filter(models.ErrorLog.error_type == error_type)
-    if severity:
-        query = query.filter(models.ErrorLog.severity == severity)
-    if source:
-        query = query.filter(models.ErrorLog.source == source)
-    if status:
-        query = query.filter(models.ErrorLog.status == status)
-    if start_date:
-        query = query.filter(models.ErrorLog.timestamp >= start_date)
-    if end_date:
-        query = query.filter(models.ErrorLog.timestamp <= end_date)
+    Com busca, cada erro traz `search_highlight` com o trecho encontrado em `<mark>`.
+    
+    Paginação: use `cursor` com o `next_cursor` da página anterior (custo constante
+    em qualquer profundidade); `skip` continua disponível por compatibilidade.
+    
+    Total: `total_mode=exact` (COUNT completo), `estimate` (estatísticas do planner) ou
+    `capped` (conta até 10.000; `total_is_exact=false` indica "10.000+").
+    O padrão vem de LIST_TOTAL_MODE.
+    
+    Campos: por padrão cada erro traz apenas as colunas da tabela (sem stack_trace,
+    user_agent, error_metadata...), que nem são lidas do banco. Use `fields=id,message,stack_trace`
+    para escolher os campos ou `fields=all` para o payload completo, disponível
+    também em `/api/errors/{id}`.
+    """
+    selected = _parse_error_fields(fields)
+    try:
+        metadata_filters = MetadataService.parse_filters(request.query_params.multi_items())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    query = _filter_error_logs(
+        db.query(models.ErrorLog), error_type, severity, source, status, start_date, end_date, metadata_filters
+    )
+    rank = None
     if search:
-        query = query.filter(
-            (models.ErrorLog.message.ilike(f"%{search}%")) |
-            (models.ErrorLog.stack_trace.ilike(f"%{search}%"))
-        )
+        query, rank = SearchService.apply(query, search, search_mode)
     
-    total = query.count()
-    errors = query.order_by(models.ErrorLog.timestamp.desc()).offset(skip).limit(limit).all()
+    total, total_is_exact = count_total(query, total_mode)
+    if sort == "relevance" and rank is not None:
+        if cursor:
+            raise HTTPException(status_code=400, detail="sort=relevance não suporta cursor; use skip")
+        query = query.order_by(
+            rank.desc(), models.ErrorLog.timestamp.desc(), models.ErrorLog.id.desc()
+        ).offset(skip)
+    else:
+        try:
+            query = apply_keyset(query, models.ErrorLog.timestamp, models.ErrorLog.id, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if not cursor:
+            query = query.offset(skip)
+    # Apenas as colunas pedidas (+ timestamp para o cursor), como tuplas: sem objetos ORM
+    columns = [getattr(models.ErrorLog, name) for name in selected]
+    if "timestamp" not in selected:
+        columns.append(models.ErrorLog.timestamp)
+    rows = query.with_entities(*columns).limit(limit).all()
     
-    return {
+    items = [dict(zip(selected, row)) for row in rows]
+    if search:
+        highlights = SearchService.highlights(db, [item["id"] for item in items], search, search_mode)
+        for item in items:
+            item["search_highlight"] = highlights.get(item["id"])
+    
+    return FastJSONResponse({
         "total": total,
+        "total_is_exact": total_is_exact,
         "skip": skip,
         "limit": limit,
-        "errors": errors
-    }
+        "next_cursor": None if sort == "relevance" and rank is not None else next_cursor(rows, limit, "timestamp"),
+        "errors": items
+    })
+
+
+@app.get("/api/errors/export")
+def export_error_logs(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$"),
+    fields: Optional[str] = Query(None, description="Campos exportados, separados por vírgula (padrão: todos)"),
+    error_type: Optional[str] = None,
+    severity: Optional[str] = None,
+    source: Optional[str] = None,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    search: Optional[str] = None,
+    search_mode: str = Query("fulltext", pattern="^(fulltext|substring)$"),
+    limit: Optional[int] = Query(None, ge=1, description="Máximo de linhas exportadas"),
+):
+    """
+    Exporta os erros filtrados em streaming (NDJSON, CSV ou Parquet)
+    
+    Aceita os mesmos filtros de `/api/errors` (incluindo `meta.<chave>`), sem
+    paginação nem contagem: o resultado inteiro é lido com cursor do lado do
+    servidor e escrito em lotes, com memória constante. Ordem: timestamp DESC, id DESC.
+    
+    Parquet requer pyarrow instalado no servidor (um row group por lote).
+    """
+    selected = _parse_error_fields(fields or "all")
+    try:
+        metadata_filters = MetadataService.parse_filters(request.query_params.multi_items())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if format == "parquet" and not ExportService.parquet_available():
+        raise HTTPException(status_code=400, detail="Exportação Parquet requer pyarrow instalado no servidor")
+    
+    def build_query(session: Session):
+        query = _filter_error_logs(
+            session.query(models.ErrorLog), error_type, severity, source, status, start_date, end_date, metadata_filters
+        )
+        if search:
+            query, _ = SearchService.apply(query, search, search_mode)
+        query = query.order_by(models.ErrorLog.timestamp.desc(), models.ErrorLog.id.desc())
+        if limit:
+            query = query.limit(limit)
+        return query.with_entities(*(getattr(models.ErrorLog, name) for name in selected))
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"errors-{datetime.utcnow():%Y%m%d-%H%M%S}.{extension}"
+    return StreamingResponse(
+        ExportService.stream(build_query, selected, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.post("/api/errors/bulk", response_model=schemas.BulkUpdateResponse)
+def bulk_update_error_logs(request: schemas.ErrorLogBulkUpdate, response: Response, db: Session = Depends(get_db)):
+    """
+    Atualiza vários erros de uma vez (status, atribuição, notas)
+    
+    A seleção é `ids` e/ou `filter` (combinados com E); `update` tem os mesmos
+    campos do PATCH. Até BULK_INLINE_MAX_ROWS erros, um único UPDATE na
+    transação da requisição; acima disso, um job em lotes (resposta 202 com
+    `job`, acompanhe em `GET /api/jobs/{id}`).
+    """
+    try:
+        result = BulkService.update_errors(db, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result["job"]:
+        response.status_code = 202
+    response_cache.invalidate("stats")
+    return result
 
 
 @app.get("/api/errors/{error_id}", response_model=schemas.ErrorLogResponse)
@@ -213,6 +409,7 @@ def update_error_log(error_id: int, update: schemas.ErrorLogUpdate, db: Session
     
     db.commit()
     db.refresh(error)
+    response_cache.invalidate("stats")
     return error
 
 
@@ -223,17 +420,23 @@ def delete_error_log(error_id: int, db: Session = Depends(get_db)):
     if not error:
         raise HTTPException(status_code=404, detail="Error log not found")
     
+    if error.group_id:
+        RollupService.record(db, error.group_id, error.timestamp, delta=-1)
     db.delete(error)
     db.commit()
+    response_cache.invalidate("stats")
     return None
 
 
 # ==================== STATISTICS ENDPOINTS ====================
 
 @app.get("/api/stats/summary", response_model=schemas.StatsSummary)
+@async_endpoint
 def get_stats_summary(
-    days: int = Query(7, ge=1, le=365),
-    db: Session = Depends(get_db)
+    request: Request,
+    days: int = Query(7, ge=1, le=730),
+    facets: Optional[str] = Query(None, description="Chaves de error_metadata para facetas, separadas por vírgula"),
+    db: Session = Depends(get_read_db)
 ):
     """
     Obtém resumo estatístico dos erros
@@ -244,178 +447,282 @@ def get_stats_summary(
     - **by_source**: Distribuição por origem
     - **by_status**: Distribuição por status
     - **error_rate**: Taxa de erros por dia
+    - **facets**: Com `facets=environment,release`, valores mais frequentes de cada chave
+    
+    A resposta é cacheada por alguns segundos e suporta ETag / If-None-Match.
     """
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    # Total errors
-    total_errors = db.query(models.ErrorLog).filter(
-        models.ErrorLog.timestamp >= start_date
-    ).count()
-    
-    # By severity
-    by_severity = {}
-    for severity in ["LOW", "MEDIUM", "HIGH", "CRITICAL"]:
-        count = db.query(models.ErrorLog).filter(
-            models.ErrorLog.timestamp >= start_date,
-            models.ErrorLog.severity == severity
-        ).count()
-        by_severity[severity] = count
-    
-    # By type
-    by_type = {}
-    for error_type in ["HTTP", "DATABASE", "AUTH", "VALIDATION", "PERFORMANCE", "INTEGRATION", "APPLICATION", "FRONTEND"]:
-        count = db.query(models.ErrorLog).filter(
-            models.ErrorLog.timestamp >= start_date,
-            models.ErrorLog.error_type == error_type
-        ).count()
-        by_type[error_type] = count
-    
-    # By source
-    by_source = {}
-    for source in ["frontend", "backend", "database", "api", "external_service"]:
-        count = db.query(models.ErrorLog).filter(
-            models.ErrorLog.timestamp >= start_date,
-            models.ErrorLog.source == source
-        ).count()
-        by_source[source] = count
-    
-    # By status
-    by_status = {}
-    for status in ["OPEN", "IN_PROGRESS", "RESOLVED", "IGNORED"]:
-        count = db.query(models.ErrorLog).filter(
-            models.ErrorLog.timestamp >= start_date,
-            models.ErrorLog.status == status
-        ).count()
-        by_status[status] = count
-    
-    # Error rate per day
-    error_rate = round(total_errors / days, 2) if days > 0 else 0
+    facet_keys = [key.strip() for key in facets.split(",") if key.strip()] if facets else []
     
-    return {
-        "total_errors": total_errors,
-        "by_severity": by_severity,
-        "by_type": by_type,
-        "by_source": by_source,
-        "by_status": by_status,
-        "error_rate": error_rate,
-        "period_days": days
-    }
+    def compute():
+        summary = StatsService.summary(db, days)
+        if facet_keys:
+            summary["facets"] = MetadataService.facets(db, facet_keys, days=days)
+        return summary
+    
+    try:
+        return cached_json_response(request, "stats", {"days": days, "facets": ",".join(facet_keys) or None}, compute)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.get("/api/stats/timeline")
-def get_timeline_stats(
+@app.get("/api/stats/facets")
+@async_endpoint
+def get_metadata_facets(
+    request: Request,
+    keys: Optional[str] = Query(None, description="Chaves de error_metadata separadas por vírgula (padrão: chaves promovidas)"),
     days: int = Query(7, ge=1, le=365),
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_read_db)
 ):
-    """Obtém dados de timeline de erros por dia"""
-    from sqlalchemy import func, cast, Date
+    """
+    Valores mais frequentes das chaves de error_metadata no período
     
-    start_date = datetime.utcnow() - timedelta(days=days)
+    Aceita os mesmos filtros `meta.<chave>=<valor>` de `/api/errors` para detalhar
+    (ex: `keys=server&meta.environment=production`).
+    """
+    facet_keys = [key.strip() for key in keys.split(",") if key.strip()] if keys else list(models.METADATA_HOT_KEYS)
+    try:
+        filters = MetadataService.parse_filters(request.query_params.multi_items())
+        params = {
+            "keys": ",".join(facet_keys), "days": days, "limit": limit,
+            **{f"meta.{key}": ",".join(values) for key, values in sorted(filters.items())},
+        }
+        return cached_json_response(
+            request, "stats", params,
+            lambda: {"days": days, "facets": MetadataService.facets(db, facet_keys, days=days, limit=limit, filters=filters)}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/stats/dashboard")
+@async_endpoint
+def get_dashboard_stats(
+    request: Request,
+    days: int = Query(7, ge=1, le=730),
+    interval: str = Query("day", pattern="^(minute|5m|hour|day)$"),
+    top_limit: int = Query(5, ge=1, le=50),
+):
+    """
+    Obtém resumo, timeline e top erros em uma única requisição
     
-    results = db.query(
-        cast(models.ErrorLog.timestamp, Date).label('date'),
-        func.count(models.ErrorLog.id).label('count')
-    ).filter(
-        models.ErrorLog.timestamp >= start_date
-    ).group_by(
-        cast(models.ErrorLog.timestamp, Date)
-    ).order_by('date').all()
+    Mesmo formato de `/api/stats/summary`, `/api/stats/timeline` e `/api/stats/top-errors`,
+    nas chaves `summary`, `timeline` e `top_errors`. As consultas rodam em paralelo.
+    """
+    params = {"days": days, "interval": interval, "top_limit": top_limit}
+    try:
+        return cached_json_response(
+            request, "stats", params,
+            lambda: StatsService.dashboard(days=days, interval=interval, top_limit=top_limit)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/stats/timeline")
+@async_endpoint
+def get_timeline_stats(
+    request: Request,
+    days: int = Query(7, ge=1, le=730),
+    hours: Optional[int] = Query(None, ge=1, le=24 * 365, description="Período em horas (sobrepõe days)"),
+    interval: str = Query("day", pattern="^(minute|5m|hour|day)$"),
+    split_by: Optional[str] = Query(None, pattern="^(severity|type)$"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Obtém a timeline de erros em formato colunar
     
-    timeline_data = [
-        {"date": str(result.date), "count": result.count}
-        for result in results
-    ]
+    - **interval**: minute, 5m, hour ou day
+    - **split_by**: severity ou type para séries separadas (opcional)
+    - **hours**: período em horas, útil durante incidentes (opcional)
     
-    return {"timeline": timeline_data}
+    Resposta: `buckets` (início de cada bucket, UTC) e `series` com arrays paralelos
+    de contagens; buckets sem erros vêm preenchidos com 0.
+    """
+    params = {"days": days, "hours": hours, "interval": interval, "split_by": split_by}
+    try:
+        return cached_json_response(
+            request, "stats", params,
+            lambda: StatsService.timeline(db, days=days, interval=interval, split_by=split_by, hours=hours)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/api/stats/top-errors")
+@async_endpoint
 def get_top_errors(
+    request: Request,
     limit: int = Query(10, ge=1, le=50),
-    days: int = Query(7, ge=1, le=365),
-    db: Session = Depends(get_db)
+    days: int = Query(7, ge=1, le=730),
+    db: Session = Depends(get_read_db)
 ):
-    """Obtém os erros mais frequentes"""
-    from sqlalchemy import func
-    
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    results = db.query(
-        models.ErrorLog.message,
-        models.ErrorLog.error_type,
-        func.count(models.ErrorLog.id).label('count')
-    ).filter(
-        models.ErrorLog.timestamp >= start_date
-    ).group_by(
-        models.ErrorLog.message,
-        models.ErrorLog.error_type
-    ).order_by(
-        func.count(models.ErrorLog.id).desc()
-    ).limit(limit).all()
-    
-    top_errors = [
-        {
-            "message": result.message,
-            "error_type": result.error_type,
-            "count": result.count
-        }
-        for result in results
-    ]
+    """
+    Obtém os grupos de erros mais frequentes no período
     
-    return {"top_errors": top_errors}
+    Calculado a partir do rollup horário por grupo (error_group_rollups), então o custo
+    depende do número de grupos e não do número de erros. A janela é alinhada à hora.
+    """
+    return cached_json_response(
+        request, "stats", {"limit": limit, "days": days},
+        lambda: {"top_errors": RollupService.top_groups(db, limit=limit, days=days)}
+    )
 
 
 # ==================== ERROR GROUPS ENDPOINTS ====================
 
+# Campos de ErrorGroupResponse que são colunas de error_groups (os demais são calculados)
+GROUP_COLUMN_FIELDS = [
+    name for name in schemas.ErrorGroupResponse.model_fields if name in models.ErrorGroup.__table__.c
+]
+
+
 @app.get("/api/groups", response_model=schemas.ErrorGroupListResponse)
+@async_endpoint
 def get_error_groups(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor retornado em next_cursor (ignora skip)"),
+    total_mode: Optional[str] = Query(None, pattern="^(exact|estimate|capped)$", description="Como calcular total"),
     error_type: Optional[str] = None,
     severity: Optional[str] = None,
     source: Optional[str] = None,
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    sort: str = Query("last_seen", pattern="^(last_seen|trending)$"),
+    sparklines: bool = Query(True, description="Incluir sparkline_hourly e sparkline_daily"),
+    db: Session = Depends(get_read_db)
 ):
     """
     Lista grupos de erros com filtros opcionais
     
     Grupos são criados automaticamente usando fingerprinting para agrupar erros similares
-    """
-    query = db.query(models.ErrorGroup)
     
-    # Apply filters
-    if error_type:
-        query = query.filter(models.ErrorGroup.error_type == error_type)
-    if severity:
-        query = query.filter(models.ErrorGroup.severity == severity)
-    if source:
-        query = query.filter(models.ErrorGroup.source == source)
-    if status:
-        query = query.filter(models.ErrorGroup.status == status)
+    - **sort**: `last_seen` (padrão) ou `trending` — grupos com ocorrências nas últimas 24h,
+      ordenados por `trend_score` (excesso sobre a média dos 7 dias anteriores); usa skip
+    - **sparklines**: séries por hora (24) e por dia (30), lidas do rollup por grupo
+    """
+    if sort == "trending" and cursor:
+        raise HTTPException(status_code=400, detail="sort=trending não suporta cursor; use skip")
     
-    total = query.count()
-    groups = query.order_by(models.ErrorGroup.last_seen.desc()).offset(skip).limit(limit).all()
+    def compute():
+        query = db.query(models.ErrorGroup).filter(models.ErrorGroup.deleted_at.is_(None))
+        
+        # Apply filters
+        if error_type:
+            query = query.filter(models.ErrorGroup.error_type == error_type)
+        if severity:
+            query = query.filter(models.ErrorGroup.severity == severity)
+        if source:
+            query = query.filter(models.ErrorGroup.source == source)
+        if status:
+            query = query.filter(models.ErrorGroup.status == status)
+        
+        columns = [getattr(models.ErrorGroup, name) for name in GROUP_COLUMN_FIELDS]
+        
+        if sort == "trending":
+            # Uma linha por grupo ativo, lida do rollup; ordenação pelo score em memória
+            trend = RollupService.trend_totals(db)
+            rows = query.join(trend, models.ErrorGroup.id == trend.c.group_id).with_entities(
+                *columns, trend.c.recent, trend.c.baseline
+            ).all()
+            ranked = sorted(
+                ((row, trend_score(int(row.recent), int(row.baseline))) for row in rows),
+                key=lambda item: (-item[1], -item[0].id)
+            )
+            total, total_is_exact = len(ranked), True
+            groups = []
+            for row, score in ranked[skip:skip + limit]:
+                group = dict(zip(GROUP_COLUMN_FIELDS, row))
+                group["trend_score"] = score
+                groups.append(group)
+            cursor_value = None
+        else:
+            total, total_is_exact = count_total(query, total_mode)
+            query = apply_keyset(query, models.ErrorGroup.last_seen, models.ErrorGroup.id, cursor)
+            if not cursor:
+                query = query.offset(skip)
+            rows = query.with_entities(*columns).limit(limit).all()
+            groups = [dict(zip(GROUP_COLUMN_FIELDS, row)) for row in rows]
+            cursor_value = next_cursor(rows, limit, "last_seen")
+        
+        if sparklines:
+            series = RollupService.sparklines(db, [group["id"] for group in groups])
+            for group in groups:
+                group["sparkline_hourly"] = series[group["id"]]["hourly"]
+                group["sparkline_daily"] = series[group["id"]]["daily"]
+        
+        return {
+            "total": total,
+            "total_is_exact": total_is_exact,
+            "skip": skip,
+            "limit": limit,
+            "next_cursor": cursor_value,
+            "groups": groups
+        }
     
-    return {
-        "total": total,
-        "skip": skip,
-        "limit": limit,
-        "groups": groups
+    params = {
+        "skip": skip, "limit": limit, "cursor": cursor, "total_mode": total_mode or DEFAULT_TOTAL_MODE,
+        "error_type": error_type,
+        "severity": severity, "source": source, "status": status,
+        "sort": sort, "sparklines": sparklines
     }
+    try:
+        return cached_json_response(request, "groups", params, compute)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/groups/bulk", response_model=schemas.BulkUpdateResponse)
+def bulk_update_error_groups(request: schemas.ErrorGroupBulkUpdate, response: Response, db: Session = Depends(get_db)):
+    """
+    Atualiza vários grupos de uma vez (status, atribuição, notas)
+    
+    A seleção é `ids` e/ou `filter` (combinados com E), até 10000 grupos; os
+    grupos são atualizados numa transação. Se o status mudou, ele é propagado
+    aos erros dos grupos na mesma transação (até BULK_INLINE_MAX_ROWS erros,
+    em `errors_updated`) ou por um job em lotes (resposta 202 com `job`).
+    """
+    try:
+        result = BulkService.update_groups(db, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result["job"]:
+        response.status_code = 202
+    response_cache.invalidate("stats", "groups")
+    return result
 
 
 @app.get("/api/groups/{group_id}", response_model=schemas.ErrorGroupDetailResponse)
-def get_error_group(group_id: int, db: Session = Depends(get_db)):
-    """Obtém detalhes de um grupo de erros incluindo erros recentes"""
-    group = db.query(models.ErrorGroup).filter(models.ErrorGroup.id == group_id).first()
+def get_error_group(
+    group_id: int,
+    days: Optional[int] = Query(None, ge=1, le=365, description="Janela para usuários/sessões afetados"),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtém detalhes de um grupo de erros incluindo erros recentes
+    
+    `affected_users`/`affected_sessions` são estimativas (HyperLogLog) de todo o histórico;
+    com `days`, os campos `window_*` trazem a estimativa apenas para a janela.
+    """
+    group = db.query(models.ErrorGroup).filter(
+        models.ErrorGroup.id == group_id, models.ErrorGroup.deleted_at.is_(None)
+    ).first()
     if not group:
         raise HTTPException(status_code=404, detail="Error group not found")
     
-    # Buscar erros recentes deste grupo (últimos 10)
-    recent_errors = db.query(models.ErrorLog).filter(
-        models.ErrorLog.group_id == group_id
-    ).order_by(models.ErrorLog.timestamp.desc()).limit(10).all()
+    # Buscar erros recentes deste grupo (últimos 10), limitados ao período que
+    # o rollup indica conter essas ocorrências (descarta partições antigas)
+    recent_query = db.query(models.ErrorLog).filter(models.ErrorLog.group_id == group_id)
+    window_start = RollupService.recent_window_start(db, group_id, 10)
+    if window_start is not None:
+        recent_query = recent_query.filter(models.ErrorLog.timestamp >= window_start)
+    recent_errors = recent_query.order_by(models.ErrorLog.timestamp.desc()).limit(10).all()
+    if window_start is not None and len(recent_errors) < 10:
+        # Rollup adiantado em relação aos erros (ex: timestamps informados na importação)
+        recent_errors = db.query(models.ErrorLog).filter(
+            models.ErrorLog.group_id == group_id
+        ).order_by(models.ErrorLog.timestamp.desc()).limit(10).all()
     
     # Converter para dict e adicionar erros recentes
     group_dict = {
@@ -426,6 +733,8 @@ def get_error_group(group_id: int, db: Session = Depends(get_db)):
         "severity": group.severity,
         "source": group.source,
         "total_occurrences": group.total_occurrences,
+        "affected_users": group.affected_users,
+        "affected_sessions": group.affected_sessions,
         "first_seen": group.first_seen,
         "last_seen": group.last_seen,
         "status": group.status,
@@ -434,10 +743,23 @@ def get_error_group(group_id: int, db: Session = Depends(get_db)):
         "recent_errors": recent_errors
     }
     
+    series = RollupService.sparklines(db, [group_id])[group_id]
+    group_dict["sparkline_hourly"] = series["hourly"]
+    group_dict["sparkline_daily"] = series["daily"]
+    trend = RollupService.trend_totals(db, group_id)
+    totals = db.query(trend.c.recent, trend.c.baseline).first()
+    group_dict["trend_score"] = trend_score(int(totals.recent), int(totals.baseline)) if totals else None
+    
+    if days:
+        window = RollupService.affected_in_window(db, group_id, days)
+        group_dict["window_days"] = days
+        group_dict["window_affected_users"] = window["affected_users"]
+        group_dict["window_affected_sessions"] = window["affected_sessions"]
+    
     return group_dict
 
 
-@app.patch("/api/groups/{group_id}", response_model=schemas.ErrorGroupResponse)
+@app.patch("/api/groups/{group_id}", response_model=schemas.ErrorGroupUpdateResponse)
 def update_error_group(
     group_id: int, 
     update: schemas.ErrorGroupUpdate, 
@@ -446,9 +768,14 @@ def update_error_group(
     """
     Atualiza um grupo de erros (status, atribuição, notas)
     
-    Ao atualizar o status de um grupo, todos os erros do grupo também são atualizados
+    O grupo é atualizado na hora. Se o status mudou, ele é propagado aos erros
+    do grupo na mesma transação (até BULK_INLINE_MAX_ROWS erros) ou por um job
+    em segundo plano, em lotes; a resposta traz o job em `job` (acompanhe em
+    `GET /api/jobs/{id}`).
     """
-    group = db.query(models.ErrorGroup).filter(models.ErrorGroup.id == group_id).first()
+    group = db.query(models.ErrorGroup).filter(
+        models.ErrorGroup.id == group_id, models.ErrorGroup.deleted_at.is_(None)
+    ).first()
     if not group:
         raise HTTPException(status_code=404, detail="Error group not found")
     
@@ -457,33 +784,110 @@ def update_error_group(
     for key, value in update_data.items():
         setattr(group, key, value)
     
-    # Se o status mudou, atualizar todos os erros do grupo
-    if "status" in update_data:
-        db.query(models.ErrorLog).filter(
-            models.ErrorLog.group_id == group_id
-        ).update({"status": update_data["status"]})
+    # Se o status mudou, atualizar os erros do grupo (na hora ou em segundo plano)
+    job = None
+    if update_data.get("status") is not None:
+        _, job = BulkService.propagate_group_status(db, [group_id], update_data["status"])
     
     db.commit()
+    if job:
+        JobService.submit(job.id)
+        db.refresh(job)
     db.refresh(group)
-    return group
+    response_cache.invalidate("stats", "groups")
+    response = schemas.ErrorGroupUpdateResponse.model_validate(group)
+    response.job = job and schemas.JobResponse.model_validate(job)
+    return response
 
 
-@app.delete("/api/groups/{group_id}", status_code=204)
+@app.delete("/api/groups/{group_id}", response_model=schemas.JobResponse, status_code=202)
 def delete_error_group(group_id: int, db: Session = Depends(get_db)):
     """
     Deleta um grupo de erros e todos os erros associados
+    
+    O grupo some das consultas na hora e o fingerprint é liberado (novos erros
+    iguais criam outro grupo). Os erros, rollups e o grupo são removidos por um
+    job em segundo plano, retornado na resposta (202).
     """
-    group = db.query(models.ErrorGroup).filter(models.ErrorGroup.id == group_id).first()
+    group = db.query(models.ErrorGroup).filter(
+        models.ErrorGroup.id == group_id, models.ErrorGroup.deleted_at.is_(None)
+    ).first()
     if not group:
         raise HTTPException(status_code=404, detail="Error group not found")
     
-    # Deletar todos os erros do grupo
-    db.query(models.ErrorLog).filter(models.ErrorLog.group_id == group_id).delete()
+    JobService.cancel_group_jobs(db, [group_id])
+    job = JobService.create(db, "group_delete", {"group_id": group_id, "fingerprint": group.fingerprint})
+    group.deleted_at = datetime.utcnow()
+    group.fingerprint = f"deleted:{group_id}"
     
-    # Deletar o grupo
-    db.delete(group)
     db.commit()
-    return None
+    JobService.submit(job.id)
+    db.refresh(job)
+    response_cache.invalidate("stats", "groups")
+    return job
+
+
+# ==================== EDGE ENDPOINTS ====================
+
+@app.post("/api/edge/groups", response_model=schemas.EdgeGroupBatchResponse)
+def receive_edge_groups(batch: schemas.EdgeGroupBatch, db: Session = Depends(get_db)):
+    """
+    Recebe os grupos agregados de um coletor de borda (modo embarcado)
+    
+    Cada grupo traz a contagem acumulada no coletor; só a diferença para o
+    último envio do mesmo coletor é somada ao grupo e ao rollup. Reenviar um
+    lote é seguro.
+    """
+    result = EdgeService.merge(db, batch.edge_id, batch.groups)
+    db.commit()
+    if result["created"] or result["updated"]:
+        response_cache.invalidate("stats", "groups")
+    return result
+
+
+# ==================== JOBS ENDPOINTS ====================
+
+@app.get("/api/jobs", response_model=schemas.JobListResponse)
+def get_jobs(
+    status: Optional[models.JobStatus] = None,
+    kind: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """Lista os jobs em segundo plano (mais recentes primeiro)"""
+    query = db.query(models.BackgroundJob)
+    if status:
+        query = query.filter(models.BackgroundJob.status == status)
+    if kind:
+        query = query.filter(models.BackgroundJob.kind == kind)
+    jobs = query.order_by(models.BackgroundJob.created_at.desc(), models.BackgroundJob.id.desc()).limit(limit).all()
+    return {"total": len(jobs), "jobs": jobs}
+
+
+@app.get("/api/jobs/{job_id}", response_model=schemas.JobResponse)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    """Estado e progresso de um job"""
+    job = db.get(models.BackgroundJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/api/jobs/{job_id}/cancel", response_model=schemas.JobResponse)
+def cancel_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Cancela um job
+    
+    Na fila: cancelado na hora. Em execução: para após o lote atual (os lotes
+    já aplicados permanecem). Cancelar uma exclusão de grupo torna o grupo
+    visível de novo.
+    """
+    job = db.get(models.BackgroundJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status not in (models.JobStatus.QUEUED, models.JobStatus.RUNNING):
+        raise HTTPException(status_code=409, detail=f"Job already {job.status.value}")
+    return JobService.cancel(db, job)
 
 
 # ==================== ALERT RULES ENDPOINTS ====================
@@ -598,13 +1002,16 @@ def toggle_alert_rule(rule_id: int, db: Session = Depends(get_db)):
 # ==================== NOTIFICATION LOGS ENDPOINTS ====================
 
 @app.get("/api/notifications", response_model=schemas.NotificationLogListResponse)
+@async_endpoint
 def get_notification_logs(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor retornado em next_cursor (ignora skip)"),
+    total_mode: Optional[str] = Query(None, pattern="^(exact|estimate|capped)$", description="Como calcular total"),
     alert_rule_id: Optional[int] = None,
     channel: Optional[str] = None,
     success_only: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Lista logs de notificações enviadas"""
     query = db.query(models.NotificationLog)
@@ -616,15 +1023,24 @@ def get_notification_logs(
     if success_only is not None:
         query = query.filter(models.NotificationLog.sent_successfully == success_only)
     
-    total = query.count()
-    notifications = query.order_by(models.NotificationLog.sent_at.desc()).offset(skip).limit(limit).all()
+    total, total_is_exact = count_total(query, total_mode)
+    try:
+        query = apply_keyset(query, models.NotificationLog.sent_at, models.NotificationLog.id, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not cursor:
+        query = query.offset(skip)
+    names = list(schemas.NotificationLogResponse.model_fields)
+    rows = query.with_entities(*(getattr(models.NotificationLog, name) for name in names)).limit(limit).all()
     
-    return {
+    return FastJSONResponse({
         "total": total,
+        "total_is_exact": total_is_exact,
         "skip": skip,
         "limit": limit,
-        "notifications": notifications
-    }
+        "next_cursor": next_cursor(rows, limit, "sent_at"),
+        "notifications": [dict(zip(names, row)) for row in rows]
+    })
 
 
 if __name__ == "__main__":
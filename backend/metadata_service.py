@@ -0,0 +1,135 @@
+"""
+Filtros e facetas sobre as chaves de error_metadata
+
+Filtros `meta.<chave>=<valor>`:
+- Postgres: containment `error_metadata @> '{"chave": valor}'`, atendido pelo
+  índice GIN jsonb_path_ops; chaves promovidas usam a coluna gerada meta_<chave>
+- SQLite: json_extract (com índice de expressão para as chaves promovidas)
+
+Facetas: contagem dos valores mais frequentes de cada chave no período.
+"""
+
+import json
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import cast, func, literal_column, or_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Query, Session
+import models
+
+META_PARAM_PREFIX = "meta."
+MAX_FACET_KEYS = 10
+
+_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_\-]{1,64}$")
+
+
+def _validate_key(key: str) -> str:
+    if not _KEY_PATTERN.match(key):
+        raise ValueError(f"Chave de metadata inválida: {key}")
+    return key
+
+
+def _candidates(value: str) -> List[Any]:
+    """
+    Valores JSON equivalentes ao texto da query string
+
+    "42" casa tanto a string "42" quanto o número 42; "true" casa o booleano.
+    """
+    candidates: List[Any] = [value]
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return candidates
+    if isinstance(parsed, (int, float, bool)) or parsed is None:
+        candidates.append(parsed)
+    return candidates
+
+
+class MetadataService:
+    """Filtros `meta.<chave>` e facetas por chave de metadata"""
+
+    @staticmethod
+    def parse_filters(query_params: Iterable[tuple[str, str]]) -> Dict[str, List[str]]:
+        """
+        Extrai os filtros `meta.<chave>=<valor>` dos parâmetros da requisição
+
+        Valores repetidos da mesma chave são combinados com OU.
+
+        Raises:
+            ValueError: Chave com caracteres inválidos
+        """
+        filters: Dict[str, List[str]] = {}
+        for name, value in query_params:
+            if name.startswith(META_PARAM_PREFIX):
+                key = _validate_key(name[len(META_PARAM_PREFIX):])
+                filters.setdefault(key, []).append(value)
+        return filters
+
+    @staticmethod
+    def key_expression(dialect: str, key: str):
+        """Expressão SQL com o valor (texto) da chave na linha de error_logs"""
+        key = _validate_key(key)
+        if dialect == "postgresql":
+            if key in models.METADATA_HOT_KEYS:
+                return literal_column(f"error_logs.meta_{key}")
+            return models.ErrorLog.error_metadata[key].as_string()
+        if dialect == "sqlite":
+            # Caminho literal para casar com os índices de expressão
+            return func.json_extract(models.ErrorLog.error_metadata, literal_column(f"'$.{key}'"))
+        return func.json_extract(models.ErrorLog.error_metadata, f"$.{key}")
+
+    @staticmethod
+    def apply(query: Query, filters: Dict[str, List[str]]) -> Query:
+        """Aplica os filtros de metadata (chaves combinadas com E, valores com OU)"""
+        if not filters:
+            return query
+        dialect = query.session.bind.dialect.name
+        for key, values in filters.items():
+            if dialect == "postgresql" and key not in models.METADATA_HOT_KEYS:
+                conditions = [
+                    models.ErrorLog.error_metadata.op("@>")(cast(json.dumps({key: candidate}), JSONB))
+                    for value in values
+                    for candidate in _candidates(value)
+                ]
+                query = query.filter(or_(*conditions))
+            elif dialect == "postgresql":
+                query = query.filter(MetadataService.key_expression(dialect, key).in_(values))
+            else:
+                candidates = [candidate for value in values for candidate in _candidates(value)]
+                query = query.filter(MetadataService.key_expression(dialect, key).in_(candidates))
+        return query
+
+    @staticmethod
+    def facets(
+        db: Session,
+        keys: Iterable[str],
+        days: int = 7,
+        limit: int = 10,
+        filters: Optional[Dict[str, List[str]]] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Valores mais frequentes de cada chave de metadata no período
+
+        Returns:
+            dict: {chave: [{"value": ..., "count": ...}, ...]} ordenado por contagem
+        """
+        keys = [_validate_key(key) for key in keys]
+        if len(keys) > MAX_FACET_KEYS:
+            raise ValueError(f"Máximo de {MAX_FACET_KEYS} chaves por consulta de facetas")
+
+        dialect = db.bind.dialect.name
+        start_date = datetime.utcnow() - timedelta(days=days)
+        result = {}
+        for key in keys:
+            value = MetadataService.key_expression(dialect, key)
+            count = func.count().label("count")
+            query = db.query(value.label("value"), count).select_from(models.ErrorLog).filter(
+                models.ErrorLog.timestamp >= start_date,
+                value.isnot(None),
+            )
+            query = MetadataService.apply(query, filters or {})
+            rows = query.group_by(value).order_by(count.desc()).limit(limit).all()
+            result[key] = [{"value": row.value, "count": row.count} for row in rows]
+        return result
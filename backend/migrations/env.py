@@ -0,0 +1,59 @@
+"""
+Ambiente do Alembic: usa o engine de database.py (DATABASE_URL)
+"""
+from logging.config import fileConfig
+
+from alembic import context
+
+from database import engine, Base, disable_statement_timeout
+import models  # noqa: F401 - registra os modelos no metadata
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Gera o SQL das migrações sem conectar ao banco (alembic upgrade --sql)"""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Executa as migrações conectado ao banco"""
+    connectable = config.attributes.get("connection")
+    if connectable is not None:
+        context.configure(
+            connection=connectable,
+            target_metadata=target_metadata,
+            render_as_batch=connectable.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            disable_statement_timeout(connectable)
+            context.run_migrations()
+        return
+
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            disable_statement_timeout(connection)
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,142 @@
+"""Esquema inicial (equivalente ao create_all da versão 2.0.0)
+
+Bancos criados antes das migrações são marcados nesta revisão automaticamente
+(ver database.run_migrations) em vez de recriar as tabelas.
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-11-06
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+ERROR_TYPES = ("HTTP", "DATABASE", "AUTH", "VALIDATION", "PERFORMANCE", "INTEGRATION", "APPLICATION", "FRONTEND")
+SEVERITIES = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+STATUSES = ("OPEN", "IN_PROGRESS", "RESOLVED", "IGNORED")
+CHANNELS = ("EMAIL", "SLACK", "WEBHOOK", "SMS", "DISCORD")
+CONDITIONS = ("ERROR_COUNT", "ERROR_RATE", "CRITICAL_ERROR", "NEW_ERROR_TYPE", "ERROR_SPIKE")
+
+
+def _enums(create_type: bool = True):
+    """Tipos enum; no Postgres são criados uma vez e reutilizados entre tabelas"""
+    enum = sa.Enum
+    kwargs = {}
+    if op.get_bind().dialect.name == "postgresql":
+        enum = postgresql.ENUM
+        kwargs = {"create_type": create_type}
+    return {
+        "error_type": enum(*ERROR_TYPES, name="errortype", **kwargs),
+        "severity": enum(*SEVERITIES, name="severity", **kwargs),
+        "status": enum(*STATUSES, name="errorstatus", **kwargs),
+        "channel": enum(*CHANNELS, name="notificationchannel", **kwargs),
+        "condition": enum(*CONDITIONS, name="alertcondition", **kwargs),
+    }
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        for enum in _enums().values():
+            enum.create(op.get_bind(), checkfirst=True)
+    enums = _enums(create_type=False)
+
+    op.create_table(
+        "error_groups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("fingerprint", sa.String(64), nullable=False),
+        sa.Column("message_pattern", sa.Text(), nullable=False),
+        sa.Column("error_type", enums["error_type"], nullable=False),
+        sa.Column("severity", enums["severity"], nullable=False),
+        sa.Column("source", sa.String(100), nullable=False),
+        sa.Column("total_occurrences", sa.Integer()),
+        sa.Column("first_seen", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("last_seen", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("status", enums["status"]),
+        sa.Column("assigned_to", sa.String(100)),
+        sa.Column("notes", sa.Text()),
+    )
+    op.create_index("ix_error_groups_id", "error_groups", ["id"])
+    op.create_index("ix_error_groups_fingerprint", "error_groups", ["fingerprint"], unique=True)
+    op.create_index("ix_error_groups_error_type", "error_groups", ["error_type"])
+    op.create_index("ix_error_groups_severity", "error_groups", ["severity"])
+    op.create_index("ix_error_groups_source", "error_groups", ["source"])
+    op.create_index("ix_error_groups_status", "error_groups", ["status"])
+
+    op.create_table(
+        "error_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("error_groups.id")),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("error_type", enums["error_type"], nullable=False),
+        sa.Column("severity", enums["severity"], nullable=False),
+        sa.Column("source", sa.String(100), nullable=False),
+        sa.Column("stack_trace", sa.Text()),
+        sa.Column("endpoint", sa.String(500)),
+        sa.Column("method", sa.String(10)),
+        sa.Column("status_code", sa.Integer()),
+        sa.Column("user_id", sa.String(100)),
+        sa.Column("session_id", sa.String(100)),
+        sa.Column("ip_address", sa.String(45)),
+        sa.Column("user_agent", sa.String(500)),
+        sa.Column("error_metadata", sa.JSON()),
+        sa.Column("status", enums["status"]),
+        sa.Column("assigned_to", sa.String(100)),
+        sa.Column("notes", sa.Text()),
+        sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("resolved_at", sa.DateTime(timezone=True)),
+        sa.Column("occurrences", sa.Integer()),
+    )
+    for column in ("id", "group_id", "message", "error_type", "severity", "source", "user_id", "status", "timestamp"):
+        op.create_index(f"ix_error_logs_{column}", "error_logs", [column])
+
+    op.create_table(
+        "alert_rules",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(200), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("condition", enums["condition"], nullable=False),
+        sa.Column("error_type", enums["error_type"]),
+        sa.Column("severity", enums["severity"]),
+        sa.Column("source", sa.String(100)),
+        sa.Column("condition_params", sa.JSON()),
+        sa.Column("notification_channels", sa.JSON(), nullable=False),
+        sa.Column("notification_config", sa.JSON()),
+        sa.Column("cooldown_minutes", sa.Integer()),
+        sa.Column("last_triggered", sa.DateTime(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_alert_rules_id", "alert_rules", ["id"])
+    op.create_index("ix_alert_rules_is_active", "alert_rules", ["is_active"])
+
+    op.create_table(
+        "notification_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("alert_rule_id", sa.Integer(), sa.ForeignKey("alert_rules.id"), nullable=False),
+        sa.Column("channel", enums["channel"], nullable=False),
+        sa.Column("recipient", sa.String(500), nullable=False),
+        sa.Column("subject", sa.String(500)),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("sent_successfully", sa.Boolean()),
+        sa.Column("error_message", sa.Text()),
+        sa.Column("notification_metadata", sa.JSON()),
+        sa.Column("sent_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_notification_logs_id", "notification_logs", ["id"])
+    op.create_index("ix_notification_logs_alert_rule_id", "notification_logs", ["alert_rule_id"])
+
+
+def downgrade():
+    op.drop_table("notification_logs")
+    op.drop_table("alert_rules")
+    op.drop_table("error_logs")
+    op.drop_table("error_groups")
+    if op.get_bind().dialect.name == "postgresql":
+        for enum in _enums().values():
+            enum.drop(op.get_bind(), checkfirst=True)
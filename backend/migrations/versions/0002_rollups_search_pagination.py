@@ -0,0 +1,117 @@
+"""Rollup horário por grupo, sketches HyperLogLog, índices de paginação e busca textual
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+POSTGRES_SEARCH = [
+    """
+    ALTER TABLE error_logs ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(message, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(stack_trace, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_error_logs_search_vector ON error_logs USING GIN (search_vector)",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_error_logs_message_trgm ON error_logs USING GIN (message gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_error_logs_stack_trace_trgm ON error_logs USING GIN (stack_trace gin_trgm_ops)",
+]
+
+SQLITE_SEARCH = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS error_logs_fts USING fts5(
+        message, stack_trace, content='error_logs', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS error_logs_fts_insert AFTER INSERT ON error_logs BEGIN
+        INSERT INTO error_logs_fts(rowid, message, stack_trace) VALUES (new.id, new.message, new.stack_trace);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS error_logs_fts_delete AFTER DELETE ON error_logs BEGIN
+        INSERT INTO error_logs_fts(error_logs_fts, rowid, message, stack_trace)
+        VALUES ('delete', old.id, old.message, old.stack_trace);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS error_logs_fts_update AFTER UPDATE OF message, stack_trace ON error_logs BEGIN
+        INSERT INTO error_logs_fts(error_logs_fts, rowid, message, stack_trace)
+        VALUES ('delete', old.id, old.message, old.stack_trace);
+        INSERT INTO error_logs_fts(rowid, message, stack_trace) VALUES (new.id, new.message, new.stack_trace);
+    END
+    """,
+    # Indexar as linhas já existentes
+    "INSERT INTO error_logs_fts(error_logs_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    op.create_table(
+        "error_group_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("error_groups.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("bucket_hour", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("users_hll", sa.LargeBinary()),
+        sa.Column("sessions_hll", sa.LargeBinary()),
+        sa.UniqueConstraint("group_id", "bucket_hour", name="uq_error_group_rollups_group_bucket"),
+    )
+    op.create_index("ix_error_group_rollups_group_id", "error_group_rollups", ["group_id"])
+    op.create_index("ix_error_group_rollups_bucket_hour", "error_group_rollups", ["bucket_hour"])
+
+    with op.batch_alter_table("error_groups") as batch:
+        batch.add_column(sa.Column("users_hll", sa.LargeBinary()))
+        batch.add_column(sa.Column("sessions_hll", sa.LargeBinary()))
+        batch.add_column(sa.Column("affected_users", sa.Integer(), server_default="0"))
+        batch.add_column(sa.Column("affected_sessions", sa.Integer(), server_default="0"))
+
+    op.create_index(
+        "ix_error_groups_last_seen_id", "error_groups", [sa.text("last_seen DESC"), sa.text("id DESC")]
+    )
+    op.create_index(
+        "ix_error_logs_timestamp_id", "error_logs", [sa.text("timestamp DESC"), sa.text("id DESC")]
+    )
+    op.create_index(
+        "ix_notification_logs_sent_at_id", "notification_logs", [sa.text("sent_at DESC"), sa.text("id DESC")]
+    )
+
+    statements = {"postgresql": POSTGRES_SEARCH, "sqlite": SQLITE_SEARCH}.get(dialect, [])
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_error_logs_stack_trace_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_error_logs_message_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_error_logs_search_vector")
+        op.execute("ALTER TABLE error_logs DROP COLUMN IF EXISTS search_vector")
+    elif dialect == "sqlite":
+        for trigger in ("insert", "delete", "update"):
+            op.execute(f"DROP TRIGGER IF EXISTS error_logs_fts_{trigger}")
+        op.execute("DROP TABLE IF EXISTS error_logs_fts")
+
+    op.drop_index("ix_notification_logs_sent_at_id", table_name="notification_logs")
+    op.drop_index("ix_error_logs_timestamp_id", table_name="error_logs")
+    op.drop_index("ix_error_groups_last_seen_id", table_name="error_groups")
+
+    with op.batch_alter_table("error_groups") as batch:
+        batch.drop_column("affected_sessions")
+        batch.drop_column("affected_users")
+        batch.drop_column("sessions_hll")
+        batch.drop_column("users_hll")
+
+    op.drop_table("error_group_rollups")
@@ -0,0 +1,75 @@
+"""Conjunto de índices derivado das consultas reais
+
+Remove índices que nenhuma consulta usa (ou que só encarecem a ingestão) e
+cria os compostos/parciais que atendem os caminhos quentes:
+
+- listagem e paginação por cursor: (timestamp DESC, id DESC) — já criado na 0002
+- erros recentes de um grupo: (group_id, timestamp DESC)
+- triagem de erros em aberto: parcial em timestamp/last_seen WHERE status em aberto
+- varreduras de período (stats/retenção) no Postgres: BRIN em timestamp
+
+Removidos:
+- ix_<tabela>_id: duplicam a chave primária
+- ix_error_logs_message: B-tree em TEXT não atende ILIKE/busca textual (ver 0002)
+- ix_error_logs_timestamp: coberto pelo (timestamp DESC, id DESC)
+- ix_error_logs_group_id: coberto pelo (group_id, timestamp DESC)
+- ix_error_logs_status: baixa seletividade; substituído pelos índices parciais
+- ix_error_group_rollups_group_id: coberto pela constraint única (group_id, bucket_hour)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+OPEN_STATUSES = sa.text("status IN ('OPEN', 'IN_PROGRESS')")
+
+REDUNDANT_INDEXES = [
+    ("ix_error_groups_id", "error_groups", ["id"]),
+    ("ix_alert_rules_id", "alert_rules", ["id"]),
+    ("ix_notification_logs_id", "notification_logs", ["id"]),
+    ("ix_error_logs_id", "error_logs", ["id"]),
+    ("ix_error_logs_message", "error_logs", ["message"]),
+    ("ix_error_logs_timestamp", "error_logs", ["timestamp"]),
+    ("ix_error_logs_group_id", "error_logs", ["group_id"]),
+    ("ix_error_logs_status", "error_logs", ["status"]),
+    ("ix_error_group_rollups_group_id", "error_group_rollups", ["group_id"]),
+]
+
+
+def upgrade():
+    for name, table, _ in REDUNDANT_INDEXES:
+        op.drop_index(name, table_name=table)
+
+    op.create_index(
+        "ix_error_logs_group_id_timestamp", "error_logs", ["group_id", sa.text("timestamp DESC")]
+    )
+    op.create_index(
+        "ix_error_logs_open_timestamp", "error_logs", [sa.text("timestamp DESC")],
+        postgresql_where=OPEN_STATUSES, sqlite_where=OPEN_STATUSES,
+    )
+    op.create_index(
+        "ix_error_groups_open_last_seen", "error_groups", [sa.text("last_seen DESC")],
+        postgresql_where=OPEN_STATUSES, sqlite_where=OPEN_STATUSES,
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE INDEX IF NOT EXISTS ix_error_logs_timestamp_brin ON error_logs USING BRIN (timestamp)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_error_logs_timestamp_brin")
+
+    op.drop_index("ix_error_groups_open_last_seen", table_name="error_groups")
+    op.drop_index("ix_error_logs_open_timestamp", table_name="error_logs")
+    op.drop_index("ix_error_logs_group_id_timestamp", table_name="error_logs")
+
+    for name, table, columns in reversed(REDUNDANT_INDEXES):
+        op.create_index(name, table, columns)
@@ -0,0 +1,49 @@
+"""error_metadata como JSONB com índice GIN e chaves promovidas
+
+Postgres: converte error_metadata para JSONB (reescreve a tabela), cria o
+índice GIN jsonb_path_ops (filtros por containment @>) e colunas geradas
+meta_<chave> indexadas para as chaves mais usadas em filtros e facetas.
+SQLite: índices de expressão sobre json_extract para as mesmas chaves.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+HOT_KEYS = ("environment", "server", "release")
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("ALTER TABLE error_logs ALTER COLUMN error_metadata TYPE jsonb USING error_metadata::jsonb")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_error_logs_metadata ON error_logs USING GIN (error_metadata jsonb_path_ops)")
+        for key in HOT_KEYS:
+            op.execute(
+                f"ALTER TABLE error_logs ADD COLUMN IF NOT EXISTS meta_{key} text "
+                f"GENERATED ALWAYS AS (error_metadata ->> '{key}') STORED"
+            )
+            op.execute(f"CREATE INDEX IF NOT EXISTS ix_error_logs_meta_{key} ON error_logs (meta_{key})")
+    elif dialect == "sqlite":
+        for key in HOT_KEYS:
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_error_logs_meta_{key} "
+                f"ON error_logs (json_extract(error_metadata, '$.{key}'))"
+            )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for key in HOT_KEYS:
+        op.execute(f"DROP INDEX IF EXISTS ix_error_logs_meta_{key}")
+    if dialect == "postgresql":
+        for key in HOT_KEYS:
+            op.execute(f"ALTER TABLE error_logs DROP COLUMN IF EXISTS meta_{key}")
+        op.execute("DROP INDEX IF EXISTS ix_error_logs_metadata")
+        op.execute("ALTER TABLE error_logs ALTER COLUMN error_metadata TYPE json USING error_metadata::json")
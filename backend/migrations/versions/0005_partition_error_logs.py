@@ -0,0 +1,155 @@
+"""error_logs particionada por faixa de timestamp (Postgres)
+
+Converte error_logs em tabela PARTITION BY RANGE (timestamp), com partições
+mensais ou diárias (ERROR_LOGS_PARTITION_INTERVAL) e uma partição DEFAULT para
+valores fora das faixas criadas. Consultas com filtro de período passam a ler
+só as partições da faixa, e a retenção remove partições inteiras.
+
+Postgres exige a coluna de particionamento na chave primária: a PK passa a ser
+(id, timestamp) e timestamp vira NOT NULL. A sequência de id é mantida.
+
+A conversão copia a tabela (INSERT ... SELECT) e recria os índices, com a
+tabela bloqueada durante a migração. SQLite: sem alterações.
+
+As partições iniciais são mensais, do mês do erro mais antigo até três meses à
+frente. O DDL e a regra ficam congelados aqui; a manutenção do
+partition_service cria as seguintes no intervalo configurado, a partir da
+última partição.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+HOT_KEYS = ("environment", "server", "release")
+LEGACY_TABLE = "error_logs_unpartitioned"
+DEFAULT_PARTITION = "error_logs_default"
+MONTHS_AHEAD = 3
+
+# Colunas gravadas (as geradas — search_vector e meta_<chave> — são recalculadas)
+COLUMNS = (
+    "id", "group_id", "message", "error_type", "severity", "source", "stack_trace",
+    "endpoint", "method", "status_code", "user_id", "session_id", "ip_address",
+    "user_agent", "error_metadata", "status", "assigned_to", "notes", "timestamp",
+    "resolved_at", "occurrences",
+)
+
+INDEXES = [
+    "CREATE INDEX ix_error_logs_error_type ON error_logs (error_type)",
+    "CREATE INDEX ix_error_logs_severity ON error_logs (severity)",
+    "CREATE INDEX ix_error_logs_source ON error_logs (source)",
+    "CREATE INDEX ix_error_logs_user_id ON error_logs (user_id)",
+    "CREATE INDEX ix_error_logs_timestamp_id ON error_logs (timestamp DESC, id DESC)",
+    "CREATE INDEX ix_error_logs_group_id_timestamp ON error_logs (group_id, timestamp DESC)",
+    "CREATE INDEX ix_error_logs_open_timestamp ON error_logs (timestamp DESC) "
+    "WHERE status IN ('OPEN', 'IN_PROGRESS')",
+    "CREATE INDEX ix_error_logs_search_vector ON error_logs USING GIN (search_vector)",
+    "CREATE INDEX ix_error_logs_timestamp_brin ON error_logs USING BRIN (timestamp)",
+    "CREATE INDEX ix_error_logs_message_trgm ON error_logs USING GIN (message gin_trgm_ops)",
+    "CREATE INDEX ix_error_logs_stack_trace_trgm ON error_logs USING GIN (stack_trace gin_trgm_ops)",
+    "CREATE INDEX ix_error_logs_metadata ON error_logs USING GIN (error_metadata jsonb_path_ops)",
+] + [f"CREATE INDEX ix_error_logs_meta_{key} ON error_logs (meta_{key})" for key in HOT_KEYS]
+
+
+def _rename_to_legacy():
+    """Renomeia a tabela atual e libera os nomes de constraints e índices"""
+    bind = op.get_bind()
+    op.execute(f"ALTER TABLE error_logs RENAME TO {LEGACY_TABLE}")
+    op.execute(f"ALTER TABLE {LEGACY_TABLE} RENAME CONSTRAINT error_logs_pkey TO {LEGACY_TABLE}_pkey")
+    op.execute(f"ALTER TABLE {LEGACY_TABLE} DROP CONSTRAINT IF EXISTS error_logs_group_id_fkey")
+    names = bind.execute(sa.text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = :table AND indexname <> :pkey"
+    ), {"table": LEGACY_TABLE, "pkey": f"{LEGACY_TABLE}_pkey"}).scalars().all()
+    for name in names:
+        op.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+def _next_month(moment: datetime) -> datetime:
+    if moment.month == 12:
+        return moment.replace(year=moment.year + 1, month=1)
+    return moment.replace(month=moment.month + 1)
+
+
+def _create_partitions(oldest):
+    """Partições mensais (error_logs_pAAAA_MM) do mês de `oldest` até MONTHS_AHEAD meses à frente"""
+    now = datetime.now(timezone.utc)
+    if oldest is None:
+        oldest = now
+    elif oldest.tzinfo is None:
+        oldest = oldest.replace(tzinfo=timezone.utc)
+    lower = oldest.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    target = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(MONTHS_AHEAD + 1):
+        target = _next_month(target)
+    while lower < target:
+        upper = _next_month(lower)
+        op.execute(
+            f'CREATE TABLE "error_logs_p{lower:%Y_%m}" PARTITION OF error_logs '
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        lower = upper
+
+
+def _copy_from_legacy():
+    columns = ", ".join(f'"{name}"' for name in COLUMNS)
+    values = ", ".join(
+        'coalesce("timestamp", now())' if name == "timestamp" else f'"{name}"' for name in COLUMNS
+    )
+    op.execute(f"INSERT INTO error_logs ({columns}) SELECT {values} FROM {LEGACY_TABLE}")
+
+
+def _finish(primary_key: str):
+    """Chaves, índices e sequência da nova error_logs; remove a antiga"""
+    op.execute(f"ALTER TABLE error_logs ADD PRIMARY KEY ({primary_key})")
+    op.execute(
+        "ALTER TABLE error_logs ADD CONSTRAINT error_logs_group_id_fkey "
+        "FOREIGN KEY (group_id) REFERENCES error_groups (id)"
+    )
+    for statement in INDEXES:
+        op.execute(statement)
+    op.execute("ALTER SEQUENCE error_logs_id_seq OWNED BY error_logs.id")
+    op.execute(f"DROP TABLE {LEGACY_TABLE}")
+    op.execute("ANALYZE error_logs")
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    _rename_to_legacy()
+    op.execute(
+        f"CREATE TABLE error_logs (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS INCLUDING GENERATED) "
+        "PARTITION BY RANGE (timestamp)"
+    )
+    op.execute("ALTER TABLE error_logs ALTER COLUMN timestamp SET NOT NULL")
+    op.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF error_logs DEFAULT")
+
+    oldest = bind.execute(sa.text(f"SELECT min(timestamp) FROM {LEGACY_TABLE}")).scalar()
+    _create_partitions(oldest)
+
+    _copy_from_legacy()
+    _finish("id, timestamp")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    _rename_to_legacy()
+    op.execute(
+        f"CREATE TABLE error_logs (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS INCLUDING GENERATED)"
+    )
+    _copy_from_legacy()
+    # DROP da tabela particionada remove também as partições
+    _finish("id")
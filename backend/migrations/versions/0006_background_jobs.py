@@ -0,0 +1,51 @@
+"""Jobs em segundo plano e exclusão assíncrona de grupos
+
+- background_jobs: operações longas (status/exclusão de grupos) processadas em
+  lotes, com progresso, cursor de retomada e cancelamento
+- error_groups.deleted_at: grupo em exclusão, oculto das consultas
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+JOB_STATUSES = ("QUEUED", "RUNNING", "COMPLETED", "FAILED", "CANCELLED")
+
+
+def upgrade():
+    op.add_column("error_groups", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table(
+        "background_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("params", sa.JSON()),
+        sa.Column("status", sa.Enum(*JOB_STATUSES, name="jobstatus"), nullable=False),
+        sa.Column("total", sa.Integer()),
+        sa.Column("processed", sa.Integer(), nullable=False),
+        sa.Column("cursor", sa.String(200)),
+        sa.Column("cancel_requested", sa.Boolean(), nullable=False),
+        sa.Column("error", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(timezone=True)),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index(
+        "ix_background_jobs_created_at_id", "background_jobs",
+        [sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_background_jobs_created_at_id", table_name="background_jobs")
+    op.drop_table("background_jobs")
+    sa.Enum(name="jobstatus").drop(op.get_bind(), checkfirst=True)
+    op.drop_column("error_groups", "deleted_at")
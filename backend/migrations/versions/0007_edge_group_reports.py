@@ -0,0 +1,30 @@
+"""Contagens informadas pelos coletores de borda (modo embarcado)
+
+- edge_group_reports: por (coletor, fingerprint), a última contagem acumulada
+  recebida; torna o reenvio de um lote idempotente
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "edge_group_reports",
+        sa.Column("edge_id", sa.String(100), primary_key=True),
+        sa.Column("fingerprint", sa.String(64), primary_key=True),
+        sa.Column("reported_occurrences", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table("edge_group_reports")
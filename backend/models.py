@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Enum as SQLEnum, Boolean, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Enum as SQLEnum, Boolean, ForeignKey, Float, UniqueConstraint, LargeBinary, Index
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -31,6 +33,14 @@ class ErrorStatus(str, enum.Enum):
     IGNORED = "IGNORED"
 
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
 class NotificationChannel(str, enum.Enum):
     EMAIL = "EMAIL"
     SLACK = "SLACK"
@@ -51,7 +61,7 @@ class ErrorGroup(Base):
     """Agrupa erros similares usando fingerprinting"""
     __tablename__ = "error_groups"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     
     # Fingerprint único para identificar erros similares
     fingerprint = Column(String(64), unique=True, nullable=False, index=True)
@@ -67,14 +77,34 @@ class ErrorGroup(Base):
     first_seen = Column(DateTime(timezone=True), server_default=func.now())
     last_seen = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    # Usuários/sessões afetados: sketches HyperLogLog e última estimativa calculada
+    users_hll = Column(LargeBinary, nullable=True)
+    sessions_hll = Column(LargeBinary, nullable=True)
+    affected_users = Column(Integer, default=0)
+    affected_sessions = Column(Integer, default=0)
+    
     # Status do grupo
     status = Column(SQLEnum(ErrorStatus), default=ErrorStatus.OPEN, index=True)
     assigned_to = Column(String(100), nullable=True)
     notes = Column(Text, nullable=True)
     
+    # Exclusão em andamento (job em segundo plano): o grupo some das consultas imediatamente
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+    
     # Relacionamento com erros individuais
     errors = relationship("ErrorLog", back_populates="group")
     
+    __table_args__ = (
+        # Paginação por cursor: ORDER BY last_seen DESC, id DESC
+        Index("ix_error_groups_last_seen_id", last_seen.desc(), id.desc()),
+        # Listagem de grupos em aberto (triagem)
+        Index(
+            "ix_error_groups_open_last_seen", last_seen.desc(),
+            postgresql_where=text("status IN ('OPEN', 'IN_PROGRESS')"),
+            sqlite_where=text("status IN ('OPEN', 'IN_PROGRESS')"),
+        ),
+    )
+    
     def __repr__(self):
         return f"<ErrorGroup(id={self.id}, fingerprint={self.fingerprint}, occurrences={self.total_occurrences})>"
 
@@ -82,14 +112,14 @@ class ErrorGroup(Base):
 class ErrorLog(Base):
     __tablename__ = "error_logs"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     
     # Fingerprinting - relacionamento com grupo
-    group_id = Column(Integer, ForeignKey("error_groups.id"), nullable=True, index=True)
+    group_id = Column(Integer, ForeignKey("error_groups.id"), nullable=True)
     group = relationship("ErrorGroup", back_populates="errors")
     
     # Error identification
-    message = Column(Text, nullable=False, index=True)
+    message = Column(Text, nullable=False)
     error_type = Column(SQLEnum(ErrorType), nullable=False, index=True)
     severity = Column(SQLEnum(Severity), nullable=False, index=True)
     source = Column(String(100), nullable=False, index=True)  # frontend, backend, database, etc.
@@ -107,29 +137,75 @@ class ErrorLog(Base):
     user_agent = Column(String(500), nullable=True)
     
     # Additional metadata
-    error_metadata = Column(JSON, nullable=True)
+    error_metadata = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
     
     # Status tracking
-    status = Column(SQLEnum(ErrorStatus), default=ErrorStatus.OPEN, index=True)
+    status = Column(SQLEnum(ErrorStatus), default=ErrorStatus.OPEN)
     assigned_to = Column(String(100), nullable=True)
     notes = Column(Text, nullable=True)
     
     # Timestamps
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
     resolved_at = Column(DateTime(timezone=True), nullable=True)
     
     # Count of occurrences (if grouping similar errors)
     occurrences = Column(Integer, default=1)
 
+    # Índices derivados das consultas reais (ver migrations/versions/0003_workload_indexes.py)
+    __table_args__ = (
+        # Listagem, paginação por cursor e filtros de período: ORDER BY timestamp DESC, id DESC
+        Index("ix_error_logs_timestamp_id", timestamp.desc(), id.desc()),
+        # Erros recentes de um grupo e operações por grupo
+        Index("ix_error_logs_group_id_timestamp", group_id, timestamp.desc()),
+        # Erros em aberto (status padrão da triagem)
+        Index(
+            "ix_error_logs_open_timestamp", timestamp.desc(),
+            postgresql_where=text("status IN ('OPEN', 'IN_PROGRESS')"),
+            sqlite_where=text("status IN ('OPEN', 'IN_PROGRESS')"),
+        ),
+    )
+
     def __repr__(self):
         return f"<ErrorLog(id={self.id}, type={self.error_type}, severity={self.severity}, message={self.message[:50]})>"
 
 
+# ==================== DDL ESPECÍFICO POR BANCO ====================
+# Busca textual (tsvector/FTS5), trigramas, BRIN, o índice GIN de error_metadata e as colunas
+# meta_<chave> existem só nas migrações (0002 a 0005), com o DDL congelado em cada uma. O esquema
+# vem de run_migrations; Base.metadata.create_all não gera esse DDL.
+
+# Chaves de error_metadata promovidas a colunas geradas (Postgres) / índices de expressão (SQLite).
+# Mudar a lista exige uma migração nova com o DDL das chaves.
+METADATA_HOT_KEYS = ("environment", "server", "release")
+
+
+class ErrorGroupRollup(Base):
+    """Contadores por grupo em buckets de uma hora, atualizados na ingestão"""
+    __tablename__ = "error_group_rollups"
+    __table_args__ = (
+        UniqueConstraint("group_id", "bucket_hour", name="uq_error_group_rollups_group_bucket"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    group_id = Column(Integer, ForeignKey("error_groups.id", ondelete="CASCADE"), nullable=False)
+    
+    # Hora do bucket em horas desde a epoch (UTC)
+    bucket_hour = Column(Integer, nullable=False, index=True)
+    count = Column(Integer, nullable=False, default=0)
+    
+    # Sketches HyperLogLog do bucket (mergeáveis entre buckets)
+    users_hll = Column(LargeBinary, nullable=True)
+    sessions_hll = Column(LargeBinary, nullable=True)
+    
+    def __repr__(self):
+        return f"<ErrorGroupRollup(group_id={self.group_id}, bucket_hour={self.bucket_hour}, count={self.count})>"
+
+
 class AlertRule(Base):
     """Regras de alerta para notificações automáticas"""
     __tablename__ = "alert_rules"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     
     # Configuração da regra
     name = Column(String(200), nullable=False)
@@ -170,7 +246,7 @@ class NotificationLog(Base):
     """Log de notificações enviadas"""
     __tablename__ = "notification_logs"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     
     # Relacionamento com a regra de alerta
     alert_rule_id = Column(Integer, ForeignKey("alert_rules.id"), nullable=False, index=True)
@@ -193,10 +269,67 @@ class NotificationLog(Base):
     # Timestamp
     sent_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # Paginação por cursor: ORDER BY sent_at DESC, id DESC
+        Index("ix_notification_logs_sent_at_id", sent_at.desc(), id.desc()),
+    )
+    
     def __repr__(self):
         return f"<NotificationLog(id={self.id}, channel={self.channel}, success={self.sent_successfully})>"
 
 
+class BackgroundJob(Base):
+    """Operação longa processada em lotes fora da requisição (ver job_service.py)"""
+    __tablename__ = "background_jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    params = Column(JSON, nullable=True)
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    
+    # Progresso: linhas processadas de um total estimado no início; cursor para retomada
+    total = Column(Integer, nullable=True)
+    processed = Column(Integer, nullable=False, default=0)
+    cursor = Column(String(200), nullable=True)
+    
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    error = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        # Listagem de /api/jobs (mais recentes primeiro)
+        Index("ix_background_jobs_created_at_id", created_at.desc(), id.desc()),
+    )
+    
+    @property
+    def progress(self):
+        if self.status == JobStatus.COMPLETED:
+            return 1.0
+        if not self.total:
+            return None
+        return round(min(self.processed / self.total, 1.0), 4)
+    
+    def __repr__(self):
+        return f"<BackgroundJob(id={self.id}, kind={self.kind}, status={self.status})>"
+
+
+class EdgeGroupReport(Base):
+    """Última contagem acumulada de um grupo informada por um coletor de borda (ver edge_service.py)"""
+    __tablename__ = "edge_group_reports"
+
+    edge_id = Column(String(100), primary_key=True)
+    fingerprint = Column(String(64), primary_key=True)
+    reported_occurrences = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<EdgeGroupReport(edge_id={self.edge_id}, fingerprint={self.fingerprint[:16]}, reported={self.reported_occurrences})>"
+
+
 def generate_fingerprint(error_type: str, message: str, endpoint: str = None, stack_trace: str = None) -> str:
     """
     Gera um fingerprint único para agrupar erros similares
@@ -0,0 +1,65 @@
+"""
+Paginação por cursor (keyset) para os endpoints de listagem
+
+O cursor é opaco para o cliente: base64url de [valor da chave de ordenação, id]
+da última linha da página. A próxima página filtra (chave, id) < (cursor) usando
+o índice composto, então o custo é o mesmo para qualquer profundidade.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Gera o cursor opaco a partir da chave de ordenação e do id"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Lê um cursor gerado por `encode_cursor`
+
+    Raises:
+        ValueError: Cursor malformado
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError) as e:
+        raise ValueError("Cursor inválido") from e
+
+
+def apply_keyset(query: Query, sort_column, id_column, cursor: Optional[str]) -> Query:
+    """
+    Ordena por (sort_column DESC, id DESC) e, se houver cursor, continua após ele
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        sort_expr, sort_param = sort_column, sort_value
+        if query.session.bind.dialect.name == "sqlite":
+            # SQLite guarda DateTime como texto em formatos variados (com e sem
+            # microssegundos); julianday normaliza para a comparação
+            sort_expr, sort_param = func.julianday(sort_column), func.julianday(sort_value)
+        query = query.filter(tuple_(sort_expr, id_column) < tuple_(sort_param, row_id))
+        if query.session.bind.dialect.name == "postgresql":
+            # Redundante para o resultado, mas o planner só descarta partições
+            # de error_logs com comparação direta na coluna (não com ROW(...) < ROW(...))
+            query = query.filter(sort_column <= sort_value)
+    return query.order_by(sort_column.desc(), id_column.desc())
+
+
+def next_cursor(rows: List[Any], limit: int, sort_attr: str) -> Optional[str]:
+    """Cursor da próxima página, ou None se esta for a última"""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(getattr(last, sort_attr), last.id)
@@ -0,0 +1,225 @@
+"""
+Particionamento de error_logs por faixa de timestamp (Postgres)
+
+A migração 0005 converte error_logs em tabela particionada (PARTITION BY RANGE
+(timestamp)). Este serviço mantém as partições futuras criadas, lista as
+existentes e remove as antigas inteiras (usado pela retenção).
+
+Configuração:
+- ERROR_LOGS_PARTITION_INTERVAL: "month" (padrão) ou "day"
+- ERROR_LOGS_PARTITIONS_AHEAD: partições criadas à frente do período atual (padrão 3)
+- PARTITION_MAINTENANCE_HOURS: intervalo da manutenção em segundo plano (padrão 6)
+
+Trocar o intervalo vale para as partições novas: cada uma começa no limite
+superior da anterior, então não há sobreposição.
+
+Uso manual (ex: cron):
+    python partition_service.py
+"""
+
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+PARTITION_INTERVALS = ("month", "day")
+PARTITION_INTERVAL = os.getenv("ERROR_LOGS_PARTITION_INTERVAL", "month")
+PARTITIONS_AHEAD = int(os.getenv("ERROR_LOGS_PARTITIONS_AHEAD", "3"))
+PARTITION_MAINTENANCE_HOURS = float(os.getenv("PARTITION_MAINTENANCE_HOURS", "6"))
+
+if PARTITION_INTERVAL not in PARTITION_INTERVALS:
+    raise ValueError(f"ERROR_LOGS_PARTITION_INTERVAL inválido: {PARTITION_INTERVAL}")
+
+PARENT_TABLE = "error_logs"
+DEFAULT_PARTITION = "error_logs_default"
+
+_BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def _parse_bound(value: str) -> datetime:
+    """Lê um limite de partição como exibido pelo Postgres ('2026-10-01 00:00:00+00')"""
+    if re.search(r"[+-]\d\d$", value):
+        value += ":00"
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def floor_bound(moment: datetime, interval: str = PARTITION_INTERVAL) -> datetime:
+    """Início (UTC) do período que contém `moment`"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    moment = moment.replace(tzinfo=timezone.utc, hour=0, minute=0, second=0, microsecond=0)
+    if interval == "month":
+        moment = moment.replace(day=1)
+    return moment
+
+
+def next_bound(moment: datetime, interval: str = PARTITION_INTERVAL) -> datetime:
+    """Início do período seguinte ao que contém `moment`"""
+    start = floor_bound(moment, interval)
+    if interval == "day":
+        return datetime.fromordinal(start.toordinal() + 1).replace(tzinfo=timezone.utc)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def partition_name(start: datetime, interval: str = PARTITION_INTERVAL) -> str:
+    if interval == "day":
+        return f"{PARENT_TABLE}_p{start:%Y_%m_%d}"
+    return f"{PARENT_TABLE}_p{start:%Y_%m}"
+
+
+class PartitionService:
+    """Criação, listagem e remoção de partições de error_logs"""
+
+    @staticmethod
+    def is_partitioned(connection: Connection) -> bool:
+        if connection.dialect.name != "postgresql":
+            return False
+        return bool(connection.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+        ), {"table": PARENT_TABLE}).scalar())
+
+    @staticmethod
+    def partitions(connection: Connection) -> List[Tuple[str, datetime, datetime]]:
+        """Partições de faixa existentes (nome, início, fim), em ordem; exclui a DEFAULT"""
+        rows = connection.execute(text(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(:table)
+            """
+        ), {"table": PARENT_TABLE}).all()
+        result = []
+        for name, bound in rows:
+            match = _BOUND_PATTERN.search(bound or "")
+            if match:
+                result.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+        return sorted(result, key=lambda item: item[1])
+
+    @staticmethod
+    def ensure_partitions(
+        connection: Connection,
+        ahead: int = PARTITIONS_AHEAD,
+        start: Optional[datetime] = None,
+        interval: str = PARTITION_INTERVAL,
+    ) -> List[str]:
+        """
+        Cria as partições que faltam até `ahead` períodos após o atual
+
+        Começa no período de `start`, se informado (ex: dados antigos a receber),
+        ou logo após a última partição existente. Faixas já cobertas por outra
+        partição são puladas. Retorna os nomes criados. Uma faixa cujos dados já
+        estão na partição DEFAULT não pode ser criada; nesse caso a criação
+        para e é registrada no log.
+        """
+        if not PartitionService.is_partitioned(connection):
+            return []
+
+        existing = PartitionService.partitions(connection)
+        now = datetime.now(timezone.utc)
+        target = floor_bound(now, interval)
+        for _ in range(ahead + 1):
+            target = next_bound(target, interval)
+
+        if start is not None:
+            lower = floor_bound(start, interval)
+        else:
+            lower = existing[-1][2] if existing else floor_bound(now, interval)
+
+        created = []
+        while lower < target:
+            covering = next((item for item in existing if item[1] <= lower < item[2]), None)
+            if covering:
+                lower = covering[2]
+                continue
+            upper = next_bound(lower, interval)
+            # Não sobrepor uma partição existente que começa dentro do período
+            upper = min([item[1] for item in existing if lower < item[1] < upper] + [upper])
+            name = partition_name(lower, interval)
+            try:
+                with connection.begin_nested():
+                    connection.execute(text(
+                        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT_TABLE} '
+                        f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+                    ))
+            except Exception as e:
+                logger.error(f"Falha ao criar partição {name}: {str(e)}")
+                break
+            created.append(name)
+            lower = upper
+
+        if created:
+            logger.info(f"Partições criadas: {', '.join(created)}")
+        return created
+
+    @staticmethod
+    def drop_partitions_before(connection: Connection, cutoff: datetime) -> List[str]:
+        """
+        Remove as partições inteiramente anteriores a `cutoff`
+
+        DROP TABLE da partição: instantâneo e sem gerar tuplas mortas para o VACUUM.
+        """
+        if cutoff.tzinfo is None:
+            cutoff = cutoff.replace(tzinfo=timezone.utc)
+        dropped = []
+        for name, _, upper in PartitionService.partitions(connection):
+            if upper <= cutoff:
+                connection.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+                dropped.append(name)
+        return dropped
+
+    @staticmethod
+    def run_maintenance():
+        """Garante as partições futuras (uma transação)"""
+        from database import engine
+
+        try:
+            with engine.begin() as connection:
+                PartitionService.ensure_partitions(connection)
+        except Exception as e:
+            logger.error(f"Erro na manutenção de partições: {str(e)}")
+
+    @staticmethod
+    def start_maintenance() -> Optional[threading.Thread]:
+        """Executa a manutenção agora e depois a cada PARTITION_MAINTENANCE_HOURS, em uma thread daemon"""
+        from database import engine
+
+        if engine.dialect.name != "postgresql":
+            return None
+
+        stop = threading.Event()
+
+        def loop():
+            while True:
+                PartitionService.run_maintenance()
+                if stop.wait(PARTITION_MAINTENANCE_HOURS * 3600):
+                    return
+
+        thread = threading.Thread(target=loop, name="partition-maintenance", daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    with engine.begin() as connection:
+        if not PartitionService.is_partitioned(connection):
+            print("error_logs não é particionada (requer Postgres e a migração 0005)")
+        else:
+            created = PartitionService.ensure_partitions(connection)
+            print(f"✓ {len(created)} partições criadas")
+            for name, lower, upper in PartitionService.partitions(connection):
+                print(f"  {name}: {lower:%Y-%m-%d} → {upper:%Y-%m-%d}")
@@ -0,0 +1,468 @@
+"""
+Retenção de error_logs e notification_logs
+
+Políticas por idade, status e severidade. Cada política remove as linhas
+que casam com ela e são mais antigas que o seu prazo; uma linha sai assim que
+a primeira política aplicável expira (ex: RESOLVED com 30 dias mesmo que o
+prazo geral seja 90).
+
+A remoção é feita em lotes pequenos, cada um em sua própria transação, com
+uma pausa entre eles — nenhum lock longo. No Postgres particionado, as
+partições inteiramente fora do prazo geral são removidas com DROP.
+
+Opcionalmente as linhas são arquivadas antes (NDJSON com gzip, um arquivo
+por tabela e execução em RETENTION_ARCHIVE_DIR).
+
+Contadores dos grupos: cada lote, na mesma transação do DELETE (ou do DROP
+das partições), desconta os erros removidos de total_occurrences e dos buckets
+do rollup e avança first_seen. Grupos que ficam vazios são mantidos, com
+total_occurrences=0 e first_seen/last_seen preservados, para não perder a
+triagem (status). Os sketches
+de usuários e sessões afetados (HLL) não admitem remoção e continuam contando
+o período expirado.
+
+Configuração (dias; 0 ou vazio = sem limite):
+    RETENTION_DAYS=90
+    RETENTION_STATUS_DAYS=RESOLVED:30,IGNORED:30
+    RETENTION_SEVERITY_DAYS=LOW:30
+    NOTIFICATION_RETENTION_DAYS=90
+    RETENTION_BATCH_SIZE=1000
+    RETENTION_BATCH_PAUSE_MS=50
+    RETENTION_INTERVAL_HOURS=24    (0 desativa a execução em segundo plano na API)
+    RETENTION_ARCHIVE_DIR=/var/archive/errors
+
+Uso manual (ex: cron):
+    python retention_service.py --dry-run
+    python retention_service.py
+"""
+
+import gzip
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import DateTime, Integer, bindparam, column, delete, func, select, table, text, update
+from database import engine, exclusive_job
+from partition_service import PartitionService
+from rollup_service import EPOCH, SECONDS_PER_HOUR, RollupService, epoch_hour
+from stats_service import StatsService
+import fast_json
+import models
+import logging
+
+logger = logging.getLogger(__name__)
+
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "1000"))
+RETENTION_BATCH_PAUSE_MS = float(os.getenv("RETENTION_BATCH_PAUSE_MS", "50"))
+RETENTION_INTERVAL_HOURS = float(os.getenv("RETENTION_INTERVAL_HOURS", "24"))
+RETENTION_ARCHIVE_DIR = os.getenv("RETENTION_ARCHIVE_DIR", "")
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "0") or 0)
+
+# Chave do advisory lock do Postgres: uma execução por vez entre instâncias
+_ADVISORY_LOCK_KEY = 4_041_001
+
+
+class RetentionPolicy:
+    """Prazo em dias para erros de um status/severidade (None = qualquer)"""
+
+    __slots__ = ("days", "status", "severity")
+
+    def __init__(
+        self,
+        days: int,
+        status: Optional[models.ErrorStatus] = None,
+        severity: Optional[models.Severity] = None,
+    ):
+        self.days = days
+        self.status = status
+        self.severity = severity
+
+    @property
+    def name(self) -> str:
+        if self.status:
+            return f"status={self.status.value}"
+        if self.severity:
+            return f"severity={self.severity.value}"
+        return "all"
+
+    def cutoff(self, now: datetime) -> datetime:
+        return now - timedelta(days=self.days)
+
+    def conditions(self, now: datetime) -> list:
+        conditions = [models.ErrorLog.timestamp < self.cutoff(now)]
+        if self.status:
+            conditions.append(models.ErrorLog.status == self.status)
+        if self.severity:
+            conditions.append(models.ErrorLog.severity == self.severity)
+        return conditions
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"policy": self.name, "days": self.days}
+
+
+def _parse_days_map(value: str, enum_class, field: str) -> List[RetentionPolicy]:
+    """Lê "RESOLVED:30,IGNORED:30" em políticas"""
+    policies = []
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, days = item.partition(":")
+        try:
+            member = enum_class(name.strip().upper())
+            days = int(days)
+        except ValueError:
+            raise ValueError(f"Política de retenção inválida: {item}")
+        if days > 0:
+            policies.append(RetentionPolicy(days, **{field: member}))
+    return policies
+
+
+def load_policies() -> List[RetentionPolicy]:
+    """Políticas configuradas; a geral (RETENTION_DAYS), se houver, vem primeiro"""
+    policies = []
+    days = int(os.getenv("RETENTION_DAYS", "0") or 0)
+    if days > 0:
+        policies.append(RetentionPolicy(days))
+    policies += _parse_days_map(os.getenv("RETENTION_STATUS_DAYS", ""), models.ErrorStatus, "status")
+    policies += _parse_days_map(os.getenv("RETENTION_SEVERITY_DAYS", ""), models.Severity, "severity")
+    return policies
+
+
+RETENTION_POLICIES = load_policies()
+
+
+def _utc_naive(moment: Optional[datetime]) -> Optional[datetime]:
+    """Postgres devolve datetimes com fuso; os contadores dos grupos trabalham em UTC naive"""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class _Archive:
+    """Arquivo NDJSON gzip aberto sob demanda, um por tabela e execução"""
+
+    def __init__(self, directory: str, table: str, started: datetime):
+        self.path = os.path.join(directory, f"{table}-{started:%Y%m%dT%H%M%S}.ndjson.gz")
+        self._file = None
+
+    def write(self, rows) -> None:
+        created = self._file is None
+        if created:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = gzip.open(self.path, "ab")
+        self._file.write(b"".join(fast_json.dumps(dict(row._mapping)) + b"\n" for row in rows))
+        # Garante os dados no disco antes do DELETE ser confirmado
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if created:
+            # A entrada do arquivo no diretório também precisa sobreviver a uma queda
+            directory = os.open(os.path.dirname(self.path), os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+    def close(self) -> Optional[str]:
+        if self._file is None:
+            return None
+        self._file.close()
+        return self.path
+
+
+class RetentionService:
+    """Aplica as políticas de retenção em lotes"""
+
+    @staticmethod
+    def preview(now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Quantas linhas cada política removeria agora (sem alterar nada)"""
+        now = now or datetime.utcnow()
+        with engine.connect() as connection:
+            policies = []
+            for policy in RETENTION_POLICIES:
+                count = connection.execute(
+                    select(func.count()).select_from(models.ErrorLog.__table__).where(*policy.conditions(now))
+                ).scalar()
+                policies.append({**policy.to_dict(), "rows": count})
+            notifications = 0
+            if NOTIFICATION_RETENTION_DAYS > 0:
+                notifications = connection.execute(
+                    select(func.count()).select_from(models.NotificationLog.__table__).where(
+                        models.NotificationLog.sent_at < now - timedelta(days=NOTIFICATION_RETENTION_DAYS)
+                    )
+                ).scalar()
+        return {"error_logs": policies, "notification_logs": notifications}
+
+    @staticmethod
+    def run(
+        now: Optional[datetime] = None,
+        batch_size: int = RETENTION_BATCH_SIZE,
+        archive_dir: str = RETENTION_ARCHIVE_DIR,
+    ) -> Dict[str, Any]:
+        """
+        Executa todas as políticas
+
+        Returns:
+            dict: linhas removidas por política, partições removidas, grupos que
+            ficaram sem ocorrências e arquivos gerados
+        """
+        now = now or datetime.utcnow()
+        started = datetime.utcnow()
+        result: Dict[str, Any] = {
+            "error_logs": {}, "notification_logs": 0, "partitions_dropped": [], "groups_emptied": 0, "archives": [],
+        }
+
+        def release_groups(connection, rows):
+            counts = Counter(
+                (row.group_id, epoch_hour(row.timestamp)) for row in rows if row.group_id is not None
+            )
+            result["groups_emptied"] += RetentionService._release_groups(connection, counts)
+
+        error_archive = _Archive(archive_dir, "error_logs", started) if archive_dir else None
+        notification_archive = _Archive(archive_dir, "notification_logs", started) if archive_dir else None
+        try:
+            for index, policy in enumerate(RETENTION_POLICIES):
+                removed = 0
+                if index == 0 and policy.status is None and policy.severity is None:
+                    dropped, removed, groups_emptied = RetentionService._drop_partitions(
+                        policy.cutoff(now), error_archive
+                    )
+                    result["partitions_dropped"] = dropped
+                    result["groups_emptied"] += groups_emptied
+                removed += RetentionService._purge(
+                    models.ErrorLog.__table__,
+                    policy.conditions(now),
+                    models.ErrorLog.timestamp < policy.cutoff(now),
+                    batch_size,
+                    error_archive,
+                    columns=("id", "group_id", "timestamp"),
+                    on_delete=release_groups,
+                )
+                result["error_logs"][policy.name] = removed
+
+            if NOTIFICATION_RETENTION_DAYS > 0:
+                cutoff = now - timedelta(days=NOTIFICATION_RETENTION_DAYS)
+                result["notification_logs"] = RetentionService._purge(
+                    models.NotificationLog.__table__,
+                    [models.NotificationLog.sent_at < cutoff],
+                    models.NotificationLog.sent_at < cutoff,
+                    batch_size,
+                    notification_archive,
+                )
+        finally:
+            for archive in (error_archive, notification_archive):
+                path = archive.close() if archive else None
+                if path:
+                    result["archives"].append(path)
+
+        if result["partitions_dropped"] or any(result["error_logs"].values()):
+            from cache_service import response_cache
+            response_cache.invalidate("stats", "groups")
+
+        logger.info(f"Retenção aplicada: {result}")
+        return result
+
+    @staticmethod
+    def _purge(
+        table,
+        conditions: list,
+        time_condition,
+        batch_size: int,
+        archive: Optional[_Archive],
+        columns: Iterable[str] = ("id",),
+        on_delete: Optional[Callable] = None,
+    ) -> int:
+        """
+        Remove as linhas que casam com `conditions`, um lote por transação
+
+        O DELETE repete a condição de tempo para que o Postgres descarte as
+        partições fora do período. `on_delete(connection, rows)` roda depois do
+        DELETE, na mesma transação, com as `columns` de cada linha removida.
+        """
+        removed = 0
+        pause = RETENTION_BATCH_PAUSE_MS / 1000
+        columns = [table.c[name] for name in (table.c.keys() if archive else columns)]
+        while True:
+            with engine.begin() as connection:
+                rows = connection.execute(select(*columns).where(*conditions).limit(batch_size)).all()
+                if not rows:
+                    break
+                if archive:
+                    archive.write(rows)
+                connection.execute(delete(table).where(table.c.id.in_([row.id for row in rows]), time_condition))
+                if on_delete:
+                    on_delete(connection, rows)
+            removed += len(rows)
+            if len(rows) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+        return removed
+
+    @staticmethod
+    def _drop_partitions(cutoff: datetime, archive: Optional[_Archive]):
+        """
+        Remove as partições de error_logs inteiramente anteriores a `cutoff` (Postgres)
+
+        Returns:
+            tuple: (partições removidas, linhas removidas, grupos que ficaram sem ocorrências)
+        """
+        with engine.begin() as connection:
+            if not PartitionService.is_partitioned(connection):
+                return [], 0, 0
+            aware_cutoff = cutoff.replace(tzinfo=timezone.utc)
+            expired = [item for item in PartitionService.partitions(connection) if item[2] <= aware_cutoff]
+
+        # Só as colunas do modelo (sem as geradas: search_vector, meta_<chave>)
+        columns = ", ".join(f'"{name}"' for name in models.ErrorLog.__table__.c.keys())
+        removed = 0
+        for name, _, _ in expired:
+            with engine.connect() as connection:
+                if archive:
+                    result = connection.execution_options(yield_per=RETENTION_BATCH_SIZE).execute(
+                        text(f'SELECT {columns} FROM "{name}"')
+                    )
+                    for rows in result.partitions():
+                        archive.write(rows)
+                removed += connection.execute(text(f'SELECT count(*) FROM "{name}"')).scalar()
+        groups_emptied = 0
+        if expired:
+            with engine.begin() as connection:
+                counts: Counter = Counter()
+                for name, _, _ in expired:
+                    partition = table(name, column("group_id", Integer), column("timestamp", DateTime))
+                    bucket = StatsService.epoch_bucket_of("postgresql", partition.c.timestamp, SECONDS_PER_HOUR)
+                    for group_id, bucket_hour, count in connection.execute(
+                        select(partition.c.group_id, bucket, func.count()).where(
+                            partition.c.group_id.isnot(None)
+                        ).group_by(partition.c.group_id, bucket)
+                    ):
+                        counts[(group_id, int(bucket_hour))] += count
+                PartitionService.drop_partitions_before(connection, cutoff)
+                groups_emptied = RetentionService._release_groups(connection, counts)
+        return [name for name, _, _ in expired], removed, groups_emptied
+
+    @staticmethod
+    def _release_groups(connection, counts: Counter) -> int:
+        """
+        Desconta dos grupos e do rollup os erros removidos, na transação da remoção
+
+        `counts`: {(group_id, bucket_hour): erros removidos}. Ajusta
+        total_occurrences e avança first_seen para o erro (ou bucket) mais antigo
+        que restou. Grupos sem ocorrências e sem erros ficam com
+        total_occurrences=0 e first_seen/last_seen intactos: a triagem continua
+        valendo se o erro voltar.
+
+        Returns:
+            int: Grupos que ficaram sem ocorrências
+        """
+        if not counts:
+            return 0
+        group = models.ErrorGroup.__table__
+        log = models.ErrorLog.__table__
+        rollup = models.ErrorGroupRollup.__table__
+        removed_by_group: Counter = Counter()
+        for (group_id, _), removed in counts.items():
+            removed_by_group[group_id] += removed
+        group_ids = sorted(removed_by_group)
+
+        # Travados em ordem de id, como na ingestão: nenhum erro entra num grupo durante o desconto
+        current = connection.execute(
+            select(group.c.id, group.c.total_occurrences, group.c.first_seen).where(
+                group.c.id.in_(group_ids)
+            ).order_by(group.c.id).with_for_update()
+        ).all()
+        RollupService.subtract(connection, counts)
+        first_logs = dict(connection.execute(
+            select(log.c.group_id, func.min(log.c.timestamp)).where(
+                log.c.group_id.in_(group_ids)
+            ).group_by(log.c.group_id)
+        ).all())
+        first_buckets = dict(connection.execute(
+            select(rollup.c.group_id, func.min(rollup.c.bucket_hour)).where(
+                rollup.c.group_id.in_(group_ids)
+            ).group_by(rollup.c.group_id)
+        ).all())
+
+        updates = []
+        emptied = 0
+        for group_id, total, first_seen in current:
+            total = max(total - removed_by_group[group_id], 0)
+            first_log = _utc_naive(first_logs.get(group_id))
+            if total == 0 and first_log is None:
+                emptied += 1
+            # Ocorrências sem linha em error_logs (coletores de borda) só existem no rollup
+            oldest = first_log
+            first_bucket = first_buckets.get(group_id)
+            if first_bucket is not None and (oldest is None or first_bucket < epoch_hour(oldest)):
+                oldest = EPOCH + timedelta(hours=first_bucket)
+            first_seen = _utc_naive(first_seen)
+            if oldest is not None and (first_seen is None or oldest > first_seen):
+                first_seen = oldest
+            updates.append({"target_group": group_id, "total": total, "first": first_seen})
+
+        if updates:
+            connection.execute(
+                update(group).where(group.c.id == bindparam("target_group")).values(
+                    total_occurrences=bindparam("total"),
+                    first_seen=bindparam("first"),
+                    # Sem isso o onupdate de last_seen o levaria para agora
+                    last_seen=group.c.last_seen,
+                ),
+                updates,
+            )
+        return emptied
+
+    @staticmethod
+    def run_exclusive() -> Optional[Dict[str, Any]]:
+        """
+        Executa a retenção se nenhuma outra instância estiver executando
+
+        Postgres: advisory lock (ver database.exclusive_job). Outros bancos: sem coordenação.
+        """
+        with exclusive_job(_ADVISORY_LOCK_KEY) as acquired:
+            if not acquired:
+                logger.info("Retenção já em execução em outra instância")
+                return None
+            return RetentionService.run()
+
+    @staticmethod
+    def start_background() -> Optional[threading.Thread]:
+        """Executa a retenção a cada RETENTION_INTERVAL_HOURS em uma thread daemon"""
+        if RETENTION_INTERVAL_HOURS <= 0 or not (RETENTION_POLICIES or NOTIFICATION_RETENTION_DAYS > 0):
+            return None
+
+        stop = threading.Event()
+
+        def loop():
+            while True:
+                try:
+                    RetentionService.run_exclusive()
+                except Exception as e:
+                    logger.error(f"Erro ao aplicar retenção: {str(e)}")
+                if stop.wait(RETENTION_INTERVAL_HOURS * 3600):
+                    return
+
+        thread = threading.Thread(target=loop, name="retention", daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Aplica as políticas de retenção")
+    parser.add_argument("--dry-run", action="store_true", help="apenas conta as linhas que seriam removidas")
+    args = parser.parse_args()
+
+    if not RETENTION_POLICIES and NOTIFICATION_RETENTION_DAYS <= 0:
+        print("Nenhuma política configurada (RETENTION_DAYS, RETENTION_STATUS_DAYS, ...)")
+    elif args.dry_run:
+        preview = RetentionService.preview()
+        for item in preview["error_logs"]:
+            print(f"  {item['policy']:<24} {item['days']:>5} dias  {item['rows']:>10} linhas")
+        print(f"  {'notification_logs':<24} {NOTIFICATION_RETENTION_DAYS:>5} dias  {preview['notification_logs']:>10} linhas")
+    else:
+        result = RetentionService.run_exclusive()
+        if result:
+            print(f"✓ {fast_json.dumps(result).decode()}")
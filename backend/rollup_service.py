@@ -0,0 +1,486 @@
+"""
+Rollup horário de ocorrências por grupo de erros
+
+Mantém a tabela error_group_rollups (group_id, bucket_hour, count) atualizada na
+ingestão, permitindo consultas de "top N" por janela de tempo com custo proporcional
+ao número de grupos x horas, e não ao número de linhas em error_logs.
+
+Também mantém os sketches HyperLogLog de usuários e sessões afetados, no grupo
+(total) e em cada bucket (para janelas de tempo arbitrárias).
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, func, insert, select, case, update
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Iterable
+import math
+from itertools import groupby
+import models
+from stats_service import StatsService
+from hll import HyperLogLog
+import logging
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_HOUR = 3600
+EPOCH = datetime(1970, 1, 1)
+
+# Tamanho das sparklines (pontos por série)
+SPARKLINE_HOURS = 24
+SPARKLINE_DAYS = 30
+
+# Tendência: últimas TREND_RECENT_HOURS horas comparadas à média dos TREND_BASELINE_DAYS dias anteriores
+TREND_RECENT_HOURS = 24
+TREND_BASELINE_DAYS = 7
+
+
+def epoch_hour(moment: datetime) -> int:
+    """Converte um datetime UTC (naive ou aware) em horas desde a epoch"""
+    if moment.tzinfo is not None:
+        moment = moment.replace(tzinfo=None) - moment.utcoffset()
+    return int((moment - EPOCH).total_seconds()) // SECONDS_PER_HOUR
+
+
+def trend_score(recent: int, baseline: int) -> float:
+    """
+    Quanto a janela recente excede o esperado pela linha de base
+
+    Desvio em relação à contagem esperada, normalizado como um z-score de
+    Poisson: um salto de 0 para 5 pesa tanto quanto de 100 para 150.
+    """
+    expected = baseline / TREND_BASELINE_DAYS * TREND_RECENT_HOURS / 24
+    return round((recent - expected) / math.sqrt(expected + 1), 2)
+
+
+class RollupService:
+    """Serviço para manter e consultar o rollup horário por grupo"""
+
+    @staticmethod
+    def record(db: Session, group_id: int, timestamp: Optional[datetime] = None, delta: int = 1):
+        """
+        Soma `delta` ocorrências ao bucket horário do grupo (upsert)
+
+        Não faz commit: participa da transação da ingestão.
+        """
+        bucket_hour = epoch_hour(timestamp or datetime.utcnow())
+        rollup = models.ErrorGroupRollup
+        dialect = db.bind.dialect.name
+
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            stmt = dialect_insert(rollup).values(group_id=group_id, bucket_hour=bucket_hour, count=delta)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[rollup.group_id, rollup.bucket_hour],
+                set_={"count": rollup.count + stmt.excluded.count},
+            )
+            db.execute(stmt)
+            return
+
+        # Fallback genérico para outros bancos
+        row = db.query(rollup).filter(
+            rollup.group_id == group_id,
+            rollup.bucket_hour == bucket_hour
+        ).with_for_update().first()
+        if row:
+            row.count += delta
+        else:
+            db.add(rollup(group_id=group_id, bucket_hour=bucket_hour, count=delta))
+
+    @staticmethod
+    def track_affected(
+        db: Session,
+        group: models.ErrorGroup,
+        user_ids: Iterable[Optional[str]],
+        session_ids: Iterable[Optional[str]],
+        timestamp: Optional[datetime] = None,
+    ):
+        """
+        Adiciona usuários e sessões aos sketches do grupo e do bucket horário
+
+        Recebe os valores de um lote de erros do grupo (vazios são ignorados).
+        A estimativa do grupo (affected_users/affected_sessions) só é recalculada
+        quando algum registro do sketch muda. Deve ser chamado após `record`.
+        """
+        values = {
+            "users_hll": [value for value in user_ids if value],
+            "sessions_hll": [value for value in session_ids if value],
+        }
+        if not any(values.values()):
+            return
+
+        estimates = {"users_hll": "affected_users", "sessions_hll": "affected_sessions"}
+        for column, items in values.items():
+            if not items:
+                continue
+            sketch = HyperLogLog.from_bytes(getattr(group, column))
+            changed = False
+            for value in items:
+                changed = sketch.add(value) or changed
+            if changed:
+                setattr(group, column, sketch.to_bytes())
+                setattr(group, estimates[column], sketch.estimate())
+
+        rollup = models.ErrorGroupRollup
+        row = db.query(rollup).filter(
+            rollup.group_id == group.id,
+            rollup.bucket_hour == epoch_hour(timestamp or datetime.utcnow())
+        ).with_for_update().first()
+        if row is None:
+            return
+        for column, items in values.items():
+            if not items:
+                continue
+            sketch = HyperLogLog.from_bytes(getattr(row, column))
+            changed = False
+            for value in items:
+                changed = sketch.add(value) or changed
+            if changed:
+                setattr(row, column, sketch.to_bytes())
+
+    @staticmethod
+    def affected_in_window(db: Session, group_id: int, days: int) -> Dict[str, int]:
+        """Usuários e sessões distintos (aproximados) do grupo nos últimos `days` dias"""
+        rollup = models.ErrorGroupRollup
+        start_hour = epoch_hour(datetime.utcnow() - timedelta(days=days))
+
+        users = HyperLogLog()
+        sessions = HyperLogLog()
+        rows = db.query(rollup.users_hll, rollup.sessions_hll).filter(
+            rollup.group_id == group_id,
+            rollup.bucket_hour >= start_hour
+        ).all()
+        for row in rows:
+            if row.users_hll:
+                users.merge(HyperLogLog.from_bytes(row.users_hll))
+            if row.sessions_hll:
+                sessions.merge(HyperLogLog.from_bytes(row.sessions_hll))
+
+        return {"affected_users": users.estimate(), "affected_sessions": sessions.estimate()}
+
+    @staticmethod
+    def recent_window_start(db: Session, group_id: int, count: int) -> Optional[datetime]:
+        """
+        Início da hora a partir da qual estão as `count` ocorrências mais recentes do grupo
+
+        Permite limitar a busca dos erros recentes por período (e descartar
+        partições antigas). None se o rollup não cobre `count` ocorrências.
+        """
+        rollup = models.ErrorGroupRollup
+        rows = db.query(rollup.bucket_hour, rollup.count).filter(
+            rollup.group_id == group_id
+        ).order_by(rollup.bucket_hour.desc()).limit(count).all()
+
+        total = 0
+        for bucket_hour, bucket_count in rows:
+            total += bucket_count
+            if total >= count:
+                return EPOCH + timedelta(hours=bucket_hour)
+        return None
+
+    @staticmethod
+    def sparklines(
+        db: Session,
+        group_ids: Iterable[int],
+        hours: int = SPARKLINE_HOURS,
+        days: int = SPARKLINE_DAYS,
+    ) -> Dict[int, Dict[str, List[int]]]:
+        """
+        Séries de ocorrências por hora e por dia para cada grupo (mais antiga primeiro)
+
+        Lidas do rollup: no máximo `hours` + `days` linhas por grupo, sem tocar em error_logs.
+        """
+        group_ids = list(group_ids)
+        if not group_ids:
+            return {}
+        rollup = models.ErrorGroupRollup
+        current_hour = epoch_hour(datetime.utcnow())
+        first_hour = current_hour - hours + 1
+        current_day = current_hour // 24
+        first_day = current_day - days + 1
+
+        series = {group_id: {"hourly": [0] * hours, "daily": [0] * days} for group_id in group_ids}
+
+        hourly = db.query(rollup.group_id, rollup.bucket_hour, rollup.count).filter(
+            rollup.group_id.in_(group_ids),
+            rollup.bucket_hour >= first_hour
+        ).all()
+        for group_id, bucket_hour, count in hourly:
+            if bucket_hour <= current_hour:
+                series[group_id]["hourly"][bucket_hour - first_hour] += count
+
+        day = (rollup.bucket_hour // 24).label("day")
+        daily = db.query(rollup.group_id, day, func.sum(rollup.count)).filter(
+            rollup.group_id.in_(group_ids),
+            rollup.bucket_hour >= first_day * 24
+        ).group_by(rollup.group_id, day).all()
+        for group_id, bucket_day, count in daily:
+            if bucket_day <= current_day:
+                series[group_id]["daily"][int(bucket_day) - first_day] += int(count)
+
+        return series
+
+    @staticmethod
+    def trend_totals(db: Session, group_id: Optional[int] = None):
+        """
+        Subconsulta (group_id, recent, baseline) com as contagens das janelas de tendência
+
+        Inclui apenas grupos com ocorrências na janela recente (ou só `group_id`, se informado).
+        """
+        rollup = models.ErrorGroupRollup
+        current_hour = epoch_hour(datetime.utcnow())
+        recent_start = current_hour - TREND_RECENT_HOURS + 1
+        baseline_start = recent_start - TREND_BASELINE_DAYS * 24
+
+        recent = func.sum(case((rollup.bucket_hour >= recent_start, rollup.count), else_=0))
+        baseline = func.sum(case((rollup.bucket_hour < recent_start, rollup.count), else_=0))
+        query = db.query(
+            rollup.group_id,
+            recent.label("recent"),
+            baseline.label("baseline")
+        ).filter(
+            rollup.bucket_hour >= baseline_start
+        )
+        if group_id is not None:
+            query = query.filter(rollup.group_id == group_id)
+        return query.group_by(
+            rollup.group_id
+        ).having(recent > 0).subquery()
+
+    @staticmethod
+    def top_groups(db: Session, limit: int = 10, days: int = 7) -> List[Dict[str, Any]]:
+        """
+        Grupos com mais ocorrências na janela, calculados a partir do rollup
+
+        A janela é alinhada à hora: o bucket da hora inicial é incluído inteiro.
+        """
+        rollup = models.ErrorGroupRollup
+        start_hour = epoch_hour(datetime.utcnow() - timedelta(days=days))
+
+        # Grupos excluídos saem antes do LIMIT, senão ocupariam vagas do top
+        totals = db.query(
+            rollup.group_id,
+            func.sum(rollup.count).label("count")
+        ).join(
+            models.ErrorGroup, models.ErrorGroup.id == rollup.group_id
+        ).filter(
+            rollup.bucket_hour >= start_hour,
+            models.ErrorGroup.deleted_at.is_(None)
+        ).group_by(
+            rollup.group_id
+        ).order_by(
+            func.sum(rollup.count).desc(), rollup.group_id
+        ).limit(limit).subquery()
+
+        results = db.query(models.ErrorGroup, totals.c.count).join(
+            totals, models.ErrorGroup.id == totals.c.group_id
+        ).order_by(totals.c.count.desc(), models.ErrorGroup.id).all()
+
+        return [
+            {
+                "group_id": group.id,
+                "message": group.message_pattern,
+                "error_type": group.error_type,
+                "severity": group.severity,
+                "source": group.source,
+                "status": group.status,
+                "count": int(count),
+            }
+            for group, count in results
+        ]
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """
+        Recria o rollup a partir de error_logs em uma única passada set-based
+
+        Returns:
+            int: Número de buckets gerados
+        """
+        rollup = models.ErrorGroupRollup
+        bucket = StatsService.epoch_bucket(db, SECONDS_PER_HOUR)
+
+        db.query(rollup).delete(synchronize_session=False)
+        source = select(
+            models.ErrorLog.group_id,
+            bucket,
+            func.count(models.ErrorLog.id)
+        ).where(
+            models.ErrorLog.group_id.isnot(None)
+        ).group_by(models.ErrorLog.group_id, bucket)
+        db.execute(insert(rollup).from_select(["group_id", "bucket_hour", "count"], source))
+        db.commit()
+
+        RollupService._rebuild_sketches(db)
+
+        total = db.query(rollup).count()
+        logger.info(f"Rollup reconstruído: {total} buckets")
+        return total
+
+    @staticmethod
+    def add_to_sketches(connection, rows: Iterable[tuple]):
+        """
+        Soma usuários e sessões de erros recém-gravados aos sketches existentes
+
+        `rows`: (group_id, timestamp, user_id, session_id), ordenadas por
+        group_id. Só os grupos e buckets presentes são lidos e regravados; os
+        buckets já devem existir no rollup. Usado pela importação de dumps, na
+        mesma transação da carga.
+        """
+        rollup = models.ErrorGroupRollup
+        group_table = models.ErrorGroup.__table__
+        bucket_update = update(rollup.__table__).where(
+            rollup.group_id == bindparam("target_group"),
+            rollup.bucket_hour == bindparam("target_hour")
+        )
+
+        for group_id, group_rows in groupby(rows, key=lambda row: row[0]):
+            buckets: Dict[int, tuple] = {}
+            for _, timestamp, user_id, session_id in group_rows:
+                if not user_id and not session_id:
+                    continue
+                users, sessions = buckets.setdefault(epoch_hour(timestamp), ([], []))
+                if user_id:
+                    users.append(user_id)
+                if session_id:
+                    sessions.append(session_id)
+            if not buckets:
+                continue
+
+            current = connection.execute(
+                select(group_table.c.users_hll, group_table.c.sessions_hll).where(group_table.c.id == group_id)
+            ).one()
+            group_users, group_sessions = HyperLogLog.from_bytes(current[0]), HyperLogLog.from_bytes(current[1])
+            stored = {
+                row.bucket_hour: row
+                for row in connection.execute(
+                    select(rollup.bucket_hour, rollup.users_hll, rollup.sessions_hll).where(
+                        rollup.group_id == group_id,
+                        rollup.bucket_hour.in_(list(buckets))
+                    )
+                )
+            }
+            updates = []
+            for bucket_hour, (users, sessions) in buckets.items():
+                group_users.update(users)
+                group_sessions.update(sessions)
+                row = stored.get(bucket_hour)
+                if row is None:
+                    continue
+                bucket_users = HyperLogLog.from_bytes(row.users_hll)
+                bucket_sessions = HyperLogLog.from_bytes(row.sessions_hll)
+                bucket_users.update(users)
+                bucket_sessions.update(sessions)
+                updates.append({
+                    "target_group": group_id,
+                    "target_hour": bucket_hour,
+                    "users_hll": bucket_users.to_bytes(),
+                    "sessions_hll": bucket_sessions.to_bytes(),
+                })
+            connection.execute(group_table.update().where(group_table.c.id == group_id).values(
+                users_hll=group_users.to_bytes(),
+                sessions_hll=group_sessions.to_bytes(),
+                affected_users=group_users.estimate(),
+                affected_sessions=group_sessions.estimate(),
+                # Sem isso o onupdate de last_seen o levaria para agora
+                last_seen=group_table.c.last_seen,
+            ))
+            if updates:
+                connection.execute(bucket_update, updates)
+
+    @staticmethod
+    def subtract(connection, counts: Dict[tuple, int]):
+        """
+        Desconta dos buckets ocorrências removidas pela retenção
+
+        `counts`: {(group_id, bucket_hour): ocorrências}. Buckets que chegam a
+        zero são removidos. Os sketches de afetados não admitem remoção e ficam
+        como estão. Roda na transação do DELETE.
+        """
+        if not counts:
+            return
+        rollup = models.ErrorGroupRollup.__table__
+        connection.execute(
+            update(rollup).where(
+                rollup.c.group_id == bindparam("target_group"),
+                rollup.c.bucket_hour == bindparam("target_hour")
+            ).values(count=rollup.c.count - bindparam("removed")),
+            [
+                {"target_group": group_id, "target_hour": bucket_hour, "removed": removed}
+                for (group_id, bucket_hour), removed in counts.items()
+            ],
+        )
+        connection.execute(rollup.delete().where(
+            rollup.c.group_id.in_({group_id for group_id, _ in counts}),
+            rollup.c.count <= 0
+        ))
+
+    @staticmethod
+    def _rebuild_sketches(db: Session, batch_size: int = 10000):
+        """Recalcula os sketches percorrendo error_logs ordenado por grupo (memória de um grupo por vez)"""
+        rollup = models.ErrorGroupRollup
+        rows = db.query(
+            models.ErrorLog.group_id,
+            models.ErrorLog.timestamp,
+            models.ErrorLog.user_id,
+            models.ErrorLog.session_id
+        ).filter(
+            models.ErrorLog.group_id.isnot(None)
+        ).order_by(models.ErrorLog.group_id).yield_per(batch_size)
+
+        bucket_update = update(rollup.__table__).where(
+            rollup.group_id == bindparam("target_group"),
+            rollup.bucket_hour == bindparam("target_hour")
+        )
+
+        def flush(group_id, group_sketches, bucket_sketches):
+            group = db.get(models.ErrorGroup, group_id)
+            if group is None:
+                return
+            users, sessions = group_sketches
+            group.users_hll, group.sessions_hll = users.to_bytes(), sessions.to_bytes()
+            group.affected_users, group.affected_sessions = users.estimate(), sessions.estimate()
+            # Um executemany por grupo (centenas de buckets num dataset de 30 dias)
+            db.connection().execute(bucket_update, [
+                {
+                    "target_group": group_id,
+                    "target_hour": bucket_hour,
+                    "users_hll": bucket_users.to_bytes(),
+                    "sessions_hll": bucket_sessions.to_bytes(),
+                }
+                for bucket_hour, (bucket_users, bucket_sessions) in bucket_sketches.items()
+            ])
+
+        current_group = None
+        group_sketches = None
+        bucket_sketches: Dict[int, tuple] = {}
+        for row in rows:
+            if row.group_id != current_group:
+                if current_group is not None:
+                    flush(current_group, group_sketches, bucket_sketches)
+                current_group = row.group_id
+                group_sketches = (HyperLogLog(), HyperLogLog())
+                bucket_sketches = {}
+            buckets = bucket_sketches.setdefault(epoch_hour(row.timestamp), (HyperLogLog(), HyperLogLog()))
+            if row.user_id:
+                group_sketches[0].add(row.user_id)
+                buckets[0].add(row.user_id)
+            if row.session_id:
+                group_sketches[1].add(row.session_id)
+                buckets[1].add(row.session_id)
+        if current_group is not None:
+            flush(current_group, group_sketches, bucket_sketches)
+        db.commit()
+
+
+if __name__ == "__main__":
+    from database import SessionLocal, run_migrations
+
+    run_migrations()
+    session = SessionLocal()
+    try:
+        print(f"✓ {RollupService.rebuild(session)} buckets gerados")
+    finally:
+        session.close()
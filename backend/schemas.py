@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from models import ErrorType, Severity, ErrorStatus, NotificationChannel, AlertCondition
+from models import ErrorType, Severity, ErrorStatus, NotificationChannel, AlertCondition, JobStatus
 
 
 # ==================== ERROR LOG SCHEMAS ====================
@@ -49,12 +49,52 @@ class ErrorLogResponse(ErrorLogBase):
         from_attributes = True
 
 
+# Campos retornados pela listagem quando `fields` não é informado (colunas da tabela da UI).
+# stack_trace, user_agent, error_metadata etc. ficam apenas em /api/errors/{id} ou via `fields`.
+ERROR_LOG_LIST_DEFAULT_FIELDS = (
+    "id", "group_id", "message", "error_type", "severity", "source",
+    "endpoint", "method", "status_code", "status", "assigned_to", "timestamp", "occurrences",
+)
+
+
+class ErrorLogListItem(BaseModel):
+    """
+    Item da listagem de logs (sparse fieldset)
+
+    Contém apenas os campos selecionados; os demais são omitidos da resposta.
+    """
+    id: int
+    group_id: Optional[int] = None
+    message: Optional[str] = None
+    error_type: Optional[ErrorType] = None
+    severity: Optional[Severity] = None
+    source: Optional[str] = None
+    stack_trace: Optional[str] = None
+    endpoint: Optional[str] = None
+    method: Optional[str] = None
+    status_code: Optional[int] = None
+    user_id: Optional[str] = None
+    session_id: Optional[str] = None
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    error_metadata: Optional[Dict[str, Any]] = None
+    status: Optional[ErrorStatus] = None
+    assigned_to: Optional[str] = None
+    notes: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    resolved_at: Optional[datetime] = None
+    occurrences: Optional[int] = None
+    search_highlight: Optional[str] = Field(None, description="Trecho encontrado pela busca, com <mark>")
+
+
 class ErrorLogListResponse(BaseModel):
     """Schema de resposta para lista de logs"""
     total: int
+    total_is_exact: bool = Field(True, description="False quando total é estimado ou limitado (ex: 10000+)")
     skip: int
     limit: int
-    errors: List[ErrorLogResponse]
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página (None na última)")
+    errors: List[ErrorLogListItem]
 
 
 # ==================== ERROR GROUP SCHEMAS ====================
@@ -68,11 +108,16 @@ class ErrorGroupResponse(BaseModel):
     severity: Severity
     source: str
     total_occurrences: int
+    affected_users: Optional[int] = Field(0, description="Usuários distintos afetados (aproximado)")
+    affected_sessions: Optional[int] = Field(0, description="Sessões distintas afetadas (aproximado)")
     first_seen: datetime
     last_seen: datetime
     status: ErrorStatus
     assigned_to: Optional[str]
     notes: Optional[str]
+    sparkline_hourly: Optional[List[int]] = Field(None, description="Ocorrências por hora nas últimas 24h (mais antiga primeiro)")
+    sparkline_daily: Optional[List[int]] = Field(None, description="Ocorrências por dia nos últimos 30 dias (mais antiga primeiro)")
+    trend_score: Optional[float] = Field(None, description="Excesso das últimas 24h sobre a média dos 7 dias anteriores (z-score)")
 
     class Config:
         from_attributes = True
@@ -88,14 +133,98 @@ class ErrorGroupUpdate(BaseModel):
 class ErrorGroupListResponse(BaseModel):
     """Schema de resposta para lista de grupos"""
     total: int
+    total_is_exact: bool = Field(True, description="False quando total é estimado ou limitado (ex: 10000+)")
     skip: int
     limit: int
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página (None na última)")
     groups: List[ErrorGroupResponse]
 
 
 class ErrorGroupDetailResponse(ErrorGroupResponse):
     """Schema de resposta detalhada de grupo (com erros)"""
     recent_errors: List[ErrorLogResponse] = Field(default_factory=list)
+    window_days: Optional[int] = None
+    window_affected_users: Optional[int] = None
+    window_affected_sessions: Optional[int] = None
+
+
+# ==================== JOB SCHEMAS ====================
+
+class JobResponse(BaseModel):
+    """Schema de resposta de job em segundo plano"""
+    id: int
+    kind: str
+    params: Optional[Dict[str, Any]]
+    status: JobStatus
+    total: Optional[int] = Field(None, description="Linhas a processar (estimado no início do job)")
+    processed: int
+    progress: Optional[float] = Field(None, description="Fração concluída (0 a 1)")
+    cancel_requested: bool
+    error: Optional[str]
+    created_at: Optional[datetime]
+    started_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class JobListResponse(BaseModel):
+    """Schema de resposta para lista de jobs"""
+    total: int
+    jobs: List[JobResponse]
+
+
+class ErrorGroupUpdateResponse(ErrorGroupResponse):
+    """Grupo atualizado e, se o status mudou em muitos erros, o job que propaga o status"""
+    job: Optional[JobResponse] = None
+
+
+# ==================== BULK SCHEMAS ====================
+
+BULK_MAX_IDS = 10000
+
+
+class ErrorGroupBulkFilter(BaseModel):
+    """Seleção de grupos por filtro (campos combinados com E)"""
+    error_type: Optional[ErrorType] = None
+    severity: Optional[Severity] = None
+    source: Optional[str] = None
+    status: Optional[ErrorStatus] = None
+
+
+class ErrorLogBulkFilter(ErrorGroupBulkFilter):
+    """Seleção de erros por filtro (campos combinados com E)"""
+    group_id: Optional[int] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    metadata: Optional[Dict[str, List[str]]] = Field(
+        None, description="Filtros de metadata: {chave: [valores]} (valores combinados com OU)"
+    )
+
+
+class ErrorGroupBulkUpdate(BaseModel):
+    """Atualização em massa de grupos: `ids` ou `filter`, mais `update`"""
+    ids: Optional[List[int]] = Field(None, max_length=BULK_MAX_IDS, description="IDs dos grupos")
+    filter: Optional[ErrorGroupBulkFilter] = None
+    update: ErrorGroupUpdate
+
+
+class ErrorLogBulkUpdate(BaseModel):
+    """Atualização em massa de erros: `ids` ou `filter`, mais `update`"""
+    ids: Optional[List[int]] = Field(None, max_length=BULK_MAX_IDS, description="IDs dos erros")
+    filter: Optional[ErrorLogBulkFilter] = None
+    update: ErrorLogUpdate
+
+
+class BulkUpdateResponse(BaseModel):
+    """Resumo de uma atualização em massa"""
+    matched: int = Field(..., description="Linhas selecionadas (grupos ou erros)")
+    matched_is_exact: bool = Field(True, description="False quando a seleção passou do limite do modo direto")
+    updated: int = Field(..., description="Linhas atualizadas na transação da requisição")
+    errors_updated: Optional[int] = Field(None, description="Erros dos grupos atualizados na mesma transação")
+    job: Optional[JobResponse] = Field(None, description="Job que aplica a atualização em lotes (seleções grandes)")
 
 
 # ==================== ALERT RULE SCHEMAS ====================
@@ -173,8 +302,10 @@ class NotificationLogResponse(BaseModel):
 class NotificationLogListResponse(BaseModel):
     """Schema de resposta para lista de notificações"""
     total: int
+    total_is_exact: bool = Field(True, description="False quando total é estimado ou limitado (ex: 10000+)")
     skip: int
     limit: int
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página (None na última)")
     notifications: List[NotificationLogResponse]
 
 
@@ -189,4 +320,33 @@ class StatsSummary(BaseModel):
     by_status: Dict[str, int]
     error_rate: float
     period_days: int
+    facets: Optional[Dict[str, List[Dict[str, Any]]]] = Field(
+        None, description="Valores mais frequentes por chave de error_metadata (com `facets=`)"
+    )
+
+
+
+# ==================== EDGE SCHEMAS ====================
+
+class EdgeGroupItem(BaseModel):
+    """Grupo agregado enviado por um coletor de borda"""
+    fingerprint: str = Field(..., max_length=64)
+    message_pattern: str
+    error_type: ErrorType
+    severity: Severity
+    source: str = Field(..., max_length=100)
+    total_occurrences: int = Field(..., ge=0, description="Contagem acumulada no coletor")
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+
+
+class EdgeGroupBatch(BaseModel):
+    """Lote de grupos de um coletor de borda"""
+    edge_id: str = Field(..., min_length=1, max_length=100)
+    groups: List[EdgeGroupItem] = Field(..., max_length=5000)
+
 
+class EdgeGroupBatchResponse(BaseModel):
+    received: int
+    created: int = Field(..., description="Grupos novos no servidor central")
+    updated: int = Field(..., description="Grupos com novas ocorrências")
@@ -0,0 +1,141 @@
+"""
+Busca textual em message e stack_trace
+
+Modos:
+- fulltext: tsvector + GIN no Postgres, FTS5 no SQLite; ranqueada e com prefixo
+  (cada termo casa pelo início da palavra: "conn time" encontra "connection timeout")
+- substring: ILIKE '%termo%', acelerado pelos índices de trigramas (pg_trgm) no
+  Postgres; útil para identificadores e trechos no meio de palavras
+"""
+
+import html
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, literal_column, text, bindparam, Integer, Float
+from sqlalchemy.orm import Query, Session
+import models
+
+SEARCH_MODES = ("fulltext", "substring")
+
+# Marcadores internos trocados por <mark> depois de escapar o HTML do fragmento
+_START_MARK = "\x02"
+_STOP_MARK = "\x03"
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _terms(search: str) -> List[str]:
+    return _TERM_PATTERN.findall(search.lower())
+
+
+def _render_fragment(fragment: Optional[str]) -> Optional[str]:
+    """Escapa o fragmento e converte os marcadores internos em <mark>"""
+    if not fragment:
+        return None
+    escaped = html.escape(fragment)
+    return escaped.replace(_START_MARK, "<mark>").replace(_STOP_MARK, "</mark>")
+
+
+class SearchService:
+    """Aplica filtros de busca e gera trechos destacados"""
+
+    @staticmethod
+    def _dialect(db: Session) -> str:
+        return db.bind.dialect.name
+
+    @staticmethod
+    def apply(query: Query, search: str, mode: str = "fulltext"):
+        """
+        Aplica o filtro de busca à consulta de ErrorLog
+
+        Returns:
+            tuple: (query, rank) — rank é uma expressão de relevância (maior = melhor)
+            ou None quando o modo não ranqueia
+        """
+        dialect = SearchService._dialect(query.session)
+        terms = _terms(search)
+
+        if mode == "fulltext" and terms and dialect == "postgresql":
+            tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+            vector = literal_column("error_logs.search_vector")
+            query = query.filter(vector.op("@@")(tsquery))
+            return query, func.ts_rank_cd(vector, tsquery)
+
+        if mode == "fulltext" and terms and dialect == "sqlite":
+            matches = text(
+                "SELECT rowid AS id, bm25(error_logs_fts, 2.0, 1.0) AS score "
+                "FROM error_logs_fts WHERE error_logs_fts MATCH :fts_query"
+            ).bindparams(
+                fts_query=" ".join(f'"{term}"*' for term in terms)
+            ).columns(id=Integer, score=Float).subquery("fts")
+            query = query.join(matches, models.ErrorLog.id == matches.c.id)
+            # bm25 do FTS5 é negativo (menor = mais relevante)
+            return query, -matches.c.score
+
+        # Substring (trigramas no Postgres) ou fallback portátil
+        pattern = f"%{search}%"
+        query = query.filter(
+            (models.ErrorLog.message.ilike(pattern)) |
+            (models.ErrorLog.stack_trace.ilike(pattern))
+        )
+        return query, None
+
+    @staticmethod
+    def highlights(db: Session, error_ids: List[int], search: str, mode: str = "fulltext") -> Dict[int, str]:
+        """
+        Trecho com os termos encontrados destacados em <mark>, por id de erro
+
+        Calculado apenas para as linhas da página.
+        """
+        if not error_ids:
+            return {}
+        dialect = SearchService._dialect(db)
+        terms = _terms(search)
+
+        if mode == "fulltext" and terms and dialect == "postgresql":
+            tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+            document = func.concat_ws(" … ", models.ErrorLog.message, models.ErrorLog.stack_trace)
+            options = f"StartSel={_START_MARK}, StopSel={_STOP_MARK}, MaxFragments=2, MaxWords=20, MinWords=5"
+            rows = db.query(
+                models.ErrorLog.id,
+                func.ts_headline("simple", document, tsquery, options)
+            ).filter(models.ErrorLog.id.in_(error_ids)).all()
+            return {row[0]: _render_fragment(row[1]) for row in rows}
+
+        if mode == "fulltext" and terms and dialect == "sqlite":
+            statement = text(
+                "SELECT rowid, snippet(error_logs_fts, -1, :start, :stop, '…', 16) "
+                "FROM error_logs_fts WHERE error_logs_fts MATCH :fts_query AND rowid IN :ids"
+            ).bindparams(
+                bindparam("ids", expanding=True),
+                fts_query=" ".join(f'"{term}"*' for term in terms),
+                start=_START_MARK,
+                stop=_STOP_MARK,
+                ids=list(error_ids),
+            )
+            return {row[0]: _render_fragment(row[1]) for row in db.execute(statement)}
+
+        # Substring: recortar em Python ao redor da primeira ocorrência
+        result = {}
+        needle = search.lower()
+        rows = db.query(
+            models.ErrorLog.id, models.ErrorLog.message, models.ErrorLog.stack_trace
+        ).filter(models.ErrorLog.id.in_(error_ids)).all()
+        for error_id, message, stack_trace in rows:
+            for content in (message, stack_trace):
+                position = (content or "").lower().find(needle)
+                if position < 0:
+                    continue
+                start = max(0, position - 60)
+                end = min(len(content), position + len(search) + 60)
+                fragment = (
+                    ("…" if start else "")
+                    + content[start:position]
+                    + _START_MARK + content[position:position + len(search)] + _STOP_MARK
+                    + content[position + len(search):end]
+                    + ("…" if end < len(content) else "")
+                )
+                result[error_id] = _render_fragment(fragment)
+                break
+        return result
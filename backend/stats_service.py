@@ -0,0 +1,256 @@
+"""
+Serviço de estatísticas agregadas sobre os logs de erros
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import func, cast, Integer, literal_column
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Callable
+from database import DB_ASYNC, read_session
+from archive_service import ArchiveService
+import models
+import os
+
+# Granularidades suportadas pela timeline (em segundos)
+TIMELINE_INTERVALS = {
+    "minute": 60,
+    "5m": 300,
+    "hour": 3600,
+    "day": 86400,
+}
+
+# Colunas permitidas para dividir a timeline em séries
+TIMELINE_SPLITS = {
+    "severity": models.ErrorLog.severity,
+    "type": models.ErrorLog.error_type,
+}
+
+MAX_TIMELINE_BUCKETS = 2000
+
+# Valores sempre presentes no resumo (mesmo com contagem zero)
+SUMMARY_SOURCES = ["frontend", "backend", "database", "api", "external_service"]
+
+# Consultas independentes do dashboard rodam em paralelo, cada uma com sua conexão do pool
+_dashboard_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("STATS_PARALLEL_WORKERS", "3")),
+    thread_name_prefix="stats"
+)
+
+
+def _with_session(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Executa `fn` com uma sessão de leitura própria (conexão separada do pool)"""
+    db = read_session()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+class StatsService:
+    """Consultas estatísticas usadas pelos endpoints /api/stats"""
+
+    @staticmethod
+    def epoch_bucket(db: Session, step: int):
+        """
+        Expressão SQL com o índice do bucket (epoch // step) de cada erro
+
+        Em Postgres usa extract(epoch), equivalente a date_trunc para granularidades
+        alinhadas a UTC; em SQLite usa strftime('%s'). O filtro por intervalo de
+        timestamp continua sendo aplicado na coluna crua, preservando o uso do índice.
+        """
+        return StatsService.epoch_bucket_of(db.bind.dialect.name, models.ErrorLog.timestamp, step)
+
+    @staticmethod
+    def epoch_bucket_of(dialect: str, column, step: int):
+        """epoch_bucket sobre uma coluna qualquer (ex.: a tabela temporária da importação)"""
+        # Divisor literal para que a expressão do SELECT e do GROUP BY seja idêntica
+        divisor = literal_column(str(int(step)), Integer)
+        if dialect == "sqlite":
+            epoch = cast(func.strftime("%s", column), Integer)
+            return epoch // divisor
+        return func.floor(func.extract("epoch", column) / divisor)
+
+    @staticmethod
+    def summary(db: Session, days: int = 7) -> Dict[str, Any]:
+        """
+        Resumo estatístico dos últimos `days` dias
+
+        Todas as distribuições saem de uma única varredura agrupada por
+        (severidade, tipo, origem, status), agregada em memória. Períodos além
+        da janela quente somam as contagens do arquivo frio (Parquet).
+        """
+        start_date = datetime.utcnow() - timedelta(days=days)
+
+        results = db.query(
+            models.ErrorLog.severity,
+            models.ErrorLog.error_type,
+            models.ErrorLog.source,
+            models.ErrorLog.status,
+            func.count(models.ErrorLog.id).label("count")
+        ).filter(
+            models.ErrorLog.timestamp >= start_date
+        ).group_by(
+            models.ErrorLog.severity,
+            models.ErrorLog.error_type,
+            models.ErrorLog.source,
+            models.ErrorLog.status
+        ).all()
+        rows = [
+            (row.severity.value, row.error_type.value, row.source, row.status.value if row.status else None, row.count)
+            for row in results
+        ]
+        if ArchiveService.covers(start_date):
+            rows += [
+                (row["severity"], row["error_type"], row["source"], row["status"], row["count"])
+                for row in ArchiveService.summary_counts(start_date)
+            ]
+
+        total_errors = 0
+        by_severity = {severity.value: 0 for severity in models.Severity}
+        by_type = {error_type.value: 0 for error_type in models.ErrorType}
+        by_source = {source: 0 for source in SUMMARY_SOURCES}
+        by_status = {status.value: 0 for status in models.ErrorStatus}
+        for severity, error_type, source, status, count in rows:
+            total_errors += count
+            by_severity[severity] += count
+            by_type[error_type] += count
+            if source in by_source:
+                by_source[source] += count
+            if status is not None:
+                by_status[status] += count
+
+        # Error rate per day
+        error_rate = round(total_errors / days, 2) if days > 0 else 0
+
+        return {
+            "total_errors": total_errors,
+            "by_severity": by_severity,
+            "by_type": by_type,
+            "by_source": by_source,
+            "by_status": by_status,
+            "error_rate": error_rate,
+            "period_days": days
+        }
+
+    @staticmethod
+    def dashboard(days: int = 7, interval: str = "day", top_limit: int = 5) -> Dict[str, Any]:
+        """
+        Resumo, timeline e top erros em uma única resposta
+
+        As três consultas são independentes e rodam em paralelo em sessões separadas,
+        então a latência é a da consulta mais lenta e não a soma das três.
+        """
+        from rollup_service import RollupService
+
+        if DB_ASYNC:
+            from async_database import gather_read_sessions
+
+            summary, timeline, top_errors = gather_read_sessions(
+                lambda db: StatsService.summary(db, days),
+                lambda db: StatsService.timeline(db, days=days, interval=interval),
+                lambda db: RollupService.top_groups(db, limit=top_limit, days=days),
+            )
+            return {"summary": summary, "timeline": timeline, "top_errors": top_errors}
+
+        summary = _dashboard_executor.submit(_with_session, StatsService.summary, days)
+        timeline = _dashboard_executor.submit(
+            _with_session, StatsService.timeline, days=days, interval=interval
+        )
+        top_errors = _dashboard_executor.submit(
+            _with_session, RollupService.top_groups, limit=top_limit, days=days
+        )
+
+        return {
+            "summary": summary.result(),
+            "timeline": timeline.result(),
+            "top_errors": top_errors.result(),
+        }
+
+    @staticmethod
+    def timeline(
+        db: Session,
+        days: int = 7,
+        interval: str = "day",
+        split_by: Optional[str] = None,
+        hours: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Timeline de erros em formato colunar (arrays paralelos), com buckets vazios preenchidos
+
+        Args:
+            db: Sessão do banco de dados
+            days: Período em dias (ignorado se `hours` for informado)
+            interval: Granularidade (minute, 5m, hour, day)
+            split_by: Dividir séries por "severity" ou "type" (opcional)
+            hours: Período em horas, útil para incidentes em andamento
+
+        Returns:
+            dict: {"interval", "step_seconds", "start", "buckets": [...], "series": {nome: [...]}}
+        """
+        if interval not in TIMELINE_INTERVALS:
+            raise ValueError(f"Intervalo inválido: {interval}")
+        if split_by is not None and split_by not in TIMELINE_SPLITS:
+            raise ValueError(f"split_by inválido: {split_by}")
+
+        step = TIMELINE_INTERVALS[interval]
+        now = datetime.utcnow()
+        start_date = now - (timedelta(hours=hours) if hours else timedelta(days=days))
+
+        epoch_origin = datetime(1970, 1, 1)
+        first_bucket = int((start_date - epoch_origin).total_seconds()) // step
+        last_bucket = int((now - epoch_origin).total_seconds()) // step
+        bucket_count = last_bucket - first_bucket + 1
+        if bucket_count > MAX_TIMELINE_BUCKETS:
+            raise ValueError(
+                f"Período gera {bucket_count} buckets (máximo {MAX_TIMELINE_BUCKETS}); "
+                f"use um intervalo maior"
+            )
+
+        # Alinhar o início ao bucket para que o intervalo seja fechado em buckets inteiros
+        range_start = epoch_origin + timedelta(seconds=first_bucket * step)
+
+        bucket = StatsService.epoch_bucket(db, step).label("bucket")
+        columns = [bucket, func.count(models.ErrorLog.id).label("count")]
+        group_by = [bucket]
+        if split_by:
+            split_column = TIMELINE_SPLITS[split_by].label("series")
+            columns.append(split_column)
+            group_by.append(split_column)
+
+        results = [
+            (row.bucket, row.count, row.series if split_by else None)
+            for row in db.query(*columns).filter(
+                models.ErrorLog.timestamp >= range_start
+            ).group_by(*group_by).all()
+        ]
+        if ArchiveService.covers(range_start):
+            results += [
+                (row["bucket"], row["count"], row.get("series"))
+                for row in ArchiveService.timeline_counts(range_start, step, split_by)
+            ]
+
+        # Preencher buckets vazios com zero (equivalente a generate_series, sem ida extra ao banco)
+        series: Dict[str, list] = {}
+        if not split_by:
+            series["total"] = [0] * bucket_count
+        for bucket_index, count, series_value in results:
+            index = int(bucket_index) - first_bucket
+            if not 0 <= index < bucket_count:
+                continue
+            name = "total"
+            if split_by:
+                name = series_value.value if hasattr(series_value, "value") else str(series_value)
+            values = series.setdefault(name, [0] * bucket_count)
+            values[index] += count
+
+        return {
+            "interval": interval,
+            "step_seconds": step,
+            "start": range_start.isoformat() + "Z",
+            "buckets": [
+                (range_start + timedelta(seconds=i * step)).isoformat() + "Z"
+                for i in range(bucket_count)
+            ],
+            "series": series,
+        }
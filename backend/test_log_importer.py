@@ -0,0 +1,74 @@
+"""
+Casos do parser de log_importer (pytest)
+
+Uso:
+    cd backend && python -m pytest -q test_log_importer.py
+"""
+import os
+
+# O parser não usa o banco; models só precisa de um engine para importar
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from log_importer import LogParser  # noqa: E402
+
+
+def _parse(text: str):
+    parser = LogParser()
+    records = []
+    for number, line in enumerate(text.splitlines(), 1):
+        records.extend(parser.feed(line, number))
+    return records + parser.close()
+
+
+def test_chained_exceptions_are_one_record():
+    records = _parse(
+        "Traceback (most recent call last):\n"
+        '  File "a.py", line 1, in <module>\n'
+        "ValueError: first\n"
+        "\n"
+        "During handling of the above exception, another exception occurred:\n"
+        "\n"
+        "Traceback (most recent call last):\n"
+        '  File "b.py", line 2, in <module>\n'
+        "KeyError: 'second'\n"
+    )
+    assert len(records) == 1
+    assert records[0]["message"] == "KeyError: 'second'"
+    assert "ValueError: first" in records[0]["stack_trace"]
+
+
+def test_back_to_back_tracebacks_are_separate_records():
+    records = _parse(
+        "Traceback (most recent call last):\n"
+        '  File "a.py", line 1, in <module>\n'
+        "ValueError: first\n"
+        "Traceback (most recent call last):\n"
+        '  File "b.py", line 2, in <module>\n'
+        "KeyError: 'second'\n"
+    )
+    assert [record["message"] for record in records] == ["ValueError: first", "KeyError: 'second'"]
+    assert "ValueError" not in records[1]["stack_trace"]
+
+
+def test_error_line_with_exception_text_keeps_its_traceback():
+    records = _parse(
+        "2024-01-01 10:00:02 ERROR ValueError: bad input\n"
+        "Traceback (most recent call last):\n"
+        '  File "a.py", line 1, in <module>\n'
+        "ValueError: bad input\n"
+        "2024-01-01 10:00:03 INFO ok\n"
+    )
+    assert len(records) == 1
+    assert records[0]["timestamp"] == "2024-01-01T10:00:02"
+    assert records[0]["stack_trace"].startswith("Traceback (most recent call last):")
+
+
+def test_error_line_with_js_stack():
+    records = _parse(
+        "2024-01-01 10:00:02 ERROR TypeError: x is undefined\n"
+        "    at render (app.js:10:5)\n"
+        "2024-01-01 10:00:03 INFO ok\n"
+    )
+    assert len(records) == 1
+    assert records[0]["message"] == "TypeError: x is undefined"
+    assert records[0]["timestamp"] == "2024-01-01T10:00:02"
@@ -24,16 +24,14 @@ const Dashboard = () => {
   const loadDashboardData = async () => {
     setLoading(true);
     try {
-      const [statsRes, timelineRes, topErrorsRes, recentErrorsRes] = await Promise.all([
-        statsAPI.getSummary(period),
-        statsAPI.getTimeline(period),
-        statsAPI.getTopErrors(5, period),
+      const [dashboardRes, recentErrorsRes] = await Promise.all([
+        statsAPI.getDashboard(period),
         errorLogsAPI.getAll({ limit: 10 })
       ]);
 
-      setStats(statsRes.data);
-      setTimeline(timelineRes.data);
-      setTopErrors(topErrorsRes.data.top_errors);
+      setStats(dashboardRes.data.summary);
+      setTimeline(dashboardRes.data.timeline);
+      setTopErrors(dashboardRes.data.top_errors);
       setRecentErrors(recentErrorsRes.data.errors);
     } catch (error) {
       console.error('Error loading dashboard data:', error);
@@ -43,11 +41,11 @@ const Dashboard = () => {
   };
 
   const timelineChartData = timeline ? {
-    labels: timeline.timeline.map(item => new Date(item.date).toLocaleDateString('pt-BR', { day: '2-digit', month: '2-digit' })),
+    labels: timeline.buckets.map(bucket => new Date(bucket).toLocaleDateString('pt-BR', { day: '2-digit', month: '2-digit', timeZone: 'UTC' })),
     datasets: [
       {
         label: 'Erros por dia',
-        data: timeline.timeline.map(item => item.count),
+        data: timeline.series.total,
         borderColor: '#3b82f6',
         backgroundColor: 'rgba(59, 130, 246, 0.1)',
         tension: 0.4,
@@ -21,8 +21,9 @@ export const errorLogsAPI = {
 // Statistics API
 export const statsAPI = {
   getSummary: (days = 7) => api.get('/api/stats/summary', { params: { days } }),
-  getTimeline: (days = 7) => api.get('/api/stats/timeline', { params: { days } }),
+  getTimeline: (days = 7, options = {}) => api.get('/api/stats/timeline', { params: { days, ...options } }),
   getTopErrors: (limit = 10, days = 7) => api.get('/api/stats/top-errors', { params: { limit, days } }),
+  getDashboard: (days = 7, topLimit = 5) => api.get('/api/stats/dashboard', { params: { days, top_limit: topLimit } }),
 };
 
 // Health check